@@ -0,0 +1,199 @@
+"""
+Size-bounded on-disk LRU cache for downloaded GitHub Actions artifacts (stdlib only).
+
+- Keyed by artifact id + digest (`sha256:<hex>` from the artifacts API); when a
+  digest is known, downloaded bytes are verified and a mismatch is neither
+  cached nor returned.
+- One cache directory per host, shared by every Streamlit session (wrap the
+  ArtifactCache in st.cache_resource) and kept across app restarts.
+- Least recently used entries are evicted once `max_bytes` is exceeded;
+  entries past the artifact's `expires_at` are dropped on lookup.
+- Concurrent misses for the same artifact download it once (per-key lock).
+
+  cache = ArtifactCache("/tmp/fossology_artifact_cache", max_bytes=2 << 30)
+  data = cache.fetch(artifact["id"], lambda: download(artifact["id"]),
+                     digest=artifact.get("digest"), expires_at=artifact.get("expires_at"))
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+def _expiry_ts(expires_at):
+    if not expires_at:
+        return None
+    if isinstance(expires_at, (int, float)):
+        return float(expires_at)
+    return datetime.fromisoformat(str(expires_at).replace("Z", "+00:00")).timestamp()
+
+class ArtifactCache:
+    def __init__(self, root: str, max_bytes: int, on_lookup=None):
+        """`on_lookup(result)` is called with "hit" / "miss" for every fetch (e.g. a metrics counter)."""
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self.on_lookup = on_lookup
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> [lock, callers using it]; dropped when the last caller leaves
+        self._entries = OrderedDict()  # key -> {"size", "expires_at"}; oldest use first
+        self.hits = self.misses = self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    # ---- layout ----
+    @staticmethod
+    def key(artifact_id, digest: str = "") -> str:
+        hexdigest = (digest or "").split(":", 1)[-1][:64]
+        return f"{int(artifact_id)}_{hexdigest or 'nodigest'}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.zip")
+
+    def _load(self):
+        """Rebuild the index from disk, least recently used first (by mtime)."""
+        found = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".zip"):
+                continue
+            key = name[:-4]
+            path = self._path(key)
+            try:
+                with open(path[:-4] + ".json") as fh:
+                    meta = json.load(fh)
+                found.append((os.path.getmtime(path), key, {"size": os.path.getsize(path),
+                                                            "expires_at": meta.get("expires_at")}))
+            except (OSError, ValueError):
+                self._remove_files(key)
+        for _, key, meta in sorted(found):
+            self._entries[key] = meta
+        with self._lock:
+            self._evict(0)
+
+    def _remove_files(self, key: str):
+        for ext in (".zip", ".json"):
+            try:
+                os.remove(os.path.join(self.root, key + ext))
+            except FileNotFoundError:
+                pass
+
+    # ---- bookkeeping (callers hold self._lock) ----
+    @property
+    def total_bytes(self) -> int:
+        return sum(e["size"] for e in self._entries.values())
+
+    def _drop(self, key: str):
+        self._entries.pop(key, None)
+        self._remove_files(key)
+
+    def _evict(self, incoming: int):
+        while self._entries and self.total_bytes + incoming > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _expired(self, meta: dict, now: float) -> bool:
+        exp = meta.get("expires_at")
+        return exp is not None and exp <= now
+
+    # ---- public API ----
+    def get(self, artifact_id, digest: str = "") -> bytes:
+        """Cached bytes or None (no hit/miss accounting; see fetch)."""
+        key = self.key(artifact_id, digest)
+        with self._lock:
+            meta = self._entries.get(key)
+            if meta is None:
+                return None
+            if self._expired(meta, time.time()):
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            os.utime(path)
+            with open(path, "rb") as fh:
+                return fh.read()
+        except OSError:
+            with self._lock:
+                self._drop(key)
+            return None
+
+    @staticmethod
+    def verify(data: bytes, digest: str = "") -> bool:
+        """False when a sha256 digest is given and the bytes do not match it."""
+        algo, _, expected = (digest or "").partition(":")
+        return not (algo == "sha256" and expected and hashlib.sha256(data).hexdigest() != expected)
+
+    def put(self, artifact_id, data: bytes, digest: str = "", expires_at=None) -> bool:
+        """Store bytes; False when expired, over the budget or failing digest verification."""
+        expiry = _expiry_ts(expires_at)
+        if not data or len(data) > self.max_bytes or (expiry is not None and expiry <= time.time()):
+            return False
+        if not self.verify(data, digest):
+            return False
+        key = self.key(artifact_id, digest)
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._evict(len(data))
+            with open(path[:-4] + ".json", "w") as fh:
+                json.dump({"artifact_id": int(artifact_id), "digest": digest or "", "expires_at": expiry}, fh)
+            os.replace(tmp, path)
+            self._entries[key] = {"size": len(data), "expires_at": expiry}
+        return True
+
+    def fetch(self, artifact_id, download, digest: str = "", expires_at=None) -> bytes:
+        """
+        Cached bytes, else `download()` (once per key across threads) and cache
+        the result. None when the download does not match the digest.
+        """
+        key = self.key(artifact_id, digest)
+        with self._lock:
+            slot = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            return self._fetch_locked(slot[0], artifact_id, download, digest, expires_at)
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._key_locks[key]
+
+    def _fetch_locked(self, key_lock, artifact_id, download, digest, expires_at) -> bytes:
+        with key_lock:
+            data = self.get(artifact_id, digest)
+            result = "hit" if data is not None else "miss"
+            with self._lock:
+                if data is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if self.on_lookup:
+                self.on_lookup(result)
+            if data is None:
+                data = download()
+                if data and not self.verify(data, digest):
+                    return None
+                if data:
+                    self.put(artifact_id, data, digest, expires_at)
+        return data
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            stale = [k for k, m in self._entries.items() if self._expired(m, now)]
+            for k in stale:
+                self._drop(k)
+        return len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries), "bytes": self.total_bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,539 @@
+"""
+Persistent FOSSology backend: scan against one long-lived instance.
+
+By default every run starts a throwaway FOSSology container and logs in with
+the demo credentials. With the repository variable FOSSOLOGY_URL set, the
+workflows skip the container and run the same REST sequence (/tokens,
+/uploads, /jobs, /uploads/{id}/reports, /jobs/{id}/download) against that
+instance. On top of the REST calls a shared instance needs:
+
+  connections – keep-alive HTTP(S) connections, at most N per process
+  tokens      – a provisioned token (FOSSOLOGY_TOKEN; required by the
+                workflows), or tokens created once from FOSSOLOGY_USERNAME /
+                FOSSOLOGY_PASSWORD and reused until they expire or are rejected
+  upload queue – at most `concurrency` uploads in flight per process, and no
+                new upload while the instance already runs `max_active` jobs.
+                Best-effort across runs: the job count is read from the server
+                but not claimed, so runs checking at the same moment can all
+                upload and briefly exceed the limit
+  retention   – after the reports are downloaded: `delete` the upload,
+                `keep` it, or `<N>d` to keep it and delete workflow uploads
+                older than N days. Only uploads whose description starts with
+                "fossology-workflow" are ever deleted.
+
+Standard library only; the local stand-in is `fossology_loadtest.py serve-fossology`:
+
+  python3 fossology_backend.py token
+  python3 fossology_backend.py wait-slot --max-active 4
+  python3 fossology_backend.py release --upload-id 42 --retention 7d
+  python3 fossology_backend.py scan --agents nomos,ojo,copyright --concurrency 2 --out out a.tar.gz b.zip
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote, urlsplit
+
+from fossology_shard import json_to_csv
+
+WORKFLOW_DESC = "fossology-workflow"
+ACTIVE_STATES = ("Queued", "Processing")
+RETRY_STATUSES = (502, 503, 504)
+STRAGGLER_S = 24 * 3600          # uploads of failed runs (jobs are capped at 6 h) are pruned after a day
+RETENTION_RE = re.compile(r"^(delete|keep|(\d+)d)$")
+AGENT_MAP = {"nomos": "nomos", "ojo": "ojo", "monk": "monk", "copyright": "copyright_email_author"}
+REPORT_FORMATS = ("spdx2", "readmeoss", "license_text", "license_list")
+
+class BackendError(RuntimeError):
+    def __init__(self, message: str, status: int = 0):
+        super().__init__(message)
+        self.status = status
+
+def log(msg: str):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {msg}", file=sys.stderr, flush=True)
+
+def sanitize_tag(s: str) -> str:
+    # Same rules as the workflow
+    s = re.sub(r"[\s/:@#?&]", "-", s or "")
+    s = re.sub(r"[^A-Za-z0-9._-]", "-", s)
+    return re.sub(r"-{2,}", "-", s)
+
+# =========================
+# CONNECTIONS + TOKENS
+# =========================
+class ConnectionPool:
+    """Keep-alive connections to the API host; at most `size` requests in flight."""
+
+    def __init__(self, base_url: str, size: int = 4, timeout: float = 120.0):
+        parts = urlsplit(base_url.rstrip("/"))
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise BackendError(f"Not an http(s) API URL: {base_url!r}")
+        self.scheme, self.host, self.port, self.prefix = parts.scheme, parts.hostname, parts.port, parts.path
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def _connection(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            return cls(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method: str, path: str, body=None, headers: dict = None):
+        """(status, headers, data). A stale keep-alive connection is retried once unless the body is a stream."""
+        with self.slots:
+            for attempt in (0, 1):
+                conn = self._connection()
+                try:
+                    conn.request(method, self.prefix + path, body=body, headers=headers or {})
+                    resp = conn.getresponse()
+                    data = resp.read()
+                except (http.client.HTTPException, OSError):
+                    conn.close()
+                    if attempt or not (body is None or isinstance(body, bytes)):
+                        raise
+                    continue
+                self.idle.put(conn)
+                return resp.status, {k.lower(): v for k, v in resp.getheaders()}, data
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+class TokenPool:
+    """
+    Bearer tokens for the API. A provisioned token is used as-is; otherwise a
+    token is created from the credentials on first use and shared until it
+    nears expiry or the server rejects it, then replaced. At most `size` tokens
+    are created per process, so a misconfigured account cannot fill the
+    instance's token table.
+    """
+
+    def __init__(self, conns: ConnectionPool, token: str = "", username: str = "", password: str = "",
+                 scope: str = "write", days: int = 1, size: int = 8, name_prefix: str = "ci"):
+        self.conns = conns
+        self.username, self.password = username, password
+        self.scope, self.days, self.size, self.name_prefix = scope, days, size, name_prefix
+        self.lock = threading.Lock()
+        self.created = 0
+        self.provisioned = bool(token)
+        self.token = token.replace("Bearer ", "").strip()
+        self.expires = float("inf") if token else 0.0
+        if not token and not (username and password):
+            raise BackendError("Set FOSSOLOGY_TOKEN or FOSSOLOGY_USERNAME / FOSSOLOGY_PASSWORD for the backend")
+
+    def get(self) -> str:
+        with self.lock:
+            if not self.token or time.time() > self.expires - 3600:
+                self.token = self._create()
+                self.expires = time.time() + self.days * 86400
+            return self.token
+
+    def invalidate(self, token: str) -> bool:
+        """Drop a rejected token; returns False when it cannot be replaced (provisioned token)."""
+        with self.lock:
+            if self.provisioned:
+                return False
+            if self.token == token:
+                self.token = ""
+            return True
+
+    def _create(self) -> str:
+        if self.created >= self.size:
+            raise BackendError(f"Token limit reached ({self.size} created in this process)")
+        expiry = (datetime.now(timezone.utc) + timedelta(days=self.days)).strftime("%Y-%m-%d")
+        # Token names are unique per user on the instance
+        body = {"username": self.username, "password": self.password, "token_scope": self.scope,
+                "token_name": f"{self.name_prefix}-{uuid.uuid4().hex[:10]}", "token_expire": expiry}
+        status, _, data = self.conns.request("POST", "/tokens", json.dumps(body).encode(),
+                                             {"Content-Type": "application/json", "accept": "application/json"})
+        try:
+            token = (json.loads(data or b"{}").get("Authorization") or "").replace("Bearer ", "").strip()
+        except ValueError:
+            token = ""
+        if status not in (200, 201) or not token:
+            raise BackendError(f"Token request failed ({status}): {data[:200]!r}", status)
+        self.created += 1
+        return token
+
+# =========================
+# CLIENT
+# =========================
+def _multipart(path: str, mime: str, field: str = "fileInput"):
+    """Streamed multipart body: (body factory, content length, content type)."""
+    boundary = uuid.uuid4().hex
+    head = (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+            f'filename="{os.path.basename(path)}"\r\nContent-Type: {mime}\r\n\r\n').encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    def body():
+        yield head
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                yield chunk
+        yield tail
+    return body, len(head) + os.path.getsize(path) + len(tail), f"multipart/form-data; boundary={boundary}"
+
+def _parse_date(value: str):
+    """FOSSology upload dates look like `2024-05-01 10:11:12.123+00`; seconds precision is enough."""
+    try:
+        return datetime.strptime((value or "")[:19].replace("T", " "), "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+class Backend:
+    """REST client for one FOSSology instance (same calls as the workflow's curl sequence)."""
+
+    def __init__(self, url: str, token: str = "", username: str = "", password: str = "",
+                 folder_id: int = 1, connections: int = 4, poll_s: float = 5.0, timeout: float = 120.0):
+        self.url = url.rstrip("/")
+        self.conns = ConnectionPool(self.url, connections, timeout)
+        self.tokens = TokenPool(self.conns, token, username, password)
+        self.folder_id = folder_id
+        self.poll_s = poll_s
+
+    @classmethod
+    def from_env(cls, **overrides):
+        env = os.environ
+        kwargs = {"url": env.get("FOSSOLOGY_URL", ""), "token": env.get("FOSSOLOGY_TOKEN", ""),
+                  "username": env.get("FOSSOLOGY_USERNAME", ""), "password": env.get("FOSSOLOGY_PASSWORD", ""),
+                  "folder_id": int(env.get("FOSSOLOGY_FOLDER_ID") or 1)}
+        kwargs.update({k: v for k, v in overrides.items() if v not in (None, "")})
+        if not kwargs["url"]:
+            raise BackendError("FOSSOLOGY_URL is not set")
+        return cls(**kwargs)
+
+    def call(self, method: str, path: str, json_body=None, headers: dict = None, stream=None,
+             ok=(200, 201, 202), parse=True, with_headers=False):
+        """One API call with auth; 401 renews the token, 502/503/504 are retried with backoff."""
+        for attempt in range(4):
+            token = self.tokens.get()
+            hdrs = {"accept": "application/json", "Authorization": f"Bearer {token}", **(headers or {})}
+            body = None
+            if json_body is not None:
+                body = json.dumps(json_body).encode()
+                hdrs["Content-Type"] = "application/json"
+            elif stream is not None:
+                factory, length, ctype = stream
+                body = factory()
+                hdrs.update({"Content-Type": ctype, "Content-Length": str(length)})
+            status, resp_headers, data = self.conns.request(method, path, body, hdrs)
+            if status == 401 and attempt == 0 and self.tokens.invalidate(token):
+                continue
+            if status in RETRY_STATUSES and attempt < 3:
+                time.sleep(2 ** attempt)
+                continue
+            break
+        if status not in ok:
+            try:
+                message = json.loads(data or b"{}").get("message", "")
+            except (ValueError, AttributeError):
+                message = data[:200].decode(errors="replace")
+            raise BackendError(f"{method} {path} → {status}: {message}", status)
+        out = data
+        if parse:
+            try:
+                out = json.loads(data or b"null")
+            except ValueError:
+                out = None
+        return (out, resp_headers) if with_headers else out
+
+    # ---- status / queue ----
+    def version(self) -> dict:
+        return self.call("GET", "/version")
+
+    def active_jobs(self) -> int:
+        jobs = self.call("GET", "/jobs", headers={"limit": "1000"})
+        return sum(1 for j in jobs or [] if isinstance(j, dict) and j.get("status") in ACTIVE_STATES)
+
+    def status(self) -> dict:
+        return {"url": self.url, "version": (self.version() or {}).get("version", "?"), "active_jobs": self.active_jobs()}
+
+    def wait_for_slot(self, max_active: int, timeout_s: float = 3 * 3600) -> int:
+        """
+        Block until fewer than `max_active` jobs are queued/running on the
+        instance; returns the count seen. Nothing is reserved: another run may
+        take the slot between this check and its upload.
+        """
+        deadline = time.time() + timeout_s
+        waited = False
+        while True:
+            active = self.active_jobs()
+            if max_active <= 0 or active < max_active:
+                if waited:
+                    log(f"✅ Backend slot free ({active}/{max_active} jobs active)")
+                return active
+            if time.time() > deadline:
+                raise BackendError(f"No backend slot within {timeout_s:.0f}s ({active}/{max_active} jobs active)")
+            if not waited:
+                log(f"⏳ Backend busy ({active}/{max_active} jobs active) – waiting for a slot...")
+                waited = True
+            time.sleep(3 * self.poll_s)
+
+    # ---- upload + jobs ----
+    def upload(self, path: str, mime: str, description: str = WORKFLOW_DESC) -> int:
+        data = self.call("POST", "/uploads", stream=_multipart(path, mime), ok=(201,), headers={
+            "folderId": str(self.folder_id), "public": "public", "applyGlobal": "false", "ignoreScm": "false",
+            "uploadType": "file", "uploadDescription": description})
+        return int(data.get("message") or data.get("id"))
+
+    def folder_of(self, upload_id: int, timeout_s: float = 3600) -> int:
+        deadline = time.time() + timeout_s
+        while time.time() < deadline:
+            try:
+                folder = (self.call("GET", f"/uploads/{upload_id}") or {}).get("folderid")
+            except BackendError as e:
+                if e.status != 503:   # 503 while the upload is still being unpacked
+                    raise
+                folder = None
+            if str(folder).isdigit():
+                return int(folder)
+            time.sleep(2)
+        raise BackendError(f"Upload {upload_id} has no folder after {timeout_s:.0f}s")
+
+    def run_job(self, upload_id: int, folder_id: int, payload: dict, poll_s: float = 0) -> str:
+        """Schedule a job for the upload and wait for it; returns Completed or Failed."""
+        data = self.call("POST", "/jobs", payload, headers={"folderId": str(folder_id), "uploadId": str(upload_id)})
+        job_id = re.search(r"\d+", str(data.get("id") or data.get("message") or ""))
+        if not job_id:
+            raise BackendError(f"Job for upload {upload_id} not started: {data}")
+        while True:
+            state = (self.call("GET", f"/jobs/{job_id.group()}") or {}).get("status") or "Unknown"
+            if state in ("Completed", "Failed"):
+                return state
+            time.sleep(poll_s or self.poll_s)
+
+    def report(self, upload_id: int, fmt: str, dest: str) -> bool:
+        data = self.call("POST", f"/uploads/{upload_id}/reports", {"reportFormat": fmt})
+        job_id = re.search(r"\d+", str(data.get("id") or data.get("message") or ""))
+        if not job_id:
+            return False
+        while True:
+            state = (self.call("GET", f"/jobs/{job_id.group()}") or {}).get("status")
+            if state == "Completed":
+                break
+            if state == "Failed":
+                return False
+            time.sleep(min(2.0, self.poll_s))
+        with open(dest, "wb") as fh:
+            fh.write(self.call("GET", f"/jobs/{job_id.group()}/download", parse=False))
+        return True
+
+    # ---- retention ----
+    def delete_upload(self, upload_id: int):
+        self.call("DELETE", f"/uploads/{upload_id}", ok=(200, 202, 204, 404))
+
+    def workflow_uploads(self) -> list:
+        """Uploads in the workflow folder that this workflow created (by description)."""
+        out, page = [], 1
+        while True:
+            items, headers = self.call("GET", f"/uploads?folderId={self.folder_id}&recursive=false",
+                                       headers={"page": str(page), "limit": "100"}, with_headers=True)
+            out.extend(u for u in items or [] if str(u.get("description") or "").startswith(WORKFLOW_DESC))
+            if not items or page >= int(headers.get("x-total-pages") or 1):
+                return out
+            page += 1
+
+    def prune(self, older_than_s: float, keep: tuple = ()) -> list:
+        """Delete workflow uploads older than the cutoff; returns their ids."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than_s)
+        deleted = []
+        for u in self.workflow_uploads():
+            created = _parse_date(u.get("uploaddate"))
+            if created and created < cutoff and int(u["id"]) not in keep:
+                self.delete_upload(int(u["id"]))
+                deleted.append(int(u["id"]))
+        if deleted:
+            log(f"🧹 Pruned {len(deleted)} workflow upload(s) older than {older_than_s / 86400:g} day(s)")
+        return deleted
+
+    def release(self, upload_id: int, retention: str = "delete") -> dict:
+        """Apply the retention policy after an upload's reports are downloaded."""
+        m = RETENTION_RE.match(retention or "delete")
+        if not m:
+            raise BackendError(f"Unknown retention {retention!r} (delete | keep | <N>d)")
+        out = {"upload_id": upload_id, "retention": retention, "deleted": [], "pruned": []}
+        if m.group(1) == "delete":
+            if upload_id:
+                self.delete_upload(upload_id)
+                out["deleted"] = [upload_id]
+                log(f"🗑  Deleted upload {upload_id}")
+            out["pruned"] = self.prune(STRAGGLER_S, keep=(upload_id,))
+        elif m.group(2):
+            out["pruned"] = self.prune(int(m.group(2)) * 86400, keep=(upload_id,))
+        return out
+
+    # ---- full sequence ----
+    def scan_upload(self, upload_id: int, agents: list, tag: str, out_dir: str) -> dict:
+        """Unpack → agents → reports + JSON for an upload, written with the workflow's file names."""
+        tag, ts = sanitize_tag(tag), time.strftime("%Y%m%d_%H%M%S")
+        os.makedirs(out_dir, exist_ok=True)
+        result = {"input_tag": tag, "upload_id": upload_id, "job_state": "Unknown"}
+        folder_id = self.folder_of(upload_id)
+        if self.run_job(upload_id, folder_id, {"analysis": {"unpack": True}}) != "Completed":
+            raise BackendError(f"Unpack of upload {upload_id} failed")
+        analysis = {AGENT_MAP[a]: True for a in agents if a in AGENT_MAP}
+        payload = {"analysis": analysis, "decider": {"nomos_monk": True, "bulk_reused": True, "new_scanner": True},
+                   "reuse": {"reuse_upload": 0, "reuse_group": 0, "reuse_main": False, "reuse_enhanced": False}}
+        result["job_state"] = self.run_job(upload_id, folder_id, payload, poll_s=2 * self.poll_s)
+        log(f"✅ Scans complete for {tag} (job_status={result['job_state']})")
+        for fmt in REPORT_FORMATS:
+            try:
+                self.report(upload_id, fmt, os.path.join(out_dir, f"report_{fmt}_{tag}_{ts}.{fmt}"))
+            except BackendError as e:
+                log(f"⚠️ {fmt} report failed: {e}")
+        endpoints = []
+        license_agents = [a for a in agents if a in ("nomos", "ojo", "monk")]
+        if license_agents:
+            endpoints.append(f"uploads/{upload_id}/licenses?agent={quote(','.join(license_agents), safe=',')}&containers=true")
+        if "copyright" in agents:
+            endpoints.append(f"uploads/{upload_id}/copyrights")
+        endpoints += [f"uploads/{upload_id}/decisions", f"uploads/{upload_id}/obligations", f"uploads/{upload_id}/summary"]
+        for endpoint in endpoints:
+            base = os.path.join(out_dir, f"{re.sub(r'[^a-zA-Z0-9]', '_', endpoint)}_{tag}_{ts}")
+            raw = self.call("GET", f"/{endpoint}", parse=False, ok=range(200, 600))
+            with open(base + ".json", "wb") as fh:
+                fh.write(raw)
+            try:
+                with open(base + ".csv", "w") as fh:
+                    fh.write(json_to_csv(json.loads(raw)))
+            except ValueError:
+                pass
+        return result
+
+# =========================
+# UPLOAD QUEUE
+# =========================
+class UploadQueue:
+    """
+    Scans many files on the backend: at most `concurrency` uploads in flight
+    from this process, each admitted only while the instance runs fewer than
+    `max_active` jobs. Admission (slot check + upload, which starts the unpack
+    job) is serialized, so the next upload sees the previous one's job and
+    waiting uploads start in submission order. Each upload is released per
+    `retention` when done.
+    """
+
+    def __init__(self, backend: Backend, concurrency: int = 2, max_active: int = 0, retention: str = "delete"):
+        self.backend = backend
+        self.max_active, self.retention = max_active, retention
+        self.pool = ThreadPoolExecutor(max_workers=max(concurrency, 1))
+        self.admit = threading.Lock()
+
+    def submit(self, path: str, mime: str, agents: list, tag: str, out_dir: str, description: str = WORKFLOW_DESC):
+        return self.pool.submit(self._run, path, mime, agents, tag, out_dir, description)
+
+    def _run(self, path, mime, agents, tag, out_dir, description) -> dict:
+        t0, waited = time.time(), 0.0
+        result = {"input_tag": sanitize_tag(tag), "upload_id": None, "job_state": "", "status": "failed"}
+        try:
+            with self.admit:
+                self.backend.wait_for_slot(self.max_active)
+                waited = time.time() - t0
+                result["upload_id"] = self.backend.upload(path, mime, description)
+            log(f"📦 Uploaded {result['input_tag']}, UPLOAD_ID={result['upload_id']}")
+            result.update(self.backend.scan_upload(result["upload_id"], agents, tag, out_dir))
+            result["status"] = "success" if result["job_state"] == "Completed" else "failed"
+        except (BackendError, OSError, http.client.HTTPException) as e:
+            result["error"] = str(e)
+            log(f"❌ {tag}: {e}")
+        finally:
+            if result.get("upload_id"):
+                try:
+                    self.backend.release(result["upload_id"], self.retention)
+                except BackendError as e:
+                    log(f"⚠️ Release of upload {result['upload_id']} failed: {e}")
+        result.update(queue_seconds=round(waited, 1), scan_seconds=round(time.time() - t0 - waited, 1))
+        return result
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+# =========================
+# CLI
+# =========================
+MIME_BY_EXT = ((".tar.gz", "application/gzip"), (".tgz", "application/gzip"), (".zip", "application/zip"),
+               (".tar", "application/x-tar"))
+
+def _scan_files(backend: Backend, args) -> int:
+    agents = [a.strip() for a in args.agents.split(",") if a.strip()]
+    if "ojo" in agents and "nomos" not in agents:
+        agents.append("nomos")  # OJO depends on Nomos, as in the workflow
+    uploads = UploadQueue(backend, args.concurrency, args.max_active, args.retention)
+    futures = []
+    for k, spec in enumerate(args.files):
+        path, _, tag = spec.partition("=")
+        mime = next((m for ext, m in MIME_BY_EXT if path.endswith(ext)), "application/octet-stream")
+        tag = tag or os.path.basename(path).split(".")[0]
+        out_dir = os.path.join(args.out, f"{k:02d}_{sanitize_tag(tag)}", "fossology_reports")
+        futures.append(uploads.submit(path, mime, agents, tag, out_dir))
+    results = [dict(f.result(), index=k, input=args.files[k]) for k, f in enumerate(futures)]
+    uploads.close()
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, "batch.json"), "w") as fh:
+        json.dump(results, fh, indent=2)
+    print(json.dumps(results, indent=2))
+    return 0 if all(r["status"] == "success" for r in results) else 1
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--url", default="", help="API base, e.g. https://fossology.example.com/repo/api/v1 (env FOSSOLOGY_URL)")
+    ap.add_argument("--token", default="", help="env FOSSOLOGY_TOKEN; else FOSSOLOGY_USERNAME / FOSSOLOGY_PASSWORD")
+    ap.add_argument("--folder-id", type=int, default=0, help="folder for workflow uploads (env FOSSOLOGY_FOLDER_ID, 1)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sub.add_parser("status", help="version and number of queued/running jobs")
+    sub.add_parser("token", help="print a bearer token for the curl sequence (creates one without FOSSOLOGY_TOKEN)")
+
+    wp = sub.add_parser("wait-slot", help="wait until the instance runs fewer than --max-active jobs")
+    wp.add_argument("--max-active", type=int, default=4)
+    wp.add_argument("--timeout-s", type=float, default=3 * 3600)
+
+    rp = sub.add_parser("release", help="apply the retention policy to an upload")
+    rp.add_argument("--upload-id", type=int, default=0, help="0: only prune")
+    rp.add_argument("--retention", default="delete", help="delete | keep | <N>d")
+
+    pp = sub.add_parser("prune", help="delete workflow uploads older than N days")
+    pp.add_argument("--older-than-days", type=float, required=True)
+
+    sp = sub.add_parser("scan", help="scan files through the upload queue (PATH or PATH=TAG)")
+    sp.add_argument("files", nargs="+")
+    sp.add_argument("--agents", default="nomos,ojo,monk,copyright")
+    sp.add_argument("--out", default="backend_out")
+    sp.add_argument("--concurrency", type=int, default=2, help="uploads in flight from this process")
+    sp.add_argument("--max-active", type=int, default=4, help="admit uploads only below this many active jobs (0: no limit)")
+    sp.add_argument("--retention", default="delete", help="delete | keep | <N>d")
+    sp.add_argument("--poll-s", type=float, default=5.0, help="job status poll interval")
+
+    args = ap.parse_args(argv)
+    try:
+        backend = Backend.from_env(url=args.url, token=args.token, folder_id=args.folder_id or None)
+        backend.poll_s = getattr(args, "poll_s", backend.poll_s)
+        if args.cmd == "status":
+            print(json.dumps(backend.status(), indent=2))
+        elif args.cmd == "token":
+            print(backend.tokens.get())
+        elif args.cmd == "wait-slot":
+            backend.wait_for_slot(args.max_active, args.timeout_s)
+        elif args.cmd == "release":
+            print(json.dumps(backend.release(args.upload_id, args.retention), indent=2))
+        elif args.cmd == "prune":
+            print(json.dumps(backend.prune(args.older_than_days * 86400)))
+        else:
+            return _scan_files(backend, args)
+    except (BackendError, OSError, http.client.HTTPException) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
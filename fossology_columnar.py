@@ -0,0 +1,214 @@
+"""
+Compact columnar results for a FOSSology run.
+
+`build` turns the raw JSON the workflow saves in fossology_reports/ into one
+typed, zstd-compressed Parquet file per category plus a small manifest:
+
+  fossology_columnar/
+    manifest.json         counts, bytes and columns per category + `summary` numbers
+    licenses.parquet      file_path, license, source (scanner|conclusion), clearing_status
+    copyrights.parquet    copyright, file_path
+    decisions.parquet     top-level fields, types inferred (nested values as JSON text)
+    obligations.parquet   top-level fields, types inferred (nested values as JSON text)
+
+The workflow uploads the manifest and every category as separate artifacts
+so the UI can fetch the manifest first and pull a category only on demand.
+
+  python3 fossology_columnar.py build --reports fossology_reports --out fossology_columnar \\
+      --tag <SAFE_INPUT_TAG> --run-id <GITHUB_RUN_ID>
+
+Needs pyarrow for writing/reading Parquet (the manifest is plain JSON).
+"""
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import zipfile
+
+CATEGORIES = ("licenses", "copyrights", "decisions", "obligations")
+MANIFEST_NAME = "manifest.json"
+COMPRESSION = "zstd"
+# uploads_<id>_<endpoint>..._<TAG>_<TS>.json as written by the workflow
+REPORT_JSON_RE = re.compile(r"^uploads_\d+_(licenses|copyrights|decisions|obligations|summary)(?:_|\.)")
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:  # pragma: no cover - depends on environment
+        raise RuntimeError("pyarrow is required for columnar results (pip install pyarrow)") from e
+    return pa, pq
+
+def artifact_name(category: str, tag: str, run_id: str) -> str:
+    """fossology-<category>-<TAG>-<RUN_ID> (category 'manifest' for the manifest)."""
+    return f"fossology-{category}-{tag}-{run_id}"
+
+# =========================
+# ROWS PER CATEGORY
+# =========================
+def _as_list(v) -> list:
+    if v is None:
+        return []
+    return v if isinstance(v, list) else [v]
+
+def license_rows(data) -> dict:
+    """One row per (file, license, source) from /uploads/{id}/licenses."""
+    cols = {"file_path": [], "license": [], "source": [], "clearing_status": []}
+    for item in _as_list(data):
+        if not isinstance(item, dict):
+            continue
+        findings = item.get("findings") or {}
+        for source in ("scanner", "conclusion"):
+            for lic in _as_list(findings.get(source)):
+                cols["file_path"].append(item.get("filePath"))
+                cols["license"].append(lic if isinstance(lic, str) else json.dumps(lic))
+                cols["source"].append(source)
+                cols["clearing_status"].append(item.get("clearing_status"))
+    return cols
+
+def copyright_rows(data) -> dict:
+    """One row per (copyright statement, file) from /uploads/{id}/copyrights."""
+    cols = {"copyright": [], "file_path": []}
+    for item in _as_list(data):
+        if not isinstance(item, dict):
+            continue
+        for path in _as_list(item.get("filePath")) or [None]:
+            cols["copyright"].append(item.get("copyright"))
+            cols["file_path"].append(path)
+    return cols
+
+def _infer(values: list):
+    """Column values -> (pyarrow type name, converted values)."""
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present):
+        return "bool", values
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return "int64", values
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return "float64", [None if v is None else float(v) for v in values]
+    return "string", [v if v is None or isinstance(v, str) else json.dumps(v, ensure_ascii=False) for v in values]
+
+def generic_rows(data) -> dict:
+    """Top-level fields of a list of objects (first-seen column order)."""
+    items = [i for i in _as_list(data) if isinstance(i, dict)]
+    names = []
+    for item in items:
+        names.extend(k for k in item if k not in names)
+    return {n: [item.get(n) for item in items] for n in names}
+
+def to_table(category: str, data):
+    pa, _ = _pyarrow()
+    if category == "licenses":
+        cols = license_rows(data)
+        # Low-cardinality strings compress best dictionary-encoded
+        return pa.table({
+            "file_path": pa.array(cols["file_path"], pa.string()),
+            "license": pa.array(cols["license"], pa.string()).dictionary_encode(),
+            "source": pa.array(cols["source"], pa.string()).dictionary_encode(),
+            "clearing_status": pa.array(cols["clearing_status"], pa.string()).dictionary_encode(),
+        })
+    if category == "copyrights":
+        cols = copyright_rows(data)
+        return pa.table({
+            "copyright": pa.array(cols["copyright"], pa.string()),
+            "file_path": pa.array(cols["file_path"], pa.string()),
+        })
+    arrays = {}
+    for name, values in generic_rows(data).items():
+        type_name, values = _infer(values)
+        arrays[name] = pa.array(values, getattr(pa, type_name)())
+    return pa.table(arrays) if arrays else pa.table({"value": pa.array([], pa.string())})
+
+# =========================
+# BUILD
+# =========================
+def find_report_json(reports_dir: str) -> dict:
+    """{endpoint: path} for the raw JSON files in fossology_reports/."""
+    found = {}
+    for name in sorted(os.listdir(reports_dir)):
+        m = REPORT_JSON_RE.match(name)
+        if m and name.endswith(".json"):
+            found.setdefault(m.group(1), os.path.join(reports_dir, name))
+    return found
+
+def _load(path: str):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+def build(reports_dir: str, out_dir: str, tag: str = "", run_id: str = "") -> dict:
+    _, pq = _pyarrow()
+    os.makedirs(out_dir, exist_ok=True)
+    sources = find_report_json(reports_dir)
+    summary = _load(sources["summary"]) if "summary" in sources else None
+    manifest = {
+        "format": "fossology-columnar/1",
+        "input_tag": tag,
+        "run_id": str(run_id),
+        "summary": summary if isinstance(summary, dict) else {},
+        "categories": {},
+    }
+    for category in CATEGORIES:
+        if category not in sources:
+            continue
+        data = _load(sources[category])
+        if not isinstance(data, list):
+            # FOSSology answers errors as an object ({"code":..,"message":..})
+            continue
+        table = to_table(category, data)
+        target = os.path.join(out_dir, f"{category}.parquet")
+        pq.write_table(table, target, compression=COMPRESSION)
+        manifest["categories"][category] = {
+            "file": f"{category}.parquet",
+            "artifact": artifact_name(category, tag, run_id) if tag else "",
+            "rows": table.num_rows,
+            "bytes": os.path.getsize(target),
+            "source_json_bytes": os.path.getsize(sources[category]),
+            "columns": {f.name: str(f.type) for f in table.schema},
+        }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
+
+# =========================
+# READ (UI side)
+# =========================
+def _member(zip_bytes: bytes, suffix: str) -> bytes:
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
+        name = next((n for n in zf.namelist() if n.endswith(suffix)), None)
+        if name is None:
+            raise FileNotFoundError(f"No *{suffix} in artifact")
+        return zf.read(name)
+
+def read_manifest(zip_bytes: bytes) -> dict:
+    """Manifest from a downloaded `fossology-manifest-…` artifact ZIP."""
+    return json.loads(_member(zip_bytes, MANIFEST_NAME))
+
+def read_category(zip_bytes: bytes):
+    """pyarrow.Table from a downloaded `fossology-<category>-…` artifact ZIP."""
+    pa, pq = _pyarrow()
+    return pq.read_table(pa.BufferReader(_member(zip_bytes, ".parquet")))
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    bp = sub.add_parser("build", help="write Parquet files + manifest from fossology_reports/")
+    bp.add_argument("--reports", default="fossology_reports")
+    bp.add_argument("--out", default="fossology_columnar")
+    bp.add_argument("--tag", default="")
+    bp.add_argument("--run-id", default="")
+    args = ap.parse_args(argv)
+    manifest = build(args.reports, args.out, args.tag, args.run_id)
+    for category, info in manifest["categories"].items():
+        print(f"{category:<12} rows={info['rows']:<8} parquet={info['bytes']}B  json={info['source_json_bytes']}B")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,438 @@
+"""
+File-hash knowledge base: skip re-scanning files FOSSology has already seen.
+
+Scan results are per file content, so the findings for a vendored `COPYING`
+or an unchanged zlib source are the same in every scan. The knowledge base
+(SQLite, persisted between runs with actions/cache) maps a file's SHA-1 to
+the license and copyright findings of earlier scans:
+
+  ingest   – fill it from completed reports (the SPDX 2 report carries a SHA-1
+             per file): a reports folder, a report ZIP or a downloaded artifact.
+  prepare  – before upload: hash every file of the input tree, look the hashes
+             up in bulk and remove known files from the tree, so only new
+             content goes to FOSSology. Known findings go to a side file.
+  augment  – after the scan: add the known files back into the licenses /
+             copyrights JSON (+ CSV) and the SPDX report, and update the
+             upload summary counts and the package verification code.
+
+Findings are only reused when the earlier scan ran (at least) the same
+agents. Clearing decisions (LicenseConcluded) are per upload and never reused.
+Standard library only:
+
+  python3 fossology_kb.py prepare --db kb.sqlite --src tree --agents nomos,ojo,monk,copyright --known known.json
+  python3 fossology_kb.py augment --known known.json --reports fossology_reports --upload-name repo.tar.gz
+  python3 fossology_kb.py ingest  --db kb.sqlite --agents nomos,ojo,monk,copyright fossology_reports
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from fossology_shard import NO_LICENSE, json_to_csv, spdx_sections, summary_distinct, verification_code
+from fossology_spdx import open_spdx_text
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    sha1 TEXT PRIMARY KEY,
+    agents TEXT NOT NULL,       -- comma-separated agents the findings cover
+    licenses TEXT NOT NULL,     -- JSON list of license ids (scanner findings)
+    copyrights TEXT NOT NULL,   -- JSON list of copyright statements
+    spdx TEXT NOT NULL,         -- SPDX file section without FileName / SPDXID / LicenseConcluded
+    seen INTEGER NOT NULL DEFAULT 1,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_last_seen_idx ON files (last_seen);
+CREATE TABLE IF NOT EXISTS extracted (
+    license_id TEXT PRIMARY KEY,
+    block TEXT NOT NULL         -- SPDX extracted-license section (LicenseRef-*)
+);
+"""
+LOOKUP_CHUNK = 500
+MAX_ENTRIES = 2_000_000
+NO_VALUE = {"", "NONE", "NOASSERTION"}
+DROP_TAGS = ("FileName:", "SPDXID:", "LicenseConcluded:")
+LICENSES_JSON_RE = re.compile(r"^uploads_\d+_licenses_.*\.json$")
+COPYRIGHTS_JSON_RE = re.compile(r"^uploads_\d+_copyrights_.*\.json$")
+SUMMARY_JSON_RE = re.compile(r"^uploads_\d+_summary_.*\.json$")
+
+def agent_set(agents) -> frozenset:
+    if isinstance(agents, str):
+        agents = agents.split(",")
+    return frozenset(a.strip() for a in agents if a and a.strip())
+
+def sha1_file(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def connect(db_path: str) -> sqlite3.Connection:
+    if os.path.dirname(db_path):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+# =========================
+# SPDX file sections
+# =========================
+def _value(line: str) -> str:
+    return line.split(":", 1)[1].strip() if ":" in line else ""
+
+def parse_file_block(block: list) -> dict:
+    """FileName, SHA-1, license ids, copyright statements and the reusable part of one file section."""
+    rec = {"name": _value(block[0]), "sha1": "", "licenses": [], "copyrights": [], "spdx": []}
+    text_tag, text_buf = None, []
+    for line in block:
+        if text_tag:
+            end = line.find("</text>")
+            text_buf.append(line if end < 0 else line[:end])
+            rec["spdx"].append(line)
+            if end >= 0:
+                if text_tag == "FileCopyrightText":
+                    rec["copyrights"] = [s.strip() for s in text_buf if s.strip() not in NO_VALUE]
+                text_tag, text_buf = None, []
+            continue
+        tag, _, value = line.partition(":")
+        value = value.strip()
+        if line.startswith(DROP_TAGS):
+            continue
+        rec["spdx"].append(line)
+        if tag == "FileChecksum" and value.upper().startswith("SHA1:"):
+            rec["sha1"] = value.split(":", 1)[1].strip().lower()
+        elif tag == "LicenseInfoInFile" and value not in NO_VALUE:
+            rec["licenses"].append(value)
+        elif value.startswith("<text>"):
+            body = value[len("<text>"):]
+            if "</text>" in body:
+                if tag == "FileCopyrightText":
+                    rec["copyrights"] = [s.strip() for s in body.split("</text>", 1)[0].splitlines()
+                                         if s.strip() not in NO_VALUE]
+            else:
+                text_tag, text_buf = tag, [body]
+        elif tag == "FileCopyrightText" and value not in NO_VALUE:
+            rec["copyrights"] = [value]
+    return rec
+
+# =========================
+# INGEST
+# =========================
+def _spdx_texts(source: str):
+    """SPDX report texts in a folder (recursively), a .spdx2 file or a report / artifact ZIP."""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".spdx2"):
+                    with open(os.path.join(root, name), encoding="utf-8", errors="replace") as fh:
+                        yield fh.read()
+    else:
+        with open_spdx_text(source) as fh:
+            yield fh.read()
+
+def ingest(conn: sqlite3.Connection, sources: list, agents, max_entries: int = MAX_ENTRIES) -> dict:
+    """
+    Upsert every file section with a SHA-1; findings of a scan with fewer
+    agents never replace richer ones. `new` / `updated` / `extracted` only
+    count rows whose content changed (re-seen files just get `last_seen`),
+    so the workflow can skip saving an unchanged knowledge base.
+    """
+    agents = agent_set(agents)
+    now = time.time()
+    stats = {"files": 0, "new": 0, "updated": 0, "extracted": 0}
+    for source in sources:
+        for text in _spdx_texts(source):
+            _, files, licenses = spdx_sections(text)
+            for block in files:
+                rec = parse_file_block(block)
+                if not rec["sha1"]:
+                    continue
+                stats["files"] += 1
+                row = conn.execute("SELECT agents, licenses, copyrights, spdx FROM files WHERE sha1 = ?",
+                                   (rec["sha1"],)).fetchone()
+                values = (",".join(sorted(agents)), json.dumps(rec["licenses"]), json.dumps(rec["copyrights"]),
+                          "\n".join(rec["spdx"]), now, rec["sha1"])
+                if row is None:
+                    conn.execute("INSERT INTO files (agents, licenses, copyrights, spdx, last_seen, sha1) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", values)
+                    stats["new"] += 1
+                elif agents >= agent_set(row[0]) and (agent_set(row[0]), *row[1:]) != (agents, *values[1:4]):
+                    conn.execute("UPDATE files SET agents = ?, licenses = ?, copyrights = ?, spdx = ?, "
+                                 "seen = seen + 1, last_seen = ? WHERE sha1 = ?", values)
+                    stats["updated"] += 1
+                else:
+                    conn.execute("UPDATE files SET seen = seen + 1, last_seen = ? WHERE sha1 = ?", (now, rec["sha1"]))
+            for block in licenses:
+                lic_id = _value(block[0])
+                if lic_id.startswith("LicenseRef-"):
+                    text_block = "\n".join(block)
+                    row = conn.execute("SELECT block FROM extracted WHERE license_id = ?", (lic_id,)).fetchone()
+                    if row is None or row[0] != text_block:
+                        conn.execute("INSERT OR REPLACE INTO extracted (license_id, block) VALUES (?, ?)",
+                                     (lic_id, text_block))
+                        stats["extracted"] += 1
+    # Keep the cache entry bounded: forget the files not seen for the longest time
+    total = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+    if total > max_entries:
+        conn.execute("DELETE FROM files WHERE sha1 IN (SELECT sha1 FROM files ORDER BY last_seen LIMIT ?)",
+                     (total - max_entries,))
+    conn.commit()
+    stats["entries"] = min(total, max_entries)
+    return stats
+
+# =========================
+# PREPARE (before upload)
+# =========================
+def lookup(conn: sqlite3.Connection, hashes: list, agents) -> dict:
+    """sha1 -> findings for the hashes whose entry covers `agents` (bulk, LOOKUP_CHUNK per query)."""
+    agents = agent_set(agents)
+    found = {}
+    unique = sorted(set(hashes))
+    for i in range(0, len(unique), LOOKUP_CHUNK):
+        chunk = unique[i:i + LOOKUP_CHUNK]
+        rows = conn.execute(f"SELECT sha1, agents, licenses, copyrights, spdx FROM files "
+                            f"WHERE sha1 IN ({','.join('?' * len(chunk))})", chunk)
+        for sha1, row_agents, licenses, copyrights, spdx in rows:
+            if agents <= agent_set(row_agents):
+                found[sha1] = {"licenses": json.loads(licenses), "copyrights": json.loads(copyrights), "spdx": spdx}
+    return found
+
+def prepare(conn: sqlite3.Connection, src: str, agents, known_path: str) -> dict:
+    """Remove files with known findings from `src`; write them (with findings) to `known_path`."""
+    files = []
+    for root, dirs, names in os.walk(src):
+        for name in names:
+            full = os.path.join(root, name)
+            if os.path.islink(full) or not os.path.isfile(full):
+                continue
+            files.append((os.path.relpath(full, src).replace(os.sep, "/"), os.path.getsize(full), sha1_file(full)))
+    found = lookup(conn, [f[2] for f in files], agents)
+    known = [f for f in files if f[2] in found]
+    if files and len(known) == len(files):
+        # FOSSology needs a non-empty upload: keep the smallest known file in it
+        known.remove(min(known, key=lambda f: f[1]))
+    known_paths = {f[0] for f in known}
+    for rel, _, _ in known:
+        os.remove(os.path.join(src, rel))
+
+    refs = {lic for f in known for lic in found[f[2]]["licenses"] if lic.startswith("LicenseRef-")}
+    extracted = {}
+    for lic_id in sorted(refs):
+        row = conn.execute("SELECT block FROM extracted WHERE license_id = ?", (lic_id,)).fetchone()
+        if row:
+            extracted[lic_id] = row[0]
+    doc = {
+        "agents": sorted(agent_set(agents)),
+        "files": [{"path": rel, "sha1": sha1, **found[sha1]} for rel, _, sha1 in sorted(known)],
+        "uploaded": sorted(f[0] for f in files if f[0] not in known_paths),
+        "extracted": extracted,
+    }
+    with open(known_path, "w") as fh:
+        json.dump(doc, fh)
+    return {"files": len(files), "known": len(known), "uploaded": len(doc["uploaded"]),
+            "known_bytes": sum(f[1] for f in known), "uploaded_bytes": sum(f[1] for f in files if f[0] not in known_paths)}
+
+# =========================
+# AUGMENT (after the scan)
+# =========================
+def detect_prefix(paths: list, uploaded: set, default: str) -> str:
+    """Path prefix FOSSology put in front of the uploaded files (e.g. `repo.tar.gz/`), from scanned paths."""
+    for p in paths[:500]:
+        parts = p.split("/")
+        for i in range(len(parts)):
+            if "/".join(parts[i:]) in uploaded:
+                return "/".join(parts[:i]) + ("/" if i else "")
+    return default
+
+def _write_json_csv(path: str, data):
+    with open(path, "w") as fh:
+        json.dump(data, fh)
+    with open(os.path.splitext(path)[0] + ".csv", "w") as fh:
+        fh.write(json_to_csv(data))
+
+def _load(path: str):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+def augment_licenses(data: list, known: list, prefix: str) -> int:
+    present = {e.get("filePath") for e in data if isinstance(e, dict)}
+    added = 0
+    for f in known:
+        path = prefix + f["path"]
+        if f["licenses"] and path not in present:
+            data.append({"filePath": path, "findings": {"scanner": f["licenses"], "conclusion": None},
+                         "clearing_status": "NOT_CONCLUDED"})
+            added += 1
+    return added
+
+def augment_copyrights(data: list, known: list, prefix: str) -> int:
+    by_statement = {e.get("copyright"): e for e in data if isinstance(e, dict)}
+    added = 0
+    for f in known:
+        path = prefix + f["path"]
+        for statement in f["copyrights"]:
+            entry = by_statement.get(statement)
+            if entry is None:
+                entry = by_statement[statement] = {"copyright": statement, "filePath": []}
+                data.append(entry)
+            entry.setdefault("filePath", [])
+            if path not in entry["filePath"]:
+                entry["filePath"].append(path)
+                added += 1
+    return added
+
+def augment_spdx(text: str, known: list, prefix: str, extracted: dict) -> tuple:
+    header, files, licenses = spdx_sections(text)
+    present = {_value(b[0]) for b in files}
+    if files and files[-1][-1].strip():
+        files[-1].append("")
+    lic_ids = {_value(b[0]) for b in licenses}
+    pkg_info = [i for i, l in enumerate(header) if l.startswith("PackageLicenseInfoFromFiles:")]
+    pkg_ids = {_value(header[i]) for i in pkg_info}
+    added = 0
+    for n, f in enumerate(known):
+        path = prefix + f["path"]
+        if path in present:
+            continue
+        files.append([f"FileName: {path}", f"SPDXID: SPDXRef-kb-{n}", "LicenseConcluded: NOASSERTION"]
+                     + f["spdx"].strip("\n").splitlines() + [""])
+        added += 1
+        for lic in f["licenses"]:
+            if lic.startswith("LicenseRef-") and lic not in lic_ids and lic in extracted:
+                licenses.append(extracted[lic].splitlines())
+                lic_ids.add(lic)
+            if pkg_info and lic not in pkg_ids:
+                header.insert(pkg_info[-1] + 1, f"PackageLicenseInfoFromFiles: {lic}")
+                pkg_info.append(pkg_info[-1] + 1)
+                pkg_ids.add(lic)
+    # The verification code covers every file the document lists (dropped when one has no SHA1)
+    code = verification_code(files) if added else None
+    if code is not None:
+        header = [(f"PackageVerificationCode: {code}" if l.startswith("PackageVerificationCode:") else l)
+                  for l in header if code or not l.startswith("PackageVerificationCode:")]
+    out = list(header)
+    for block in files + licenses:
+        out.extend(block)
+    return "\n".join(out) + "\n", added
+
+def augment_summary(summary: dict, licenses, findings: int, copyrights: int):
+    """Upload summary counts including the known files (distinct counts from the augmented licenses)."""
+    for key, added in (("totalLicenses", findings), ("copyrightCount", copyrights)):
+        if isinstance(summary.get(key), int) and not isinstance(summary.get(key), bool):
+            summary[key] += added
+    if licenses is not None:
+        summary.update({k: v for k, v in summary_distinct(licenses).items() if k in summary})
+
+def augment(known_path: str, reports_dir: str, upload_name: str = "") -> dict:
+    """Add the known files back into the reports in place; returns counts per report."""
+    doc = _load(known_path) or {}
+    known, uploaded, extracted = doc.get("files", []), set(doc.get("uploaded", [])), doc.get("extracted", {})
+    stats = {"known_files": len(known), "licenses": 0, "copyrights": 0, "spdx": 0}
+    if not known:
+        return stats
+    reports, summaries = {}, {}
+    for name in sorted(os.listdir(reports_dir)):
+        path = os.path.join(reports_dir, name)
+        if SUMMARY_JSON_RE.match(name):
+            data = _load(path)
+            if isinstance(data, dict) and "code" not in data:
+                summaries[path] = data
+        elif LICENSES_JSON_RE.match(name) or COPYRIGHTS_JSON_RE.match(name):
+            data = _load(path)
+            if isinstance(data, list):  # error payloads ({"code": ..., "message": ...}) stay as they are
+                reports[path] = data
+        elif name.endswith(".spdx2"):
+            with open(path, encoding="utf-8", errors="replace") as fh:
+                reports[path] = fh.read()
+
+    # One prefix for all reports, detected from every scanned path we have
+    scanned = []
+    for path, data in reports.items():
+        if isinstance(data, str):
+            scanned.extend(_value(l) for l in data.splitlines() if l.startswith("FileName:"))
+        else:
+            for e in data:
+                fp = e.get("filePath") if isinstance(e, dict) else None
+                scanned.extend(fp if isinstance(fp, list) else [fp] if fp else [])
+    prefix = detect_prefix(scanned, uploaded, f"{upload_name}/" if upload_name else "")
+    stats["prefix"] = prefix
+
+    licenses, findings = None, 0
+    for path, data in reports.items():
+        name = os.path.basename(path)
+        if isinstance(data, str):
+            text, added = augment_spdx(data, known, prefix, extracted)
+            with open(path, "w") as fh:
+                fh.write(text)
+            stats["spdx"] += added
+        else:
+            if LICENSES_JSON_RE.match(name):
+                before = len(data)
+                stats["licenses"] += augment_licenses(data, known, prefix)
+                findings += sum(1 for e in data[before:] for lic in e["findings"]["scanner"] if lic not in NO_LICENSE)
+                licenses = data
+            else:
+                stats["copyrights"] += augment_copyrights(data, known, prefix)
+            _write_json_csv(path, data)
+    for path, summary in summaries.items():
+        augment_summary(summary, licenses, findings, stats["copyrights"])
+        _write_json_csv(path, summary)
+    stats["summary"] = len(summaries)
+    return stats
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    pp = sub.add_parser("prepare", help="drop files with known findings from an input tree")
+    pp.add_argument("--db", required=True)
+    pp.add_argument("--src", required=True)
+    pp.add_argument("--agents", required=True, help="comma-separated agents of this scan")
+    pp.add_argument("--known", default="kb_known.json")
+
+    ap_ = sub.add_parser("augment", help="add known findings back into the reports")
+    ap_.add_argument("--known", default="kb_known.json")
+    ap_.add_argument("--reports", default="fossology_reports")
+    ap_.add_argument("--upload-name", default="", help="uploaded file name (path prefix when none can be detected)")
+
+    ip = sub.add_parser("ingest", help="add the findings of completed reports")
+    ip.add_argument("--db", required=True)
+    ip.add_argument("--agents", required=True, help="comma-separated agents the reports were produced with")
+    ip.add_argument("--max-entries", type=int, default=MAX_ENTRIES)
+    ip.add_argument("sources", nargs="+", help="reports folders, .spdx2 files, report or artifact ZIPs")
+
+    sp = sub.add_parser("stats", help="entry count and size")
+    sp.add_argument("--db", required=True)
+
+    args = ap.parse_args(argv)
+    if args.cmd == "augment":
+        print(json.dumps(augment(args.known, args.reports, args.upload_name), indent=2))
+        return 0
+    conn = connect(args.db)
+    try:
+        if args.cmd == "prepare":
+            out = prepare(conn, args.src, args.agents, args.known)
+        elif args.cmd == "ingest":
+            out = ingest(conn, args.sources, args.agents, args.max_entries)
+        else:
+            out = {"entries": conn.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+                   "extracted": conn.execute("SELECT COUNT(*) FROM extracted").fetchone()[0],
+                   "bytes": os.path.getsize(args.db)}
+    finally:
+        conn.close()
+    print(json.dumps(out, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,887 @@
+"""
+Load-test harness for the Streamlit runner (fossology_ui_e2e.py).
+
+  serve – local stand-in for the GitHub endpoints the app uses (workflow
+          dispatches, runs, artifacts + ZIP download, branches/tags, contents,
+          git trees, commits) with configurable latency, simulated run
+          progress and GitHub-style rate-limit headers.
+  run   – starts the stand-in, then drives N scripted user sessions of the real
+          app through streamlit's AppTest at a given concurrency:
+          open → dispatch → poll "Check status & fetch" until the artifact is
+          fetched. Reports throughput, latency percentiles per action, GitHub
+          calls per action, rate-limited responses and memory (app + stand-in).
+  serve-fossology – stand-in for the FOSSology REST API (tokens, uploads,
+          jobs, reports) for the persistent backend mode; job durations are
+          configurable and /_stats reports peak active jobs and connections.
+
+AppTest swaps process-global state (Runtime instance, st.secrets) on every
+rerun, so concurrent sessions run in separate worker processes. Process-wide
+state (st.cache_resource: the dispatch scheduler, data caches) is therefore
+per worker rather than shared as on a single server: RUNNER_CAPACITY,
+superseding and cache hits only act among the sessions of one worker, and
+the report says so.
+
+  python3 fossology_loadtest.py serve --port 8787
+  python3 fossology_loadtest.py serve-fossology --port 8081   # base URL http://127.0.0.1:8081/repo/api/v1
+  python3 fossology_loadtest.py run --users 50 --concurrency 50
+
+`run` needs streamlit installed (same as the app); `serve` and `serve-fossology` are stdlib only.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_APP = os.path.join(HERE, "fossology_ui_e2e.py")
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _sanitize_tag(s: str) -> str:
+    # Same rules as the workflow / app
+    s = re.sub(r"[\s/:@#?&]", "-", s or "")
+    s = re.sub(r"[^A-Za-z0-9._-]", "-", s)
+    s = re.sub(r"-+", "-", s)
+    return s.strip("-")
+
+def rss_kb() -> int:
+    """Current resident set size of this process in KiB (Linux), else peak RSS."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def build_artifact_zip(size_kb: int) -> bytes:
+    """Artifact ZIP as GitHub serves it: a ZIP holding the workflow's report ZIP."""
+    spdx = ["SPDXVersion: SPDX-2.2", "DataLicense: CC0-1.0", ""]
+    for i in range(200):
+        lic = ("MIT", "Apache-2.0", "GPL-2.0-only")[i % 3]
+        spdx += [f"FileName: src/file{i}.c", f"SPDXID: SPDXRef-item{i}",
+                 f"LicenseConcluded: {lic}", f"LicenseInfoInFile: {lic}", "FileCopyrightText: NOASSERTION", ""]
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("fossology_reports/report_spdx2_loadtest_1.spdx2", "\n".join(spdx))
+        z.writestr("fossology_reports/padding.bin", os.urandom(max(0, size_kb) * 1024))
+    outer = io.BytesIO()
+    with zipfile.ZipFile(outer, "w", zipfile.ZIP_STORED) as z:
+        z.writestr("fossology_reports_loadtest.zip", inner.getvalue())
+    return outer.getvalue()
+
+# =========================
+# GITHUB STAND-IN
+# =========================
+class GitHubStandIn:
+    """In-memory state for the fake GitHub API (thread-safe)."""
+
+    def __init__(self, latency_ms=80.0, jitter_ms=40.0, queue_s=3.0, run_s=10.0,
+                 rate_limit=5000, rate_window_s=3600, shared_rate_limit=True,
+                 branches=30, tags=150, artifact_kb=256):
+        self.latency_ms, self.jitter_ms = latency_ms, jitter_ms
+        self.queue_s, self.run_s = queue_s, run_s
+        self.rate_limit, self.rate_window_s = rate_limit, rate_window_s
+        self.shared_rate_limit = shared_rate_limit
+        self.branches = [f"release/{i}" for i in range(branches - 1)] + ["main"]
+        self.tags = [f"v1.{i}.0" for i in range(tags)]
+        self.artifact_zip = build_artifact_zip(artifact_kb)
+        self.artifact_digest = "sha256:" + hashlib.sha256(self.artifact_zip).hexdigest()
+        self.lock = threading.Lock()
+        self.next_id = 1000
+        self.runs = {}          # run_id -> run dict (+ "_inputs", "_created", "_workflow")
+        self.contents = {}      # path -> {"sha", "size", "created"}
+        self.buckets = {}       # token -> [remaining, reset_ts]
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.started = time.time()
+            self.requests_by_route = {}
+            self.requests_by_token = {}
+            self.status_counts = {}
+            self.rate_limited = 0
+
+    # ---- helpers ----
+    def sleep_latency(self):
+        delay = random.gauss(self.latency_ms, self.jitter_ms) if self.jitter_ms else self.latency_ms
+        time.sleep(max(0.0, delay) / 1000.0)
+
+    def take_rate_limit(self, token: str):
+        """Return (allowed, headers)."""
+        key = "shared" if self.shared_rate_limit else token
+        now = time.time()
+        with self.lock:
+            remaining, reset = self.buckets.get(key, [self.rate_limit, now + self.rate_window_s])
+            if now >= reset:
+                remaining, reset = self.rate_limit, now + self.rate_window_s
+            allowed = remaining > 0
+            if allowed:
+                remaining -= 1
+            else:
+                self.rate_limited += 1
+            self.buckets[key] = [remaining, reset]
+        return allowed, {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Used": str(self.rate_limit - remaining),
+            "X-RateLimit-Reset": str(int(reset)),
+            "X-RateLimit-Resource": "core",
+        }
+
+    def record(self, route: str, token: str, status: int):
+        with self.lock:
+            self.requests_by_route[route] = self.requests_by_route.get(route, 0) + 1
+            self.requests_by_token[token] = self.requests_by_token.get(token, 0) + 1
+            self.status_counts[str(status)] = self.status_counts.get(str(status), 0) + 1
+
+    def stats(self, token: str = "") -> dict:
+        with self.lock:
+            total = sum(self.requests_by_route.values())
+            return {
+                "uptime_s": round(time.time() - self.started, 3),
+                "requests_total": total,
+                "requests_by_route": dict(self.requests_by_route),
+                "requests_for_token": self.requests_by_token.get(token, 0) if token else None,
+                "status_counts": dict(self.status_counts),
+                "rate_limited": self.rate_limited,
+                "runs": len(self.runs),
+                "rss_kb": rss_kb(),
+                "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            }
+
+    # ---- runs ----
+    def dispatch(self, workflow: str, body: dict):
+        inputs = body.get("inputs") or {}
+        tag = inputs.get("input_tag") or _sanitize_tag(
+            inputs.get("docker_image") if inputs.get("scan_type") == "docker"
+            else os.path.basename((inputs.get("repo_url") or "input").rstrip("/")).replace(".git", ""))
+        # Same as the workflows' run-name: fossology <scan_type> <tag> [<dispatch id>]
+        scan_type = "batch" if "batch" in inputs else inputs.get("scan_type", "")
+        title = f"fossology {scan_type} {tag} {inputs.get('dispatch_id', '')}".rstrip()
+        now = time.time()
+        with self.lock:
+            self.next_id += 1
+            run_id = self.next_id
+            self.runs[run_id] = {
+                "id": run_id, "name": "Fossology final", "display_title": title,
+                "event": "workflow_dispatch", "head_branch": body.get("ref", "main"),
+                "path": f".github/workflows/{workflow}",
+                "html_url": f"https://github.com/standin/actions/runs/{run_id}",
+                "_workflow": workflow, "_created": now, "_tag": tag, "_inputs": inputs, "_cancelled": None,
+            }
+
+    def run_view(self, run: dict) -> dict:
+        now = time.time()
+        age = now - run["_created"]
+        view = {k: v for k, v in run.items() if not k.startswith("_")}
+        view["created_at"] = _iso(run["_created"])
+        view["run_started_at"] = _iso(run["_created"] + self.queue_s) if age >= self.queue_s else None
+        if run["_cancelled"] is not None:
+            view.update(status="completed", conclusion="cancelled", updated_at=_iso(run["_cancelled"]))
+        elif age < self.queue_s:
+            view.update(status="queued", conclusion=None, updated_at=view["created_at"])
+        elif age < self.queue_s + self.run_s:
+            view.update(status="in_progress", conclusion=None, updated_at=_iso(now))
+        else:
+            view.update(status="completed", conclusion="success",
+                        updated_at=_iso(run["_created"] + self.queue_s + self.run_s))
+        return view
+
+    def list_runs(self, workflow: str = "", status: str = "") -> list:
+        with self.lock:
+            runs = [r for r in self.runs.values() if not workflow or r["_workflow"] == workflow]
+        views = [self.run_view(r) for r in sorted(runs, key=lambda r: r["_created"], reverse=True)]
+        return [v for v in views if not status or v["status"] == status]
+
+    def artifact_for(self, run: dict):
+        view = self.run_view(run)
+        if view["conclusion"] != "success":
+            return None
+        return {
+            "id": run["id"] * 10, "name": f"fossology-reports-{run['_tag']}-{run['id']}",
+            "size_in_bytes": len(self.artifact_zip), "expired": False,
+            "created_at": view["updated_at"], "updated_at": view["updated_at"],
+            "expires_at": _iso(run["_created"] + 14 * 86400),
+            "digest": self.artifact_digest,
+            "workflow_run": {"id": run["id"]},
+        }
+
+    def cancel(self, run_id: int) -> bool:
+        with self.lock:
+            run = self.runs.get(run_id)
+            if run is None:
+                return False
+        if self.run_view(run)["status"] == "completed":
+            return False
+        with self.lock:
+            run["_cancelled"] = time.time()
+        return True
+
+def _paginate(items: list, qs: dict) -> list:
+    per_page = int(qs.get("per_page", ["30"])[0])
+    page = int(qs.get("page", ["1"])[0])
+    return items[(page - 1) * per_page: page * per_page]
+
+# Route table: (method, regex, name); names double as low-cardinality stats keys
+ROUTES = [
+    ("POST", r"/repos/[^/]+/[^/]+/actions/workflows/(?P<wf>[^/]+)/dispatches", "dispatches"),
+    ("GET", r"/repos/[^/]+/[^/]+/actions/workflows/(?P<wf>[^/]+)/runs", "workflow_runs"),
+    ("GET", r"/repos/[^/]+/[^/]+/actions/runs", "repo_runs"),
+    ("GET", r"/repos/[^/]+/[^/]+/actions/runs/(?P<id>\d+)", "run"),
+    ("POST", r"/repos/[^/]+/[^/]+/actions/runs/(?P<id>\d+)/cancel", "run_cancel"),
+    ("GET", r"/repos/[^/]+/[^/]+/actions/runs/(?P<id>\d+)/artifacts", "run_artifacts"),
+    ("GET", r"/repos/[^/]+/[^/]+/actions/artifacts", "artifacts"),
+    ("GET", r"/repos/[^/]+/[^/]+/actions/artifacts/(?P<id>\d+)/zip", "artifact_zip"),
+    ("GET", r"/_blob/(?P<id>\d+)", "artifact_blob"),
+    ("GET", r"/v2/(?P<name>.+)/manifests/(?P<ref>[^/]+)", "registry_manifest"),
+    ("GET", r"/repos/[^/]+/[^/]+/branches", "branches"),
+    ("GET", r"/repos/[^/]+/[^/]+/tags", "tags"),
+    ("GET", r"/repos/[^/]+/[^/]+/contents/(?P<path>.+)", "contents_get"),
+    ("PUT", r"/repos/[^/]+/[^/]+/contents/(?P<path>.+)", "contents_put"),
+    ("DELETE", r"/repos/[^/]+/[^/]+/contents/(?P<path>.+)", "contents_delete"),
+    ("GET", r"/repos/[^/]+/[^/]+/git/trees/[^/]+", "git_tree"),
+    ("GET", r"/repos/[^/]+/[^/]+/commits", "commits"),
+]
+ROUTES = [(m, re.compile("^" + rx + "$"), name) for m, rx, name in ROUTES]
+
+def make_handler(state: GitHubStandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body=None, headers=None, raw: bytes = None, ctype="application/json"):
+            data = raw if raw is not None else (json.dumps(body).encode() if body is not None else b"")
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self) -> dict:
+            n = int(self.headers.get("Content-Length") or 0)
+            if not n:
+                return {}
+            try:
+                return json.loads(self.rfile.read(n) or b"{}")
+            except ValueError:
+                return {}
+
+        def _handle(self, method: str):
+            url = urlparse(self.path)
+            qs = parse_qs(url.query)
+            if url.path == "/_stats":
+                return self._send(200, state.stats(qs.get("token", [""])[0]))
+            if url.path == "/_reset":
+                state.reset_stats()
+                return self._send(204)
+
+            token = (self.headers.get("Authorization") or "").replace("Bearer ", "") or "anonymous"
+            for m, rx, name in ROUTES:
+                match = rx.match(url.path)
+                if m == method and match:
+                    break
+            else:
+                state.record("unknown", token, 404)
+                return self._send(404, {"message": "Not Found"})
+
+            state.sleep_latency()
+            if name == "artifact_blob":
+                # Blob storage is not rate-limited and not counted as a GitHub API call
+                return self._send(200, raw=state.artifact_zip, ctype="application/zip")
+            if name == "registry_manifest":
+                # Container registry (preflight image check); not a GitHub API call either
+                return self._send(200, {
+                    "schemaVersion": 2, "mediaType": "application/vnd.oci.image.manifest.v1+json",
+                    "config": {"size": 1469}, "layers": [{"size": 3 << 20}, {"size": 12 << 20}],
+                }, ctype="application/vnd.oci.image.manifest.v1+json")
+            allowed, rl_headers = state.take_rate_limit(token)
+            if not allowed:
+                state.record(name, token, 403)
+                return self._send(403, {"message": "API rate limit exceeded (stand-in)"}, rl_headers)
+            status, body, extra = self.route(name, match.groupdict(), qs, method)
+            state.record(name, token, status)
+            headers = dict(rl_headers, **(extra or {}))
+            if isinstance(body, bytes):
+                return self._send(status, raw=body, headers=headers, ctype="application/zip")
+            return self._send(status, body, headers)
+
+        def route(self, name, params, qs, method):
+            if name == "dispatches":
+                state.dispatch(params["wf"], self._body())
+                return 204, None, None
+            if name in ("workflow_runs", "repo_runs"):
+                runs = state.list_runs(params.get("wf", ""), qs.get("status", [""])[0])
+                return 200, {"total_count": len(runs), "workflow_runs": _paginate(runs, qs)}, None
+            if name in ("run", "run_artifacts", "run_cancel"):
+                run = state.runs.get(int(params["id"]))
+                if run is None:
+                    return 404, {"message": "Not Found"}, None
+                if name == "run":
+                    return 200, state.run_view(run), None
+                if name == "run_cancel":
+                    return (202, {}, None) if state.cancel(run["id"]) else (409, {"message": "Cannot cancel a completed run"}, None)
+                art = state.artifact_for(run)
+                return 200, {"total_count": int(bool(art)), "artifacts": [art] if art else []}, None
+            if name == "artifacts":
+                with state.lock:
+                    runs = list(state.runs.values())
+                arts = [a for a in (state.artifact_for(r) for r in runs) if a]
+                name_q = qs.get("name", [""])[0]
+                arts = [a for a in arts if not name_q or a["name"] == name_q]
+                return 200, {"total_count": len(arts), "artifacts": _paginate(arts, qs)}, None
+            if name == "artifact_zip":
+                # Like GitHub: redirect to (unauthenticated) blob storage
+                return 302, None, {"Location": f"/_blob/{params['id']}"}
+            if name in ("branches", "tags"):
+                names = state.branches if name == "branches" else state.tags
+                return 200, [{"name": n, "commit": {"sha": f"{i:040x}"}} for i, n in enumerate(_paginate(names, qs))], None
+            if name == "contents_get":
+                path = params["path"].rstrip("/")
+                with state.lock:
+                    if path in state.contents:
+                        c = state.contents[path]
+                        return 200, {"type": "file", "path": path, "sha": c["sha"], "size": c["size"],
+                                     "download_url": f"https://raw.standin/{path}"}, None
+                    children = [p for p in state.contents if p.startswith(path + "/")]
+                    if children:
+                        return 200, [{"type": "file", "path": p, "name": p.rsplit("/", 1)[-1], "sha": state.contents[p]["sha"],
+                                      "download_url": f"https://raw.standin/{p}"} for p in children], None
+                return 404, {"message": "Not Found"}, None
+            if name == "contents_put":
+                body = self._body()
+                path = params["path"]
+                with state.lock:
+                    state.contents[path] = {"sha": f"{len(state.contents):040x}", "size": len(body.get("content", "")) * 3 // 4,
+                                            "created": time.time()}
+                return 201, {"content": {"path": path, "download_url": f"https://raw.standin/{path}"}}, None
+            if name == "contents_delete":
+                with state.lock:
+                    existed = state.contents.pop(params["path"], None)
+                return (200, {}, None) if existed else (404, {"message": "Not Found"}, None)
+            if name == "git_tree":
+                with state.lock:
+                    tree = [{"path": p, "type": "blob", "sha": c["sha"], "size": c["size"]} for p, c in state.contents.items()]
+                return 200, {"tree": tree, "truncated": False}, None
+            if name == "commits":
+                path = qs.get("path", [""])[0]
+                with state.lock:
+                    c = state.contents.get(path)
+                if not c:
+                    return 200, [], None
+                return 200, [{"sha": c["sha"], "commit": {"committer": {"date": _iso(c["created"])}}}], None
+            return 404, {"message": "Not Found"}, None
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_PUT(self):
+            self._handle("PUT")
+
+        def do_DELETE(self):
+            self._handle("DELETE")
+
+    return Handler
+
+# =========================
+# FOSSOLOGY STAND-IN
+# =========================
+class FossologyStandIn:
+    """
+    In-memory FOSSology REST API (the calls the workflows and fossology_backend.py
+    make). Jobs run on a timer; uploads are unpacked `unpack_s` after upload.
+    Tracks tokens created, connections opened and the peak number of active jobs.
+    """
+
+    def __init__(self, unpack_s=1.0, scan_s=3.0, report_s=0.5, username="fossy", password="fossy"):
+        self.unpack_s, self.scan_s, self.report_s = unpack_s, scan_s, report_s
+        self.username, self.password = username, password
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.tokens = {}        # token -> token name
+        self.uploads = {}       # upload_id -> {"name", "description", "size", "created", "folder"}
+        self.jobs = {}          # job_id -> {"upload", "kind", "start", "duration", "format"}
+        self.deleted = []
+        self.connections = 0
+        self.peak_active = 0
+
+    def _id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+    def job_status(self, job: dict, now: float = None) -> str:
+        return "Completed" if (now or time.time()) >= job["start"] + job["duration"] else "Processing"
+
+    def active(self) -> int:
+        now = time.time()
+        with self.lock:
+            n = sum(1 for j in self.jobs.values() if self.job_status(j, now) != "Completed")
+            self.peak_active = max(self.peak_active, n)
+        return n
+
+    def add_job(self, upload_id: int, kind: str, duration: float, **extra) -> int:
+        with self.lock:
+            job_id = self._id()
+            self.jobs[job_id] = dict(upload=upload_id, kind=kind, start=time.time(), duration=duration, **extra)
+        self.active()
+        return job_id
+
+    def create_token(self, body: dict):
+        if body.get("username") != self.username or body.get("password") != self.password:
+            return 404, {"code": 404, "message": "UserName or password is incorrect", "type": "ERROR"}
+        with self.lock:
+            if body.get("token_name") in self.tokens.values():
+                return 400, {"code": 400, "message": "Token name already exists", "type": "ERROR"}
+            token = hashlib.sha1(f"{body.get('token_name')}{time.time()}".encode()).hexdigest()
+            self.tokens[token] = body.get("token_name")
+        return 201, {"Authorization": f"Bearer {token}"}
+
+    def upload(self, name: str, description: str, size: int, folder: str) -> int:
+        with self.lock:
+            upload_id = self._id()
+            self.uploads[upload_id] = {"name": name, "description": description, "size": size,
+                                       "created": time.time(), "folder": int(folder or 1)}
+        # FOSSology unpacks every upload on arrival
+        self.add_job(upload_id, "ununpack", self.unpack_s)
+        return upload_id
+
+    def upload_view(self, upload_id: int) -> dict:
+        u = self.uploads[upload_id]
+        return {"id": upload_id, "folderid": u["folder"], "foldername": "Software Repository",
+                "description": u["description"], "uploadname": u["name"], "filesize": u["size"],
+                "uploaddate": datetime.fromtimestamp(u["created"], timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f+00")}
+
+    def unpacked(self, upload_id: int) -> bool:
+        now = time.time()
+        with self.lock:
+            return all(self.job_status(j, now) == "Completed" for j in self.jobs.values()
+                       if j["upload"] == upload_id and j["kind"] == "ununpack")
+
+    def report_body(self, upload_id: int, fmt: str) -> bytes:
+        name = self.uploads.get(upload_id, {}).get("name", "upload")
+        if fmt == "spdx2":
+            return (f"SPDXVersion: SPDX-2.2\nPackageName: {name}\nPackageLicenseInfoFromFiles: MIT\n\n"
+                    f"FileName: {name}/LICENSE\nSPDXID: SPDXRef-item{upload_id}\nLicenseConcluded: NOASSERTION\n"
+                    f"FileChecksum: SHA1: {hashlib.sha1(b'MIT').hexdigest()}\nLicenseInfoInFile: MIT\n"
+                    f"FileCopyrightText: <text>Copyright (c) stand-in</text>\n").encode()
+        return f"{fmt} report for upload {upload_id} ({name})\n".encode()
+
+    def stats(self) -> dict:
+        active = self.active()
+        with self.lock:
+            return {"tokens_created": len(self.tokens), "connections": self.connections,
+                    "uploads": len(self.uploads), "deleted_uploads": list(self.deleted),
+                    "jobs": len(self.jobs), "active_jobs": active, "peak_active_jobs": self.peak_active}
+
+FOSSOLOGY_ROUTES = [
+    ("GET", r"/version", "version"),
+    ("POST", r"/tokens", "tokens"),
+    ("POST", r"/uploads", "upload"),
+    ("GET", r"/uploads", "uploads"),
+    ("GET", r"/uploads/(?P<id>\d+)", "upload_get"),
+    ("DELETE", r"/uploads/(?P<id>\d+)", "upload_delete"),
+    ("POST", r"/uploads/(?P<id>\d+)/reports", "report"),
+    ("GET", r"/uploads/(?P<id>\d+)/(?P<what>licenses|copyrights|decisions|obligations|summary)", "upload_json"),
+    ("POST", r"/jobs", "job_create"),
+    ("GET", r"/jobs", "jobs"),
+    ("GET", r"/jobs/(?P<id>\d+)", "job"),
+    ("GET", r"/jobs/(?P<id>\d+)/download", "job_download"),
+]
+FOSSOLOGY_ROUTES = [(m, re.compile("^/repo/api/v1" + rx + "$"), name) for m, rx, name in FOSSOLOGY_ROUTES]
+
+def make_fossology_handler(state: FossologyStandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def _send(self, status: int, body=None, headers=None, raw: bytes = None, ctype="application/json"):
+            data = raw if raw is not None else (json.dumps(body).encode() if body is not None else b"")
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _raw_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def _handle(self, method: str):
+            url = urlparse(self.path)
+            qs = parse_qs(url.query)
+            if url.path == "/_stats":
+                return self._send(200, state.stats())
+            if url.path == "/_backdate":
+                # Test hook: make an upload look N days old (retention pruning)
+                u = state.uploads.get(int(qs.get("upload", ["0"])[0]))
+                if u:
+                    u["created"] -= float(qs.get("days", ["0"])[0]) * 86400
+                return self._send(204 if u else 404)
+            for m, rx, name in FOSSOLOGY_ROUTES:
+                match = rx.match(url.path)
+                if m == method and match:
+                    break
+            else:
+                self._raw_body()
+                return self._send(404, {"code": 404, "message": "Not Found", "type": "ERROR"})
+            raw = self._raw_body()
+            token = (self.headers.get("Authorization") or "").replace("Bearer ", "")
+            if name not in ("version", "tokens") and token not in state.tokens:
+                return self._send(401, {"code": 401, "message": "Invalid or expired token", "type": "ERROR"})
+            status, body, extra = self.route(name, match.groupdict(), qs, raw)
+            if isinstance(body, bytes):
+                return self._send(status, raw=body, headers=extra, ctype="application/octet-stream")
+            return self._send(status, body, extra)
+
+        def route(self, name, params, qs, raw):
+            h = self.headers
+            if name == "version":
+                return 200, {"version": "4.3.0-standin"}, None
+            if name == "tokens":
+                status, body = state.create_token(json.loads(raw or b"{}"))
+                return status, body, None
+            if name == "upload":
+                m = re.search(rb'filename="([^"]*)"', raw[:4096])
+                upload_id = state.upload(m.group(1).decode() if m else "upload", h.get("uploadDescription") or "",
+                                         len(raw), h.get("folderId"))
+                return 201, {"code": 201, "message": upload_id, "type": "INFO"}, None
+            if name == "uploads":
+                folder = int(qs.get("folderId", ["1"])[0])
+                items = [state.upload_view(i) for i in sorted(state.uploads) if state.uploads[i]["folder"] == folder]
+                limit, page = int(h.get("limit") or 100), int(h.get("page") or 1)
+                pages = max(1, -(-len(items) // limit))
+                return 200, items[(page - 1) * limit: page * limit], {"X-Total-Pages": str(pages)}
+            if name in ("upload_get", "upload_delete", "report", "upload_json"):
+                upload_id = int(params["id"])
+                if upload_id not in state.uploads:
+                    return 404, {"code": 404, "message": "Upload does not exist", "type": "ERROR"}, None
+                if not state.unpacked(upload_id):
+                    return 503, {"code": 503, "message": "Ununpack job not started. Please check job status", "type": "INFO"}, None
+                if name == "upload_get":
+                    return 200, state.upload_view(upload_id), None
+                if name == "upload_delete":
+                    with state.lock:
+                        state.uploads.pop(upload_id, None)
+                        state.deleted.append(upload_id)
+                    return 202, {"code": 202, "message": "Delete Job for file with id " + str(upload_id), "type": "INFO"}, None
+                if name == "report":
+                    fmt = json.loads(raw or b"{}").get("reportFormat", "spdx2")
+                    return 201, {"id": state.add_job(upload_id, "report", state.report_s, format=fmt)}, None
+                what = params["what"]
+                if what == "licenses":
+                    return 200, [{"filePath": f"{state.uploads[upload_id]['name']}/LICENSE",
+                                  "findings": {"scanner": ["MIT"], "conclusion": None}}], None
+                if what == "copyrights":
+                    return 200, [{"copyright": "Copyright (c) stand-in",
+                                  "filePath": [f"{state.uploads[upload_id]['name']}/LICENSE"]}], None
+                return 200, ({"uploadId": upload_id, "uniqueLicenses": 1} if what == "summary" else []), None
+            if name == "job_create":
+                upload_id = int(h.get("uploadId") or 0)
+                if upload_id not in state.uploads:
+                    return 404, {"code": 404, "message": "Upload does not exist", "type": "ERROR"}, None
+                analysis = json.loads(raw or b"{}").get("analysis") or {}
+                duration = state.unpack_s / 4 if list(analysis) == ["unpack"] else state.scan_s
+                return 201, {"code": 201, "message": state.add_job(upload_id, "agents", duration), "type": "INFO"}, None
+            if name == "jobs":
+                state.active()
+                now = time.time()
+                with state.lock:
+                    jobs = [{"id": i, "uploadId": j["upload"], "status": state.job_status(j, now)}
+                            for i, j in sorted(state.jobs.items())]
+                return 200, jobs[:int(h.get("limit") or 100)], None
+            job = state.jobs.get(int(params["id"]))
+            if job is None:
+                return 404, {"code": 404, "message": "Job does not exist", "type": "ERROR"}, None
+            if name == "job":
+                state.active()
+                return 200, {"id": int(params["id"]), "uploadId": job["upload"], "status": state.job_status(job)}, None
+            if state.job_status(job) != "Completed":
+                return 503, {"code": 503, "message": "Report is not ready yet", "type": "INFO"}, None
+            return 200, state.report_body(job["upload"], job.get("format", "spdx2")), None
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_DELETE(self):
+            self._handle("DELETE")
+
+    return Handler
+
+def serve_fossology(args) -> int:
+    state = FossologyStandIn(unpack_s=args.unpack_s, scan_s=args.scan_s, report_s=args.report_s)
+    server = ThreadingHTTPServer((args.host, args.port), make_fossology_handler(state))
+    server.daemon_threads = True
+    print(f"LISTENING {server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def serve(args) -> int:
+    state = GitHubStandIn(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, queue_s=args.queue_s, run_s=args.run_s,
+        rate_limit=args.rate_limit, rate_window_s=args.rate_window_s,
+        shared_rate_limit=not args.per_token_rate_limit, artifact_kb=args.artifact_kb,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    # First line is machine-readable for `run`
+    print(f"LISTENING {server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+# =========================
+# DRIVER
+# =========================
+def _get_json(url: str) -> dict:
+    import urllib.request
+    with urllib.request.urlopen(url, timeout=30) as r:
+        return json.loads(r.read() or b"{}")
+
+def start_standin(args):
+    cmd = [sys.executable, os.path.abspath(__file__), "serve", "--port", "0",
+           "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+           "--queue-s", str(args.queue_s), "--run-s", str(args.run_s),
+           "--rate-limit", str(args.rate_limit), "--rate-window-s", str(args.rate_window_s),
+           "--artifact-kb", str(args.artifact_kb)]
+    if args.per_token_rate_limit:
+        cmd.append("--per-token-rate-limit")
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline().strip()
+    if not line.startswith("LISTENING "):
+        proc.kill()
+        raise RuntimeError(f"Stand-in did not start: {line!r}")
+    return proc, f"http://127.0.0.1:{line.split()[1]}"
+
+def _button(at, label: str):
+    return next(b for b in at.button if b.label == label)
+
+def user_session(k: int, args, base_url: str) -> dict:
+    """
+    One virtual analyst: open the app, dispatch a docker scan, poll until the
+    artifact is fetched. Runs inside a worker process; returns its records and
+    the worker's RSS.
+    """
+    records = _user_actions(k, args, base_url)
+    return {"records": records, "rss_kb": rss_kb(),
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "pid": os.getpid()}
+
+def _user_actions(k: int, args, base_url: str) -> list:
+    from streamlit.testing.v1 import AppTest
+
+    token = f"loadtest-user-{k}"
+    records = []
+
+    def calls() -> int:
+        return _get_json(f"{base_url}/_stats?token={token}")["requests_for_token"]
+
+    def act(name: str, fn):
+        before, start = calls(), time.perf_counter()
+        error = ""
+        try:
+            fn()
+            if at.exception:
+                error = str(at.exception[0].value)
+        except Exception as e:  # a failed action is reported, not fatal for the run
+            error = f"{type(e).__name__}: {e}"
+        records.append({"user": k, "action": name, "latency_s": time.perf_counter() - start,
+                        "github_calls": calls() - before, "error": error})
+        return not error
+
+    at = AppTest.from_file(os.path.abspath(args.app), default_timeout=args.timeout)
+    at.secrets["GITHUB_TOKEN"] = token
+    at.secrets["GITHUB_API_URL"] = base_url
+    at.secrets["METRICS_PORT"] = 0
+    at.secrets["RUNNER_CAPACITY"] = args.runner_capacity
+    at.secrets["DOCKER_HUB_REGISTRY"] = base_url  # preflight image checks hit the stand-in registry
+    if not act("open", at.run):
+        return records
+
+    image = f"loadtest/image-{k}:1.0"
+    docker_input = next(t for t in at.text_input if t.label.startswith("Docker image"))
+    if not act("dispatch", lambda: (docker_input.set_value(image), _button(at, "▶️ Run Scan").click(), at.run())):
+        return records
+
+    deadline = time.time() + args.queue_s + args.run_s + args.max_wait_s
+    while time.time() < deadline:
+        time.sleep(args.think_s)
+        if not act("poll", lambda: (_button(at, "🔎 Check status & fetch").click(), at.run())):
+            break
+        # Runs that publish a columnar manifest land in results_columnar instead
+        if "results_artifact" in at.session_state or "results_columnar" in at.session_state:
+            records[-1]["action"] = "poll+fetch"
+            break
+    else:
+        records.append({"user": k, "action": "timeout", "latency_s": 0.0, "github_calls": 0,
+                        "error": "artifact not fetched before --max-wait-s"})
+    return records
+
+def _pct(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+def summarize(records: list, wall_s: float, standin: dict, workers: dict) -> dict:
+    by_action = {}
+    for r in records:
+        by_action.setdefault(r["action"], []).append(r)
+    actions = {}
+    for name, rs in sorted(by_action.items()):
+        lat = [r["latency_s"] for r in rs]
+        actions[name] = {
+            "count": len(rs),
+            "errors": sum(1 for r in rs if r["error"]),
+            "p50_s": round(_pct(lat, 50), 3), "p95_s": round(_pct(lat, 95), 3),
+            "p99_s": round(_pct(lat, 99), 3), "max_s": round(max(lat), 3),
+            "github_calls_per_action": round(statistics.mean(r["github_calls"] for r in rs), 2),
+        }
+    return {
+        "wall_s": round(wall_s, 2),
+        "actions_total": len(records),
+        "throughput_actions_per_s": round(len(records) / wall_s, 2) if wall_s else 0.0,
+        "actions": actions,
+        "github_requests_total": standin["requests_total"],
+        "github_requests_by_route": standin["requests_by_route"],
+        "rate_limited_responses": standin["rate_limited"],
+        "standin_rss_kb": standin["rss_kb"],
+        "app_workers": len(workers),
+        "app_rss_kb_per_worker_peak": max(workers.values(), default=0),
+        "app_rss_kb_total_peak": sum(workers.values()),
+        # cache_resource state (scheduler, caches) is per worker process, not app-wide
+        "shared_app_state": False,
+        "errors": sorted({r["error"] for r in records if r["error"]})[:10],
+    }
+
+def print_report(summary: dict):
+    print("")
+    print("==================== Load Test Summary ====================")
+    print(f"Wall time: {summary['wall_s']} s  |  actions: {summary['actions_total']}  |  "
+          f"throughput: {summary['throughput_actions_per_s']} actions/s")
+    print(f"{'Action':<12} {'n':>5} {'err':>5} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'max s':>8} {'GH calls':>9}")
+    for name, a in summary["actions"].items():
+        print(f"{name:<12} {a['count']:>5} {a['errors']:>5} {a['p50_s']:>8} {a['p95_s']:>8} "
+              f"{a['p99_s']:>8} {a['max_s']:>8} {a['github_calls_per_action']:>9}")
+    print(f"GitHub requests: {summary['github_requests_total']}  |  rate-limited: {summary['rate_limited_responses']}")
+    print(f"App RSS: {summary['app_rss_kb_total_peak'] // 1024} MiB over {summary['app_workers']} worker(s), "
+          f"max {summary['app_rss_kb_per_worker_peak'] // 1024} MiB per worker  |  "
+          f"stand-in RSS: {summary['standin_rss_kb'] // 1024} MiB")
+    print(f"Note: each of the {summary['app_workers']} worker(s) has its own st.cache_resource state, so "
+          f"RUNNER_CAPACITY, superseding and cache hits apply per worker, not across all users.")
+    for e in summary["errors"]:
+        print(f"⚠️  {e}")
+    print("===========================================================")
+
+def run(args) -> int:
+    proc, base_url = start_standin(args)
+    try:
+        start = time.perf_counter()
+        records, workers = [], {}
+        with ProcessPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = []
+            for k in range(args.users):
+                futures.append(pool.submit(user_session, k, args, base_url))
+                if args.ramp_s:
+                    time.sleep(args.ramp_s / max(1, args.users))
+            for f in futures:
+                result = f.result()
+                records.extend(result["records"])
+                workers[result["pid"]] = max(workers.get(result["pid"], 0), result["max_rss_kb"])
+        wall = time.perf_counter() - start
+        summary = summarize(records, wall, _get_json(f"{base_url}/_stats"), workers)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    print_report(summary)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"summary": summary, "records": records}, fh, indent=2)
+    return 0
+
+# =========================
+# CLI
+# =========================
+def _add_standin_args(p):
+    p.add_argument("--latency-ms", type=float, default=80.0, help="mean GitHub API latency")
+    p.add_argument("--jitter-ms", type=float, default=40.0, help="latency std deviation")
+    p.add_argument("--queue-s", type=float, default=3.0, help="time a run stays 'queued'")
+    p.add_argument("--run-s", type=float, default=10.0, help="time a run stays 'in_progress'")
+    p.add_argument("--rate-limit", type=int, default=5000, help="requests per window (one PAT)")
+    p.add_argument("--rate-window-s", type=int, default=3600)
+    p.add_argument("--per-token-rate-limit", action="store_true",
+                   help="rate-limit per token instead of one shared bucket (the app uses a single PAT)")
+    p.add_argument("--artifact-kb", type=int, default=256, help="artifact ZIP padding size")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("serve", help="run the GitHub stand-in")
+    sp.add_argument("--host", default="127.0.0.1")
+    sp.add_argument("--port", type=int, default=8787)
+    _add_standin_args(sp)
+
+    rp = sub.add_parser("run", help="drive concurrent user sessions of the app")
+    rp.add_argument("--app", default=DEFAULT_APP)
+    rp.add_argument("--users", type=int, default=50)
+    rp.add_argument("--concurrency", type=int, default=50)
+    rp.add_argument("--ramp-s", type=float, default=5.0, help="spread session starts over this many seconds")
+    rp.add_argument("--think-s", type=float, default=2.0, help="pause between polls")
+    rp.add_argument("--max-wait-s", type=float, default=60.0, help="extra wait beyond queue+run time")
+    rp.add_argument("--timeout", type=float, default=120.0, help="per-rerun AppTest timeout")
+    rp.add_argument("--runner-capacity", type=int, default=20, help="app RUNNER_CAPACITY (dispatch scheduler)")
+    rp.add_argument("--json", default="", help="also write summary + raw records to this file")
+    _add_standin_args(rp)
+
+    fp = sub.add_parser("serve-fossology", help="run the FOSSology REST stand-in (backend mode, fossology_backend.py)")
+    fp.add_argument("--host", default="127.0.0.1")
+    fp.add_argument("--port", type=int, default=8081)
+    fp.add_argument("--unpack-s", type=float, default=1.0, help="time to unpack an upload")
+    fp.add_argument("--scan-s", type=float, default=3.0, help="time an agent job runs")
+    fp.add_argument("--report-s", type=float, default=0.5, help="time to generate a report")
+
+    args = ap.parse_args(argv)
+    if args.cmd == "serve-fossology":
+        return serve_fossology(args)
+    return serve(args) if args.cmd == "serve" else run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Bounded memory manager for large per-session payloads (stdlib only).
+
+Streamlit session state keeps whole archives in RAM for as long as a tab
+stays open. Instead, sessions keep a *handle* (a short string) and the
+PayloadStore keeps the bytes:
+
+- every payload is written to a spill file under `root/<session>/`;
+- a RAM copy is kept while it fits in the process-wide `ram_budget`; when the
+  budget is exceeded, resident copies of the most idle sessions are dropped
+  first (least recently used within a session) and re-read from disk on use;
+- sessions idle longer than `idle_ttl_s` lose their spill files too (`gc`);
+  spill folders this process does not know (left by an earlier process) are
+  removed once untouched for that long (`sweep`, also run at start-up).
+
+One store per app process (wrap it in st.cache_resource); `diagnostics()`
+reports usage per session.
+"""
+import os
+import shutil
+import threading
+import time
+import uuid
+
+SWEEP_S = 600  # how often gc() also looks for folders left by earlier processes
+
+class PayloadStore:
+    def __init__(self, root: str, ram_budget: int, idle_ttl_s: float = 12 * 3600):
+        self.root = root
+        self.ram_budget = int(ram_budget)
+        self.idle_ttl_s = idle_ttl_s
+        self._lock = threading.Lock()
+        self._payloads = {}  # handle -> {"session", "label", "size", "path", "data", "used"}
+        self._sessions = {}  # session -> last seen (epoch seconds)
+        self.evictions = 0
+        self._swept = 0.0
+        os.makedirs(root, exist_ok=True)
+        self.sweep()
+
+    # ---- sessions ----
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    def touch(self, session: str):
+        """Mark a session active (call once per rerun)."""
+        with self._lock:
+            self._sessions[session] = time.time()
+        try:
+            os.utime(os.path.join(self.root, session))  # keeps its folder from other processes' sweeps
+        except OSError:
+            pass
+
+    # ---- payloads ----
+    def put(self, session: str, label: str, data) -> str:
+        """Spill bytes or a binary file object to disk and return its handle."""
+        handle = uuid.uuid4().hex
+        folder = os.path.join(self.root, session)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{handle}.bin")
+        with open(path, "wb") as fh:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                fh.write(data)
+            else:
+                data.seek(0)
+                shutil.copyfileobj(data, fh, 1 << 20)
+                data.seek(0)
+        size = os.path.getsize(path)
+        now = time.time()
+        with self._lock:
+            self._sessions[session] = now
+            self._payloads[handle] = {"session": session, "label": label, "size": size,
+                                      "path": path, "data": None, "used": now}
+            if isinstance(data, (bytes, bytearray)):
+                self._admit(handle, bytes(data))
+        return handle
+
+    def get(self, handle: str):
+        """Payload bytes (from RAM, else re-read from the spill file) or None if gone."""
+        with self._lock:
+            p = self._payloads.get(handle)
+            if p is None:
+                return None
+            p["used"] = self._sessions[p["session"]] = time.time()
+            if p["data"] is not None:
+                return p["data"]
+        try:
+            with open(p["path"], "rb") as fh:
+                data = fh.read()
+        except OSError:
+            with self._lock:
+                self._payloads.pop(handle, None)
+            return None
+        with self._lock:
+            if handle in self._payloads:
+                self._admit(handle, data)
+        return data
+
+    def path(self, handle: str):
+        """Spill file path (for consumers that read from disk), or None."""
+        with self._lock:
+            p = self._payloads.get(handle)
+        return p["path"] if p else None
+
+    def size(self, handle: str) -> int:
+        with self._lock:
+            p = self._payloads.get(handle)
+        return p["size"] if p else 0
+
+    def discard(self, handle: str):
+        with self._lock:
+            p = self._payloads.pop(handle, None)
+        if p:
+            try:
+                os.remove(p["path"])
+            except FileNotFoundError:
+                pass
+
+    # ---- budget (callers hold self._lock) ----
+    @property
+    def resident_bytes(self) -> int:
+        return sum(p["size"] for p in self._payloads.values() if p["data"] is not None)
+
+    def _admit(self, handle: str, data: bytes):
+        p = self._payloads[handle]
+        if p["size"] > self.ram_budget:
+            return
+        p["data"] = data
+        overflow = self.resident_bytes - self.ram_budget
+        if overflow <= 0:
+            return
+        # Most idle sessions first, then least recently used payload; never the one just admitted
+        victims = sorted((q for h, q in self._payloads.items() if q["data"] is not None and h != handle),
+                         key=lambda q: (self._sessions.get(q["session"], 0), q["used"]))
+        for q in victims:
+            if overflow <= 0:
+                break
+            q["data"] = None
+            overflow -= q["size"]
+            self.evictions += 1
+
+    # ---- housekeeping ----
+    def gc(self, now=None) -> int:
+        """Delete sessions idle longer than idle_ttl_s (RAM and spill files); returns how many."""
+        now = now or time.time()
+        with self._lock:
+            idle = [s for s, seen in self._sessions.items() if now - seen > self.idle_ttl_s]
+            for s in idle:
+                del self._sessions[s]
+                for h in [h for h, p in self._payloads.items() if p["session"] == s]:
+                    del self._payloads[h]
+        for s in idle:
+            shutil.rmtree(os.path.join(self.root, s), ignore_errors=True)
+        if now - self._swept > SWEEP_S:
+            self.sweep(now)
+        return len(idle)
+
+    def sweep(self, now=None) -> int:
+        """Remove spill folders of unknown sessions untouched for idle_ttl_s; returns how many."""
+        now = now or time.time()
+        self._swept = now
+        with self._lock:
+            known = set(self._sessions)
+        removed = 0
+        for name in os.listdir(self.root):
+            folder = os.path.join(self.root, name)
+            try:
+                if name in known or not os.path.isdir(folder) or now - os.path.getmtime(folder) <= self.idle_ttl_s:
+                    continue
+            except OSError:
+                continue
+            shutil.rmtree(folder, ignore_errors=True)
+            removed += 1
+        return removed
+
+    def diagnostics(self, now=None) -> dict:
+        """Totals plus one row per session (payloads, resident / spilled bytes, idle seconds)."""
+        now = now or time.time()
+        with self._lock:
+            rows = {s: {"session": s, "payloads": 0, "resident_bytes": 0, "spilled_bytes": 0,
+                        "idle_s": round(now - seen)} for s, seen in self._sessions.items()}
+            for p in self._payloads.values():
+                row = rows.setdefault(p["session"], {"session": p["session"], "payloads": 0, "resident_bytes": 0,
+                                                     "spilled_bytes": 0, "idle_s": None})
+                row["payloads"] += 1
+                row["spilled_bytes"] += p["size"]
+                if p["data"] is not None:
+                    row["resident_bytes"] += p["size"]
+            return {
+                "ram_budget": self.ram_budget, "resident_bytes": self.resident_bytes,
+                "spilled_bytes": sum(p["size"] for p in self._payloads.values()),
+                "evictions": self.evictions,
+                "sessions": sorted(rows.values(), key=lambda r: -r["spilled_bytes"]),
+            }
@@ -0,0 +1,255 @@
+"""
+Fail-fast preflight checks for scan inputs, run by the app before dispatch.
+
+Cheap metadata calls, run concurrently, instead of finding mistakes after a
+runner has installed packages and started the FOSSology container:
+
+- repo:   repository exists and is public (the workflow clones anonymously),
+          ref (branch / tag / commit) resolves; size from the repo metadata
+- docker: registry manifest for the image reference exists and can be pulled
+          anonymously; size = config + layer sizes
+- upload: HEAD (or a 1-byte ranged GET) on the archive URL; status,
+          content-type and content-length
+- backend: (backend mode only) the persistent FOSSology instance answers and
+          how many jobs it is running
+
+Each check returns {"check", "level": ok|warn|block, "message", "size",
+"identity"}. `block` stops the dispatch, `warn` is shown but does not.
+`identity` is what the input resolved to (commit sha, image digest) when known.
+"""
+import http.client
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+OK, WARN, BLOCK = "ok", "warn", "block"
+DOCKER_HUB = "https://registry-1.docker.io"
+MANIFEST_TYPES = ", ".join([
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+])
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+def result(check: str, level: str, message: str, size=None, identity: str = "") -> dict:
+    return {"check": check, "level": level, "message": message, "size": size, "identity": identity}
+
+# =========================
+# REPO
+# =========================
+def check_repo(github_get, api_url: str, owner: str, repo: str, ref: str, timeout: float = 8.0) -> list:
+    """Repository metadata + ref resolution (two GitHub calls, run concurrently)."""
+    try:
+        return _check_repo(github_get, api_url, owner, repo, ref, timeout)
+    except (requests.RequestException, ValueError) as e:
+        return [result("repo", WARN, f"GitHub check skipped: {type(e).__name__}")]
+
+def _check_repo(github_get, api_url: str, owner: str, repo: str, ref: str, timeout: float) -> list:
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        meta_f = pool.submit(github_get, f"{api_url}/repos/{owner}/{repo}", timeout=timeout)
+        ref_f = pool.submit(github_get, f"{api_url}/repos/{owner}/{repo}/commits/{ref}",
+                            headers={"Accept": "application/vnd.github.sha"}, timeout=timeout)
+        meta, ref_r = meta_f.result(), ref_f.result()
+
+    out = []
+    if meta.status_code == 404:
+        return [result("repo", BLOCK, f"{owner}/{repo} not found (or private and not visible to this token)")]
+    if not meta.ok:
+        out.append(result("repo", WARN, f"Could not read {owner}/{repo}: HTTP {meta.status_code}"))
+    else:
+        info = meta.json()
+        size = int(info.get("size") or 0) * 1024 or None  # GitHub reports KB
+        if info.get("private"):
+            out.append(result("repo", BLOCK, f"{owner}/{repo} is private – the workflow clones without credentials", size))
+        elif info.get("archived"):
+            out.append(result("repo", WARN, f"{owner}/{repo} is archived", size))
+        else:
+            out.append(result("repo", OK, f"{owner}/{repo} is public", size))
+
+    if ref_r.status_code in (404, 422):
+        out.append(result("ref", BLOCK, f"Ref `{ref}` not found in {owner}/{repo} (branch, tag or commit)"))
+    elif not ref_r.ok:
+        out.append(result("ref", WARN, f"Could not resolve ref `{ref}`: HTTP {ref_r.status_code}"))
+    else:
+        sha = ref_r.text.strip()
+        out.append(result("ref", OK, f"`{ref}` → {sha[:12]}", identity=sha))
+    return out
+
+# =========================
+# DOCKER
+# =========================
+def parse_image_ref(image: str, hub: str = DOCKER_HUB):
+    """'nginx:1.27' -> (registry_url, 'library/nginx', '1.27'); digests (@sha256:…) are kept as reference."""
+    image = image.strip()
+    name, reference = image, "latest"
+    if "@" in image:
+        name, reference = image.split("@", 1)
+    else:
+        last = image.rsplit("/", 1)[-1]
+        if ":" in last:
+            name, reference = image.rsplit(":", 1)
+    first, _, rest = name.partition("/")
+    if rest and ("." in first or ":" in first or first == "localhost"):
+        registry = first if first.startswith("http") else f"https://{first}"
+        if first == "docker.io":
+            registry, name = hub, rest
+        else:
+            name = rest
+    else:
+        registry = hub
+    if registry == hub and "/" not in name:
+        name = f"library/{name}"
+    return registry.rstrip("/"), name, reference
+
+_CHALLENGE_RE = re.compile(r'(\w+)="([^"]*)"')
+
+def _anonymous_token(session, challenge: str, timeout: float):
+    """Anonymous pull token from a `WWW-Authenticate: Bearer realm=…` challenge."""
+    if not challenge.lower().startswith("bearer"):
+        return None
+    params = dict(_CHALLENGE_RE.findall(challenge))
+    realm = params.pop("realm", "")
+    if not realm:
+        return None
+    r = session.get(realm, params=params, timeout=timeout)
+    if not r.ok:
+        return None
+    body = r.json()
+    return body.get("token") or body.get("access_token")
+
+def _get_manifest(session, url: str, headers: dict, timeout: float):
+    r = session.get(url, headers=headers, timeout=timeout)
+    if r.status_code == 401:
+        token = _anonymous_token(session, r.headers.get("WWW-Authenticate", ""), timeout)
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+            r = session.get(url, headers=headers, timeout=timeout)
+    return r
+
+def check_docker_image(image: str, hub: str = DOCKER_HUB, timeout: float = 8.0) -> list:
+    if not image.strip():
+        return [result("image", BLOCK, "Docker image is empty")]
+    registry, name, reference = parse_image_ref(image, hub)
+    headers = {"Accept": MANIFEST_TYPES}
+    url = f"{registry}/v2/{name}/manifests/{reference}"
+    session = requests.Session()
+    try:
+        r = _get_manifest(session, url, headers, timeout)
+        if r.status_code == 404:
+            return [result("image", BLOCK, f"`{name}:{reference}` not found on {registry}")]
+        if r.status_code in (401, 403):
+            return [result("image", BLOCK, f"`{name}` cannot be pulled anonymously from {registry} (private or missing)")]
+        if not r.ok:
+            return [result("image", WARN, f"Registry answered HTTP {r.status_code} for `{name}:{reference}`")]
+        manifest = r.json()
+        digest = r.headers.get("Docker-Content-Digest", "")
+        # Multi-arch index: size the linux/amd64 image the runner will pull
+        if manifest.get("manifests"):
+            pick = next((m for m in manifest["manifests"]
+                         if (m.get("platform") or {}).get("os") == "linux"
+                         and (m.get("platform") or {}).get("architecture") == "amd64"), None)
+            if pick is None:
+                return [result("image", WARN, f"`{name}:{reference}` has no linux/amd64 variant")]
+            r = _get_manifest(session, f"{registry}/v2/{name}/manifests/{pick['digest']}", headers, timeout)
+            manifest = r.json() if r.ok else {}
+        layers = manifest.get("layers") or []
+        size = sum(int(l.get("size") or 0) for l in layers) + int((manifest.get("config") or {}).get("size") or 0)
+        return [result("image", OK, f"`{name}:{reference}` found ({len(layers)} layers)", size or None, digest)]
+    except (requests.RequestException, ValueError) as e:
+        return [result("image", WARN, f"Registry check skipped: {type(e).__name__}")]
+    finally:
+        session.close()
+
+# =========================
+# ARCHIVE URL
+# =========================
+def check_archive_url(url: str, scan_type: str, timeout: float = 8.0) -> list:
+    if not url.strip():
+        return [result("url", BLOCK, "File URL is empty")]
+    if not url.lower().startswith(("http://", "https://")):
+        return [result("url", BLOCK, "File URL must be http(s)")]
+    try:
+        r = requests.head(url, allow_redirects=True, timeout=timeout)
+        if r.status_code in (403, 405, 501):
+            # Some hosts (e.g. S3 presigned GET URLs) reject HEAD; ask for one byte instead
+            r = requests.get(url, headers={"Range": "bytes=0-0"}, stream=True, allow_redirects=True, timeout=timeout)
+            r.close()
+    except requests.RequestException as e:
+        return [result("url", BLOCK, f"URL not reachable: {type(e).__name__}")]
+    if r.status_code >= 400:
+        return [result("url", BLOCK, f"URL answered HTTP {r.status_code}")]
+
+    ctype = (r.headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+    size = None
+    if r.headers.get("Content-Range", "").rpartition("/")[2].isdigit():
+        size = int(r.headers["Content-Range"].rpartition("/")[2])
+    elif (r.headers.get("Content-Length") or "").isdigit() and r.status_code != 206:
+        size = int(r.headers["Content-Length"])
+
+    if ctype in HTML_TYPES:
+        return [result("url", BLOCK, "URL returns an HTML page, not an archive (login page or non-direct link?)", size)]
+    if size == 0:
+        return [result("url", BLOCK, "URL returns an empty file", 0)]
+    out = []
+    looks_zip = "zip" in ctype or url.lower().split("?", 1)[0].endswith(".zip")
+    if scan_type == "upload-zip" and ctype and not looks_zip and ctype != "application/octet-stream":
+        out.append(result("type", WARN, f"Content-Type `{ctype}` does not look like a ZIP"))
+    if scan_type == "upload-tar" and looks_zip:
+        out.append(result("type", WARN, "URL looks like a ZIP but scan type is upload-tar"))
+    out.insert(0, result("url", OK, f"Reachable ({ctype or 'unknown type'}"
+                                    + (f", {size / 1024 / 1024:.1f} MB)" if size else ", size unknown)"), size))
+    return out
+
+# =========================
+# BACKEND
+# =========================
+def check_backend(backend_status, max_active: int) -> list:
+    """
+    Persistent FOSSology backend (fossology_backend.py): `backend_status()`
+    returns {"version", "active_jobs"}. Unreachable blocks (the run would fail
+    at the upload); a full queue only warns, the run waits for a slot.
+    """
+    try:
+        status = backend_status()
+    except (OSError, RuntimeError, ValueError, http.client.HTTPException) as e:
+        return [result("backend", BLOCK, f"FOSSology backend not usable: {e}")]
+    active = status.get("active_jobs", 0)
+    if max_active and active >= max_active:
+        return [result("backend", WARN, f"Backend busy ({active}/{max_active} jobs active) – the run waits for a slot")]
+    return [result("backend", OK, f"Backend {status.get('version', '?')} up, {active} job(s) active")]
+
+# =========================
+# ENTRY POINT
+# =========================
+def run_preflight(scan_type: str, docker_image: str = "", repo_meta=None, repo_ref: str = "", file_url: str = "",
+                  github_get=None, api_url: str = "", hub: str = DOCKER_HUB, timeout: float = 8.0) -> dict:
+    """
+    Run the checks that apply to this input concurrently.
+    Returns {"results": [...], "blocked": bool, "size": bytes or None, "identity": str}.
+    """
+    jobs = []
+    if scan_type == "docker":
+        jobs.append(lambda: check_docker_image(docker_image, hub, timeout))
+    elif scan_type == "repo":
+        if repo_meta and github_get:
+            jobs.append(lambda: check_repo(github_get, api_url, repo_meta["owner"], repo_meta["repo"], repo_ref or "main",
+                                           timeout))
+        else:
+            jobs.append(lambda: [result("repo", WARN, "Not a github.com URL – repo and ref not verified")])
+    elif scan_type in ("upload-zip", "upload-tar"):
+        jobs.append(lambda: check_archive_url(file_url, scan_type, timeout))
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(len(jobs), 1)) as pool:
+        for out in pool.map(lambda job: job(), jobs):
+            results.extend(out)
+    sizes = [r["size"] for r in results if r["size"]]
+    identities = [r["identity"] for r in results if r["identity"]]
+    return {
+        "results": results,
+        "blocked": any(r["level"] == BLOCK for r in results),
+        "size": sizes[0] if sizes else None,
+        "identity": identities[0] if identities else "",
+    }
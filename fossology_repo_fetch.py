@@ -0,0 +1,207 @@
+"""
+Repo acquisition for scan_type=repo: cached bare mirror + partial fetch.
+
+Instead of a fresh `git clone` per run (a full clone when the ref is a commit),
+the workflows keep one bare mirror per repo URL under a cache directory
+(persisted between runs with actions/cache) and:
+
+  1. resolve the ref (branch / tag via `git ls-remote`, commits as given);
+  2. skip the network entirely when the commit is already in the mirror;
+  3. otherwise fetch only that commit, blobless (`--depth 1 --filter=blob:none`);
+     servers that refuse SHA wants fall back to a blobless fetch of all
+     branches and tags (commits and trees only, no file contents);
+  4. fetch the blobs of that one tree that the mirror is still missing, in a
+     single batched request (blobs already cached from earlier runs are reused);
+  5. check the tree out as stored in git (`read-tree` + `checkout-index` into a
+     scratch index; `git archive` would honour .gitattributes `export-ignore` /
+     `export-subst` and silently drop or rewrite files) and package it
+     (a .tar.gz for FOSSology, or a directory for the sharded workflow).
+
+`changed` in the result tells the workflows whether the mirror gained objects,
+so the mirror cache is only saved again when there is something new.
+
+Only git and the Python standard library are needed, so it can be exercised
+against a local fixture repo:
+
+  python3 fossology_repo_fetch.py fetch --url https://github.com/org/repo.git --ref v1.2 \\
+      --cache ~/.cache/fossology-mirrors --tar repo.tar.gz
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+SHA_RE = re.compile(r"^[0-9a-fA-F]{7,40}$")
+
+def log(msg: str):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {msg}", file=sys.stderr, flush=True)
+
+def git(*args, git_dir=None, check=True, input=None, env=None) -> subprocess.CompletedProcess:
+    cmd = ["git"] + (["--git-dir", git_dir] if git_dir else []) + list(args)
+    return subprocess.run(cmd, input=input, capture_output=True, text=True, check=check,
+                          env={**os.environ, "GIT_TERMINAL_PROMPT": "0", **(env or {})})
+
+# =========================
+# MIRROR
+# =========================
+def mirror_path(cache_root: str, url: str) -> str:
+    """One bare mirror per repo URL (trailing .git and slashes ignored)."""
+    norm = url.strip().rstrip("/")
+    norm = norm[:-4] if norm.endswith(".git") else norm
+    name = re.sub(r"[^A-Za-z0-9._-]", "-", os.path.basename(norm))[:40] or "repo"
+    return os.path.join(cache_root, f"{name}-{hashlib.sha1(norm.encode()).hexdigest()[:12]}.git")
+
+def ensure_mirror(path: str, url: str) -> bool:
+    """Create the bare mirror if needed; returns True when it already existed."""
+    if os.path.isfile(os.path.join(path, "HEAD")):
+        git("remote", "set-url", "origin", url, git_dir=path)
+        return True
+    os.makedirs(path, exist_ok=True)
+    git("init", "--bare", "--quiet", path)
+    git("remote", "add", "origin", url, git_dir=path)
+    # Mark origin as promisor so blobs missing locally can be fetched later
+    git("config", "remote.origin.promisor", "true", git_dir=path)
+    git("config", "remote.origin.partialclonefilter", "blob:none", git_dir=path)
+    git("config", "extensions.partialClone", "origin", git_dir=path)
+    git("config", "gc.auto", "0", git_dir=path)
+    return False
+
+def has_commit(path: str, rev: str) -> bool:
+    # rev-list --missing disables lazy fetching (cat-file -e would fetch from the promisor remote)
+    return git("rev-list", "--no-walk", "--missing=allow-any", f"{rev}^{{commit}}", "--",
+               git_dir=path, check=False).returncode == 0
+
+# =========================
+# RESOLVE + FETCH
+# =========================
+def resolve_ref(url: str, ref: str):
+    """
+    (sha, kind) for a ref. Branches and tags are resolved with ls-remote
+    (annotated tags peeled to their commit); anything else that looks like a
+    hex SHA is returned as-is with kind "commit". Returns (None, None) otherwise.
+    """
+    out = git("ls-remote", url, f"refs/heads/{ref}", f"refs/tags/{ref}", f"refs/tags/{ref}^{{}}").stdout
+    refs = dict(reversed(line.split("\t", 1)) for line in out.splitlines() if "\t" in line)
+    for name, kind in ((f"refs/heads/{ref}", "branch"), (f"refs/tags/{ref}^{{}}", "tag"), (f"refs/tags/{ref}", "tag")):
+        if name in refs:
+            return refs[name], kind
+    if SHA_RE.match(ref):
+        return ref.lower(), "commit"
+    return None, None
+
+def fetch_commit(path: str, sha: str) -> str:
+    """Make `sha` (full or abbreviated) available in the mirror; returns the full SHA."""
+    if has_commit(path, sha):
+        log(f"✅ {sha[:12]} already in mirror – no commit fetch needed")
+        return git("rev-parse", f"{sha}^{{commit}}", git_dir=path).stdout.strip()
+    if len(sha) == 40:
+        log(f"⬇️ Fetching {sha[:12]} (depth 1, blobless)...")
+        r = git("fetch", "--quiet", "--no-tags", "--depth", "1", "--filter=blob:none", "origin", sha,
+                git_dir=path, check=False)
+        if r.returncode == 0 and has_commit(path, sha):
+            return sha
+        log(f"ℹ️ Server refused a direct SHA fetch ({r.stderr.strip().splitlines()[-1:] or ['?']}); fetching history")
+    # Abbreviated SHA, or a server without SHA wants: history without file contents
+    log("⬇️ Fetching branches and tags (blobless)...")
+    # Earlier depth-1 fetches leave the mirror shallow; older commits are only reachable after unshallowing
+    shallow = git("rev-parse", "--is-shallow-repository", git_dir=path).stdout.strip() == "true"
+    r = git("fetch", "--quiet", "--prune", "--filter=blob:none", *(["--unshallow"] if shallow else []), "origin",
+            "+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*", git_dir=path, check=False)
+    if not has_commit(path, sha):
+        raise RuntimeError(f"Commit {sha} not found in {git('remote', 'get-url', 'origin', git_dir=path).stdout.strip()}"
+                           + (f": {r.stderr.strip()}" if r.returncode else ""))
+    return git("rev-parse", f"{sha}^{{commit}}", git_dir=path).stdout.strip()
+
+def _missing_from_tree(path: str, sha: str) -> list:
+    """Blob ids of the tree at `sha` not present in the mirror (listed without triggering lazy fetches)."""
+    out = git("rev-list", "--objects", "--no-walk", "--missing=print", sha, git_dir=path).stdout
+    return [line[1:].split()[0] for line in out.splitlines() if line.startswith("?")]
+
+def fetch_blobs(path: str, sha: str) -> int:
+    """Fetch every blob of the tree at `sha` the mirror lacks in one request; returns how many."""
+    missing = _missing_from_tree(path, sha)
+    if missing:
+        log(f"⬇️ Fetching {len(missing)} missing file blobs...")
+        # Same command git uses for lazy fetches, but batched for the whole tree
+        git("-c", "fetch.negotiationAlgorithm=noop", "fetch", "--quiet", "origin", "--no-tags",
+            "--no-write-fetch-head", "--recurse-submodules=no", "--filter=blob:none", "--stdin",
+            input="\n".join(missing) + "\n", git_dir=path)
+    else:
+        log("✅ All file blobs already in mirror")
+    return len(missing)
+
+# =========================
+# EXPORT
+# =========================
+def export_dir(path: str, sha: str, out_dir: str):
+    """Every file of the tree at `sha` written into out_dir (sharded workflow)."""
+    os.makedirs(out_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Scratch index: the mirror's own state is left alone
+        env = {"GIT_INDEX_FILE": os.path.join(tmp, "index")}
+        git("read-tree", sha, git_dir=path, env=env)
+        git("--work-tree", os.path.abspath(out_dir), "checkout-index", "--all", "--force", git_dir=path, env=env)
+
+def export_tar(path: str, sha: str, out_tar: str):
+    """Tree at `sha` as .tar.gz (no .git, no leading directory) – what FOSSology uploads."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = os.path.join(tmp, "tree")
+        export_dir(path, sha, tree)
+        with tarfile.open(out_tar, "w:gz") as tar:
+            for name in sorted(os.listdir(tree)):
+                tar.add(os.path.join(tree, name), arcname=name)
+
+def fetch(url: str, ref: str, cache_root: str, out_tar: str = "", out_dir: str = "") -> dict:
+    ref = (ref or "main").strip()
+    t0 = time.time()
+    sha, kind = resolve_ref(url, ref)
+    if sha is None:
+        raise RuntimeError(f"Ref '{ref}' is not a branch, tag or commit of {url}")
+    path = mirror_path(cache_root, url)
+    cached = ensure_mirror(path, url)
+    log(f"📂 {'Reusing' if cached else 'Creating'} mirror {path} ({kind} {ref} → {sha[:12]})")
+    commit_cached = cached and has_commit(path, sha)
+    sha = fetch_commit(path, sha)
+    blobs = fetch_blobs(path, sha)
+    if out_tar:
+        export_tar(path, sha, out_tar)
+    if out_dir:
+        export_dir(path, sha, out_dir)
+    # Keep the mirror from growing without bound (loose objects from many small fetches)
+    git("-c", "gc.auto=6700", "gc", "--auto", "--quiet", git_dir=path, check=False)
+    return {"url": url, "ref": ref, "kind": kind, "sha": sha, "mirror": path, "mirror_reused": cached,
+            "blobs_fetched": blobs, "changed": not commit_cached or blobs > 0,
+            "seconds": round(time.time() - t0, 1)}
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    fp = sub.add_parser("fetch", help="update the cached mirror and export the tree at a ref")
+    fp.add_argument("--url", required=True)
+    fp.add_argument("--ref", default="main")
+    fp.add_argument("--cache", default=os.path.expanduser("~/.cache/fossology-mirrors"))
+    fp.add_argument("--tar", default="", help="write the tree as .tar.gz")
+    fp.add_argument("--dir", default="", help="extract the tree into this directory")
+
+    args = ap.parse_args(argv)
+    try:
+        info = fetch(args.url, args.ref, args.cache, args.tar, args.dir)
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        detail = getattr(e, "stderr", "") or ""
+        print(f"❌ {e}{(': ' + detail.strip()) if detail else ''}", file=sys.stderr)
+        return 1
+    print(json.dumps(info, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+"""
+Runner-capacity-aware dispatch scheduler for the Streamlit runner (stdlib only).
+
+- DurationModel: historical run durations per scan_type (and input size when
+  known) -> expected duration of a new run.
+- DispatchScheduler: process-wide priority queue in front of workflow
+  dispatch. It tracks queued/in-progress runs of the scan workflows, holds new
+  dispatches while `capacity` runs are active and releases them highest
+  priority first (FIFO within a priority) from a background thread.
+- DispatchScheduler.plan(): list-scheduling estimate of start/finish times for
+  active runs and held dispatches (the ETA shown in Results).
+- Supersede: a dispatch submitted with supersede=True drops the same owner's
+  older held entries for the same input (`input_key`: file digest, repo URL +
+  commit, image digest, ...) and cancels the queued / in-progress runs those
+  entries dispatched, freeing their runner slots. Runs are matched to entries
+  by a dispatch id the workflows put in the run title (`dispatch_id_input`);
+  other owners' runs and runs of other inputs sharing a tag are never touched.
+
+The GitHub calls are injected (`dispatch(inputs)`, `list_runs(status)`,
+optional `cancel_run(run_id)`), so the scheduler works against the real API,
+GitHub Enterprise or a stand-in.
+"""
+import heapq
+import itertools
+import math
+import statistics
+import threading
+import time
+import uuid
+from datetime import datetime
+
+PRIORITIES = {"high": 2, "normal": 1, "low": 0}
+DEFAULT_DURATION_S = 15 * 60
+
+def parse_ts(value):
+    """GitHub ISO timestamp -> epoch seconds (None when missing)."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+def run_title_fields(run: dict):
+    """(scan_type, input_tag) from a run titled `fossology <scan_type> <tag> [<dispatch id>]`."""
+    parts = (run.get("display_title") or "").split()
+    if len(parts) >= 3 and parts[0].lower() == "fossology":
+        return parts[1], parts[2]
+    return "", ""
+
+def run_dispatch_id(run: dict) -> str:
+    """Dispatch id from a run titled `fossology <scan_type> <tag> <dispatch id>` ('' when absent)."""
+    parts = (run.get("display_title") or "").split()
+    if len(parts) >= 4 and parts[0].lower() == "fossology":
+        return parts[3]
+    return ""
+
+class DurationModel:
+    """Median of the k most similar past runs (same scan_type, closest input size)."""
+
+    def __init__(self, default_s: float = DEFAULT_DURATION_S, k: int = 5, max_samples: int = 500):
+        self.default_s = default_s
+        self.k = k
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples = {}  # key -> (scan_type, size or None, duration_s)
+
+    def add(self, scan_type: str, size, duration_s: float, key=None):
+        if duration_s <= 0:
+            return
+        with self._lock:
+            self._samples[key if key is not None else len(self._samples)] = (scan_type, size, duration_s)
+            while len(self._samples) > self.max_samples:
+                self._samples.pop(next(iter(self._samples)))
+
+    def __len__(self):
+        return len(self._samples)
+
+    def estimate(self, scan_type: str, size=None) -> float:
+        with self._lock:
+            samples = list(self._samples.values())
+        same = [s for s in samples if s[0] == scan_type]
+        sized = [s for s in same if s[1]]
+        if size and sized:
+            sized.sort(key=lambda s: abs(math.log(s[1]) - math.log(size)))
+            return statistics.median(s[2] for s in sized[:self.k])
+        if same:
+            return statistics.median(s[2] for s in same)
+        if samples:
+            return statistics.median(s[2] for s in samples)
+        return self.default_s
+
+class DispatchScheduler:
+    def __init__(self, dispatch, list_runs, capacity: int, workflows=(), poll_s: float = 20.0,
+                 refresh_s: float = 10.0, history_s: float = 300.0, settle_s: float = 120.0, model=None,
+                 cancel_run=None, dispatch_id_input: str = ""):
+        """
+        `dispatch_id_input`: workflow input that carries each entry's dispatch
+        id into the run title; without it runs cannot be told apart and
+        supersede only drops held entries.
+        """
+        self.dispatch = dispatch
+        self.list_runs = list_runs
+        self.cancel_run = cancel_run
+        self.dispatch_id_input = dispatch_id_input
+        self.capacity = max(1, int(capacity))
+        self.workflows = {f".github/workflows/{w}" for w in workflows}
+        self.poll_s = poll_s
+        self.refresh_s = refresh_s
+        self.history_s = history_s
+        self.settle_s = settle_s
+        self.model = model or DurationModel()
+        self._lock = threading.RLock()  # never held across GitHub calls (incl. cancels); re-entered by cancel()/occupancy()
+        self._seq = itertools.count(1)
+        self._heap = []        # (-priority, entry_id): entry ids grow, so FIFO within a priority
+        self.entries = {}      # entry_id -> entry dict (held, dispatched, failed, cancelled)
+        self._sizes = {}       # input tag -> input size in bytes (for history samples)
+        self._runs = []        # last snapshot of active tracked runs
+        self._supersede = {}   # (owner, input_key) -> entry_id of the newest dispatch for that input
+        self._cancelled = {}   # run_id -> cancel time (cancelled runs stay "active" on GitHub for a while)
+        self._cancelling = set()  # run ids with a cancel request in flight
+        self._refreshed = 0.0  # last fetch started
+        self._snapshot_at = 0.0  # start of the fetch behind self._runs
+        self._history_at = 0.0
+        self._worker = None
+
+    # ---- run tracking ----
+    def _tracked(self, run: dict) -> bool:
+        return not self.workflows or run.get("path", "").split("@", 1)[0] in self.workflows
+
+    def refresh(self, force: bool = False) -> list:
+        """
+        Active (queued + in_progress) tracked runs, re-fetched at most every
+        refresh_s. GitHub is asked without holding the lock; the new snapshot
+        is swapped in under it (unless a newer fetch got there first), and
+        superseded runs are cancelled after it is released.
+        """
+        now = time.time()
+        with self._lock:
+            fetch = force or now - self._refreshed >= self.refresh_s
+            learn = now - self._history_at >= self.history_s
+            if fetch:
+                self._refreshed = now  # concurrent callers keep using the current snapshot
+            if learn:
+                self._history_at = now
+        doomed = []
+        if fetch:
+            runs = []
+            for status in ("in_progress", "queued"):
+                runs.extend(r for r in self.list_runs(status) if self._tracked(r))
+            with self._lock:
+                if now >= self._snapshot_at:
+                    self._cancelled = {i: t for i, t in self._cancelled.items() if now - t < self.settle_s}
+                    runs = [r for r in runs if r.get("id") not in self._cancelled]
+                    self._runs, self._snapshot_at = runs, now
+                    doomed = self._superseded_runs(runs, now)
+                    tags = {run_title_fields(r)[1] for r in runs}
+                    for e in self.entries.values():
+                        if e["status"] == "dispatched" and e["tag"] in tags:
+                            e["seen"] = True
+        for run_id, entry in doomed:
+            cancelled = self.cancel_run_id(run_id)
+            with self._lock:
+                self._cancelling.discard(run_id)
+                if cancelled:
+                    entry["superseded_runs"].append(run_id)
+        if learn:
+            self.learn(self.list_runs("completed"))
+        with self._lock:
+            return list(self._runs)
+
+    def learn(self, runs: list):
+        """Feed finished, successful tracked runs into the duration model."""
+        for r in runs:
+            if not self._tracked(r) or r.get("conclusion") != "success":
+                continue
+            start, end = parse_ts(r.get("run_started_at")), parse_ts(r.get("updated_at"))
+            if start and end:
+                scan_type, tag = run_title_fields(r)
+                self.model.add(scan_type, self._sizes.get(tag), end - start, key=r.get("id"))
+
+    # ---- supersede / cancel ----
+    def cancel_run_id(self, run_id: int) -> bool:
+        """Cancel a queued / in-progress run; its slot counts as free right away."""
+        if self.cancel_run is None:
+            return False
+        r = self.cancel_run(run_id)
+        if r is None or r.status_code not in (202, 204):
+            return False
+        with self._lock:
+            self._cancelled[run_id] = time.time()
+            self._runs = [run for run in self._runs if run.get("id") != run_id]
+        return True
+
+    def _superseded_runs(self, runs: list, now: float) -> list:
+        """
+        (run_id, newest entry) for runs dispatched by an older entry of the same
+        owner and input; the caller holds the lock and cancels them after
+        releasing it. Armed until `settle_s` after the newest dispatch, so runs
+        of older dispatches that show up late are caught too.
+        """
+        by_dispatch = {e["dispatch_id"]: e for e in self.entries.values()}
+        doomed = []
+        for key, entry_id in list(self._supersede.items()):
+            entry = self.entries.get(entry_id)
+            if (not entry or entry["status"] in ("failed", "cancelled")
+                    or (entry["status"] == "dispatched" and now - entry["dispatched_at"] > self.settle_s)):
+                del self._supersede[key]
+                continue
+            for r in runs:
+                source = by_dispatch.get(run_dispatch_id(r))
+                if (source and source["id"] < entry_id and (source["owner"], source["input_key"]) == key
+                        and r["id"] not in self._cancelling):
+                    self._cancelling.add(r["id"])
+                    doomed.append((r["id"], entry))
+        return doomed
+
+    def _unseen_launches(self) -> int:
+        """Entries being dispatched or recently dispatched but not shown up as runs yet (still count as busy)."""
+        now = time.time()
+        return sum(1 for e in self.entries.values()
+                   if e["status"] == "dispatching"
+                   or (e["status"] == "dispatched" and not e["seen"] and now - e["dispatched_at"] < self.settle_s))
+
+    def occupancy(self, runs=None) -> int:
+        with self._lock:
+            return len(self._runs if runs is None else runs) + self._unseen_launches()
+
+    # ---- queue ----
+    def submit(self, inputs: dict, scan_type: str, tag: str, size=None, priority: int = 1, owner: str = "",
+               supersede: bool = False, input_key: str = "") -> dict:
+        """
+        Queue a dispatch and release whatever fits right away; returns the entry.
+        With supersede (and an `input_key`), the same owner's older held entries
+        and active runs for that input are cancelled.
+        """
+        entry = {
+            "id": next(self._seq), "inputs": dict(inputs), "scan_type": scan_type, "tag": tag,
+            "size": size, "priority": priority, "owner": owner, "input_key": input_key,
+            "dispatch_id": uuid.uuid4().hex[:12], "submitted_at": time.time(),
+            "status": "held", "dispatched_at": None, "seen": False, "error": "",
+            "superseded_by": None, "superseded_runs": [],
+        }
+        if self.dispatch_id_input:
+            entry["inputs"][self.dispatch_id_input] = entry["dispatch_id"]
+        with self._lock:
+            # Forget settled entries after a day so a long-lived app does not grow
+            for old in [i for i, e in self.entries.items()
+                        if e["status"] != "held" and entry["submitted_at"] - e["submitted_at"] > 86400]:
+                del self.entries[old]
+            if supersede and input_key:
+                for old in [e for e in self.entries.values()
+                            if e["status"] == "held" and (e["owner"], e["input_key"]) == (owner, input_key)]:
+                    if self.cancel(old["id"]):
+                        old["superseded_by"] = entry["id"]
+                if self.cancel_run is not None and self.dispatch_id_input:
+                    self._supersede[(owner, input_key)] = entry["id"]
+            self.entries[entry["id"]] = entry
+            heapq.heappush(self._heap, (-priority, entry["id"]))
+            if size:
+                self._sizes[tag] = size
+        self.pump(force=True)
+        self._ensure_worker()
+        return entry
+
+    def cancel(self, entry_id: int) -> bool:
+        """Drop a held entry (no-op once dispatched)."""
+        with self._lock:
+            entry = self.entries.get(entry_id)
+            if not entry or entry["status"] != "held":
+                return False
+            entry["status"] = "cancelled"
+            self._heap = [h for h in self._heap if h[1] != entry_id]
+            heapq.heapify(self._heap)
+            return True
+
+    def held(self) -> list:
+        """Held entries in release order."""
+        with self._lock:
+            return [self.entries[i] for _, i in sorted(self._heap)]
+
+    def pump(self, force: bool = False) -> list:
+        """Dispatch held entries while runner capacity is free; returns the released entries."""
+        released = []
+        while True:
+            with self._lock:
+                if not self._heap:
+                    break
+            self.refresh(force=force and not released)
+            with self._lock:
+                # Entries still "dispatching" (e.g. from a concurrent pump) count as busy
+                if not self._heap or self.occupancy() >= self.capacity:
+                    break
+                entry = self.entries[heapq.heappop(self._heap)[1]]
+                entry["status"] = "dispatching"
+            r = self.dispatch(entry["inputs"])
+            with self._lock:
+                if r is not None and r.status_code in (201, 204):
+                    entry.update(status="dispatched", dispatched_at=time.time())
+                else:
+                    entry.update(status="failed", error=f"{getattr(r, 'status_code', '')} {getattr(r, 'text', '')}".strip())
+            released.append(entry)
+        return released
+
+    def _ensure_worker(self):
+        with self._lock:
+            if not (self._heap or self._supersede) or (self._worker and self._worker.is_alive()):
+                return
+            self._worker = threading.Thread(target=self._work, name="dispatch-scheduler", daemon=True)
+            self._worker.start()
+
+    def _work(self):
+        while True:
+            time.sleep(self.poll_s)
+            try:
+                self.pump(force=True)
+                if self._supersede:
+                    self.refresh()  # runs of superseded dispatches can show up late
+            except Exception:  # keep the queue alive across transient API errors
+                pass
+            with self._lock:
+                if not self._heap and not self._supersede:
+                    return
+
+    # ---- ETA ----
+    def plan(self, now=None) -> list:
+        """
+        Estimated start/finish per active run and held entry, using the last
+        run snapshot: running jobs free their slot after their expected duration,
+        GitHub-queued runs start first (oldest first), then held entries in
+        release order. `owner` is the submitting owner of the row's entry
+        ("" for runs this scheduler did not dispatch).
+        """
+        now = now or time.time()
+        with self._lock:  # the worker thread swaps these; plan on a copy
+            active, held, sizes = list(self._runs), self.held(), dict(self._sizes)
+            owners = {e["dispatch_id"]: e["owner"] for e in self.entries.values()}
+        rows, slots = [], []
+        for r in [r for r in active if r.get("status") == "in_progress"]:
+            scan_type, tag = run_title_fields(r)
+            start = parse_ts(r.get("run_started_at")) or now
+            finish = max(start + self.model.estimate(scan_type, sizes.get(tag)), now + 30)
+            rows.append({"kind": "running", "tag": tag, "title": r.get("display_title", ""),
+                         "run_id": r.get("id"), "owner": owners.get(run_dispatch_id(r), ""),
+                         "start": start, "finish": finish})
+            heapq.heappush(slots, finish)
+        while len(slots) < self.capacity:
+            heapq.heappush(slots, now)
+
+        waiting = sorted((r for r in active if r.get("status") != "in_progress"),
+                         key=lambda r: r.get("created_at") or "")
+        for r in waiting:
+            scan_type, tag = run_title_fields(r)
+            start = heapq.heappop(slots)
+            finish = start + self.model.estimate(scan_type, sizes.get(tag))
+            rows.append({"kind": "queued", "tag": tag, "title": r.get("display_title", ""),
+                         "run_id": r.get("id"), "owner": owners.get(run_dispatch_id(r), ""),
+                         "start": start, "finish": finish})
+            heapq.heappush(slots, finish)
+        for position, e in enumerate(held, start=1):
+            start = heapq.heappop(slots)
+            finish = start + self.model.estimate(e["scan_type"], e["size"])
+            rows.append({"kind": "held", "tag": e["tag"], "title": f"fossology {e['scan_type']} {e['tag']}",
+                         "entry_id": e["id"], "owner": e["owner"], "position": position, "priority": e["priority"],
+                         "start": start, "finish": finish})
+            heapq.heappush(slots, finish)
+        return rows
+
+    def eta_for(self, tag: str, now=None):
+        """Plan row for an input tag (held entries first, then the newest matching run)."""
+        rows = self.plan(now)
+        for kind in ("held", "queued", "running"):
+            for row in rows:
+                if row["kind"] == kind and tag and (row["tag"] == tag or tag in row["title"]):
+                    return row
+        return None
@@ -0,0 +1,361 @@
+"""
+Shard helpers for the sharded FOSSology workflow (fossology_sharded.yml).
+
+  split  – distribute the files of a prepared input tree into N balanced
+           shard tarballs (by total size or by file count).
+  merge  – combine the per-shard `fossology_reports/` folders into a single
+           folder with the usual file names (CSV, JSON, SPDX 2 and text reports).
+
+Both commands only need the Python standard library so they run on a bare
+runner and can be exercised locally against fixture outputs:
+
+  python3 fossology_shard.py split --src tree --shards 4 --by size --out shards
+  python3 fossology_shard.py merge --out fossology_reports shard_reports/*
+"""
+import argparse
+import csv
+import hashlib
+import heapq
+import io
+import json
+import os
+import re
+import sys
+import tarfile
+
+# =========================
+# SPLIT
+# =========================
+def list_files(src: str):
+    """Yield (relative_path, size) for every regular file under src."""
+    for root, dirs, files in os.walk(src):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            if os.path.islink(full) or not os.path.isfile(full):
+                continue
+            yield os.path.relpath(full, src), os.path.getsize(full)
+
+def plan_shards(files: list, shards: int, by: str = "size") -> list:
+    """
+    Greedy longest-first assignment of files to `shards` buckets.
+    Returns a list of {"files": [...], "bytes": int} (empty buckets dropped).
+    - by="size": balance total bytes per shard
+    - by="count": balance number of files per shard
+    """
+    shards = max(1, int(shards))
+    weight = (lambda f: f[1]) if by == "size" else (lambda f: 1)
+    buckets = [{"files": [], "bytes": 0} for _ in range(shards)]
+    heap = [(0, i) for i in range(shards)]
+    for path, size in sorted(files, key=lambda f: (-weight(f), f[0])):
+        load, i = heapq.heappop(heap)
+        buckets[i]["files"].append(path)
+        buckets[i]["bytes"] += size
+        heapq.heappush(heap, (load + weight((path, size)), i))
+    return [b for b in buckets if b["files"]]
+
+def write_shards(src: str, plan: list, out_dir: str) -> list:
+    """Write shard_<k>.tar.gz files (paths relative to src) and return their names."""
+    os.makedirs(out_dir, exist_ok=True)
+    names = []
+    for k, bucket in enumerate(plan):
+        name = f"shard_{k}.tar.gz"
+        with tarfile.open(os.path.join(out_dir, name), "w:gz") as tar:
+            for rel in sorted(bucket["files"]):
+                tar.add(os.path.join(src, rel), arcname=rel, recursive=False)
+        names.append(name)
+    return names
+
+def split(src: str, shards: int, by: str, out_dir: str) -> dict:
+    plan = plan_shards(list(list_files(src)), shards, by)
+    names = write_shards(src, plan, out_dir)
+    manifest = {
+        "by": by,
+        "count": len(names),
+        "shards": [
+            {"index": k, "file": n, "files": len(b["files"]), "bytes": b["bytes"]}
+            for k, (n, b) in enumerate(zip(names, plan))
+        ],
+    }
+    with open(os.path.join(out_dir, "shards.json"), "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
+
+# =========================
+# MERGE – CSV / JSON
+# =========================
+UPLOAD_ID_RE = re.compile(r"^uploads_\d+_")
+
+def merge_key(filename: str) -> str:
+    """Shards run on separate FOSSology instances, so upload ids may differ."""
+    return UPLOAD_ID_RE.sub("uploads_", filename)
+
+def _tostring(v) -> str:
+    # jq's `tostring`: strings as-is, everything else as compact JSON
+    return v if isinstance(v, str) else json.dumps(v, separators=(",", ":"), ensure_ascii=False)
+
+def _flatten(v) -> dict:
+    if isinstance(v, dict):
+        return {k: _tostring(v[k]) for k in sorted(v)}
+    if isinstance(v, list):
+        return {str(i): _tostring(x) for i, x in enumerate(v)}
+    return {"value": _tostring(v)}
+
+def _csv_field(v) -> str:
+    # jq's @csv: strings double-quoted, missing (null) cells left empty
+    return "" if v is None else '"' + v.replace('"', '""') + '"'
+
+def json_to_csv(data) -> str:
+    """Python port of the workflow's generic jq flattener (same columns & quoting)."""
+    rows = data if isinstance(data, list) else [data]
+    if not rows:
+        return ""
+    cols = list(_flatten(rows[0]).keys())
+    lines = [",".join(_csv_field(c) for c in cols)]
+    for row in rows:
+        flat = _flatten(row)
+        lines.append(",".join(_csv_field(flat.get(c)) for c in cols))
+    return "\n".join(lines) + "\n"
+
+# Upload summary (/uploads/{id}/summary): only per-file counts add up across
+# shards; distinct counts are recomputed from the merged licenses when present
+SUMMARY_SUM = ("totalLicenses", "totalConcludedLicenses", "filesToBeCleared", "filesCleared",
+               "copyrightCount")
+SUMMARY_DISTINCT = ("uniqueLicenses", "uniqueConcludedLicenses")
+SUMMARY_DROP = ("id", "uploadId", "uploadName")   # identify one shard's upload, not the input
+NO_LICENSE = ("No_license_found", "Void", "NOASSERTION")
+
+def _is_number(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+def merge_json(docs: list):
+    """
+    Arrays are concatenated. Objects (the upload summary) keep the first
+    shard's descriptive fields, sum the additive counts and drop the shard's
+    upload identifiers and distinct counts (see `summary_distinct`).
+    """
+    docs = [d for d in docs if d is not None]
+    if not docs:
+        return None
+    if all(isinstance(d, list) for d in docs):
+        return [x for d in docs for x in d]
+    if all(isinstance(d, dict) for d in docs):
+        if len(docs) == 1:
+            return docs[0]
+        merged = {}
+        for d in docs:
+            for k, v in d.items():
+                if k in SUMMARY_DROP or k in SUMMARY_DISTINCT:
+                    continue
+                if k not in merged:
+                    merged[k] = v
+                elif k in SUMMARY_SUM and _is_number(v) and _is_number(merged[k]):
+                    merged[k] += v
+        return merged
+    return docs
+
+def summary_distinct(licenses) -> dict:
+    """uniqueLicenses / uniqueConcludedLicenses from a merged /uploads/{id}/licenses list."""
+    found, concluded = set(), set()
+    for item in licenses if isinstance(licenses, list) else []:
+        findings = (item or {}).get("findings") or {}
+        found.update(x for x in findings.get("scanner") or [] if x and x not in NO_LICENSE)
+        concluded.update(x for x in findings.get("conclusion") or [] if x and x not in NO_LICENSE)
+    return {"uniqueLicenses": len(found), "uniqueConcludedLicenses": len(concluded)}
+
+def merge_csv(texts: list) -> str:
+    """Concatenate CSVs, taking the union of their headers (first-seen order)."""
+    cols, rows = [], []
+    for text in texts:
+        reader = csv.DictReader(io.StringIO(text))
+        for c in reader.fieldnames or []:
+            if c not in cols:
+                cols.append(c)
+        rows.extend(reader)
+    if not cols:
+        return ""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=cols, quoting=csv.QUOTE_ALL, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue()
+
+# =========================
+# MERGE – SPDX 2 tag-value
+# =========================
+SPDXREF_RE = re.compile(r"SPDXRef-[A-Za-z0-9.\-]+")
+
+def spdx_sections(text: str):
+    """Split a tag-value document into (header_lines, file_blocks, license_blocks)."""
+    header, files, licenses = [], [], []
+    current = header
+    in_text = False
+    for line in text.splitlines():
+        if not in_text:
+            if line.startswith("FileName:"):
+                current = []
+                files.append(current)
+            elif line.startswith("LicenseID:"):
+                current = []
+                licenses.append(current)
+        current.append(line)
+        # <text>...</text> values may span lines and contain tag-like lines
+        if "<text>" in line and "</text>" not in line.split("<text>", 1)[1]:
+            in_text = True
+        elif in_text and "</text>" in line:
+            in_text = False
+    return header, files, licenses
+
+def verification_code(file_blocks: list) -> str:
+    """SPDX 2 package verification code: SHA1 over the sorted file SHA1s ("" if one is missing)."""
+    sums = []
+    for block in file_blocks:
+        sha1 = next((l.split(":", 2)[2].strip().lower() for l in block
+                     if l.startswith("FileChecksum:") and l.split(":", 2)[1].strip() == "SHA1"), "")
+        if not sha1:
+            return ""
+        sums.append(sha1)
+    return hashlib.sha1("".join(sorted(sums)).encode()).hexdigest()
+
+def merge_spdx(texts: list) -> str:
+    """
+    Keep the document/package header of the first shard, append the file
+    sections of every shard and de-duplicate extracted licenses by LicenseID.
+    File SPDXIDs of shards > 0 are prefixed so they stay unique. The package
+    verification code is recomputed over the merged files (dropped when a
+    file has no SHA1 checksum).
+    """
+    if not texts:
+        return ""
+    header, all_files, licenses, seen_ids, seen_pkg_info = None, [], [], set(), set()
+    for k, text in enumerate(texts):
+        h, files, lics = spdx_sections(text)
+        if header is None:
+            header = list(h)
+            seen_pkg_info = {l for l in h if l.startswith("PackageLicenseInfoFromFiles:")}
+        else:
+            for line in h:
+                if line.startswith("PackageLicenseInfoFromFiles:") and line not in seen_pkg_info:
+                    seen_pkg_info.add(line)
+                    last = max((i for i, l in enumerate(header)
+                                if l.startswith("PackageLicenseInfoFromFiles:")), default=len(header) - 1)
+                    header.insert(last + 1, line)
+        if k > 0:
+            file_ids = {l.split(":", 1)[1].strip() for b in files for l in b if l.startswith("SPDXID:")}
+            rename = lambda m: f"SPDXRef-shard{k}-{m.group(0)[8:]}" if m.group(0) in file_ids else m.group(0)
+            files = [[SPDXREF_RE.sub(rename, l) for l in b] for b in files]
+        all_files.extend(files)
+        for block in lics:
+            lic_id = block[0].split(":", 1)[1].strip()
+            if lic_id not in seen_ids:
+                seen_ids.add(lic_id)
+                licenses.append(block)
+    code = verification_code(all_files)
+    out = [(f"PackageVerificationCode: {code}" if l.startswith("PackageVerificationCode:") else l)
+           for l in header if code or not l.startswith("PackageVerificationCode:")]
+    for block in all_files + licenses:
+        out.extend(block)
+    return "\n".join(out) + "\n"
+
+def merge_text(texts: list, unique_lines: bool = False) -> str:
+    """Plain-text reports: union of lines for lists, shard-delimited concat otherwise."""
+    if unique_lines:
+        seen, out = set(), []
+        for text in texts:
+            for line in text.splitlines():
+                if line not in seen:
+                    seen.add(line)
+                    out.append(line)
+        return "\n".join(out) + "\n"
+    parts = []
+    for k, text in enumerate(texts):
+        parts.append(f"===== shard {k} =====\n{text.rstrip()}\n")
+    return "\n".join(parts)
+
+# =========================
+# MERGE – folders
+# =========================
+def _reports_dir(path: str) -> str:
+    nested = os.path.join(path, "fossology_reports")
+    return nested if os.path.isdir(nested) else path
+
+def _read(path: str) -> str:
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        return fh.read()
+
+def _load_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+def merge(shard_dirs: list, out_dir: str) -> list:
+    """Merge every shard's reports into out_dir; returns the written file names."""
+    groups = {}
+    for shard in sorted(shard_dirs):
+        rdir = _reports_dir(shard)
+        for name in sorted(os.listdir(rdir)):
+            groups.setdefault(merge_key(name), []).append(os.path.join(rdir, name))
+
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    json_stems = {os.path.splitext(k)[0] for k in groups if k.endswith(".json")}
+    licenses_key = next((k for k in sorted(groups) if k.startswith("uploads_licenses") and k.endswith(".json")), None)
+    for key, paths in sorted(groups.items()):
+        name = os.path.basename(paths[0])
+        stem, ext = os.path.splitext(key)
+        target = os.path.join(out_dir, name)
+        if ext == ".json":
+            merged = merge_json([_load_json(p) for p in paths])
+            if key.startswith("uploads_summary") and isinstance(merged, dict) and len(paths) > 1 and licenses_key:
+                merged.update(summary_distinct(merge_json([_load_json(p) for p in groups[licenses_key]])))
+            with open(target, "w") as fh:
+                json.dump(merged, fh)
+            # Re-flatten from the merged JSON so CSV and JSON agree
+            csv_name = os.path.splitext(name)[0] + ".csv"
+            with open(os.path.join(out_dir, csv_name), "w") as fh:
+                fh.write(json_to_csv(merged) if merged is not None else "")
+            written += [name, csv_name]
+            continue
+        if ext == ".csv":
+            if stem in json_stems:
+                continue
+            content = merge_csv([_read(p) for p in paths])
+        elif ext == ".spdx2":
+            content = merge_spdx([_read(p) for p in paths])
+        else:
+            content = merge_text([_read(p) for p in paths], unique_lines=(ext == ".license_list"))
+        with open(target, "w") as fh:
+            fh.write(content)
+        written.append(name)
+    return written
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("split", help="split a prepared input tree into shard tarballs")
+    sp.add_argument("--src", required=True)
+    sp.add_argument("--shards", type=int, default=4)
+    sp.add_argument("--by", choices=["size", "count"], default="size")
+    sp.add_argument("--out", default="shards")
+
+    mp = sub.add_parser("merge", help="merge per-shard fossology_reports folders")
+    mp.add_argument("--out", default="fossology_reports")
+    mp.add_argument("shard_dirs", nargs="+")
+
+    args = ap.parse_args(argv)
+    if args.cmd == "split":
+        manifest = split(args.src, args.shards, args.by, args.out)
+        print(json.dumps(manifest, indent=2))
+    else:
+        for name in merge(args.shard_dirs, args.out):
+            print(name)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
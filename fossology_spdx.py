@@ -0,0 +1,369 @@
+"""
+Streaming reader + index for the workflow's SPDX 2 tag-value report
+(`report_spdx2_<TAG>_<TS>.spdx2`).
+
+- iter_file_records(): parses the report line by line and yields one compact
+  record per `FileName:` section; memory does not grow with report size.
+- SpdxIndex: SQLite-backed index (on disk or in memory) by license and path.
+  It can be filled in a background thread and queried with keyset pagination
+  while indexing is still running, so the first page is available as soon
+  as the first batch of files is indexed. Once complete, the file total and
+  per-license counts are read from `meta` instead of being recounted.
+- SpdxIndexStore: one index file per artifact in a directory, at most
+  `max_entries` open (least recently used are closed and deleted) and
+  dropped when their artifact expires.
+"""
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+
+FILE_TAGS = {
+    "SPDXID": "spdx_id",
+    "LicenseConcluded": "concluded",
+    "LicenseInfoInFile": "licenses",
+    "FileCopyrightText": "copyright",
+}
+COPYRIGHT_MAX = 200
+BATCH_SIZE = 2000
+
+# Tokens in an SPDX license expression that are not license ids
+_EXPR_SPLIT_RE = re.compile(r"[\s()]+")
+_EXPR_OPERATORS = {"AND", "OR", "WITH", ""}
+
+def license_ids(expression: str) -> list:
+    """'(MIT OR Apache-2.0) AND BSD-3-Clause' -> ['MIT', 'Apache-2.0', 'BSD-3-Clause']"""
+    return [t for t in _EXPR_SPLIT_RE.split(expression or "") if t not in _EXPR_OPERATORS]
+
+# =========================
+# STREAMING PARSER
+# =========================
+def _new_record(path: str) -> dict:
+    return {"path": path, "spdx_id": "", "concluded": "", "licenses": [], "copyright": ""}
+
+def iter_file_records(lines):
+    """
+    Yield {"path", "spdx_id", "concluded", "licenses", "copyright"} per file
+    section. `lines` is any iterable of str (e.g. an open text file).
+    Multi-line <text>...</text> values are consumed without buffering more
+    than COPYRIGHT_MAX characters of them.
+    """
+    record = None
+    text_tag, text_buf = None, ""
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if text_tag:
+            end = line.find("</text>")
+            if len(text_buf) < COPYRIGHT_MAX:
+                text_buf += "\n" + (line if end < 0 else line[:end])
+            if end >= 0:
+                if record is not None and text_tag == "copyright":
+                    record["copyright"] = text_buf.strip()[:COPYRIGHT_MAX]
+                text_tag, text_buf = None, ""
+            continue
+
+        tag, sep, value = line.partition(":")
+        if not sep:
+            continue
+        tag, value = tag.strip(), value.strip()
+
+        if tag == "FileName":
+            if record is not None:
+                yield record
+            record = _new_record(value)
+            continue
+        if tag in ("PackageName", "LicenseID") and record is not None:
+            # Package / extracted-license sections end the current file section
+            yield record
+            record = None
+
+        field = FILE_TAGS.get(tag) if record is not None else None
+        if value.startswith("<text>"):
+            body = value[len("<text>"):]
+            if "</text>" in body:
+                body = body.split("</text>", 1)[0]
+            else:
+                text_tag, text_buf = (field or "_"), body
+                continue
+            value = body
+        if field == "licenses":
+            record["licenses"].append(value)
+        elif field == "copyright":
+            record["copyright"] = value[:COPYRIGHT_MAX]
+        elif field:
+            record[field] = value
+    if record is not None:
+        yield record
+
+def open_spdx_text(path):
+    """
+    Open a .spdx2 file as text. Also accepts a report ZIP (or a file object of
+    one, or the artifact ZIP around it) and picks its SPDX member.
+    """
+    if zipfile.is_zipfile(path):
+        zf = zipfile.ZipFile(path)
+        member = next((n for n in zf.namelist() if n.endswith(".spdx2")), None)
+        if member is None:
+            # GitHub wraps the workflow's report ZIP in another ZIP
+            inner = next((n for n in zf.namelist() if n.endswith(".zip")), None)
+            if inner is None:
+                raise FileNotFoundError(f"No .spdx2 report inside {os.path.basename(str(path))}")
+            return open_spdx_text(zf.open(inner))
+        return io.TextIOWrapper(zf.open(member), encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+# =========================
+# INDEX
+# =========================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    spdx_id TEXT,
+    concluded TEXT,
+    licenses TEXT,
+    copyright TEXT
+);
+CREATE TABLE IF NOT EXISTS file_license (
+    license TEXT NOT NULL,
+    file_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS file_license_idx ON file_license (license, file_id);
+CREATE INDEX IF NOT EXISTS files_path_idx ON files (path);   -- path globs with a literal prefix
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+class SpdxIndex:
+    """
+    Index of SPDX file records by license id and path.
+    `db_path` may be ":memory:" or a file; an existing complete index file is reused.
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # The index is a rebuildable cache: skip fsyncs
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.executescript(SCHEMA)
+        self.error = None
+        self._thread = None
+
+    # ---- state ----
+    def _meta(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    @property
+    def complete(self) -> bool:
+        return self._meta("complete") == "1"
+
+    @property
+    def indexing(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _counts(self):
+        """{"files": n, "licenses": [[license, n], ...]} stored when indexing completed, else None."""
+        if not self.complete:
+            return None
+        counts = self._meta("counts")
+        return json.loads(counts) if counts else None
+
+    def file_count(self) -> int:
+        counts = self._counts()
+        if counts is not None:
+            return counts["files"]
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    # ---- build ----
+    def add_records(self, records, batch_size: int = BATCH_SIZE) -> int:
+        """Insert records in batches (each batch becomes visible to queries at once)."""
+        total, batch = 0, []
+        for rec in records:
+            batch.append(rec)
+            if len(batch) >= batch_size:
+                total += self._insert(batch)
+                batch = []
+        if batch:
+            total += self._insert(batch)
+        return total
+
+    def _insert(self, batch: list) -> int:
+        with self._lock, self._conn:
+            for rec in batch:
+                cur = self._conn.execute(
+                    "INSERT INTO files (path, spdx_id, concluded, licenses, copyright) VALUES (?, ?, ?, ?, ?)",
+                    (rec["path"], rec["spdx_id"], rec["concluded"], " ".join(rec["licenses"]), rec["copyright"]),
+                )
+                ids = set(license_ids(rec["concluded"]))
+                for expr in rec["licenses"]:
+                    ids.update(license_ids(expr))
+                self._conn.executemany(
+                    "INSERT INTO file_license (license, file_id) VALUES (?, ?)",
+                    [(lic, cur.lastrowid) for lic in sorted(ids)],
+                )
+        return len(batch)
+
+    def build(self, spdx_path: str) -> int:
+        """Stream an SPDX report (or report ZIP) into the index; no-op if already complete."""
+        if self.complete:
+            return self.file_count()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM file_license")
+        with open_spdx_text(spdx_path) as fh:
+            n = self.add_records(iter_file_records(fh))
+        with self._lock, self._conn:
+            # Counted once here, so queries on the complete index do not grow with the report
+            licenses = self._conn.execute(
+                "SELECT license, COUNT(*) AS n FROM file_license GROUP BY license ORDER BY n DESC, license"
+            ).fetchall()
+            counts = {"files": self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+                      "licenses": [list(r) for r in licenses]}
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('counts', ?)", (json.dumps(counts),))
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('complete', '1')")
+        return n
+
+    def build_async(self, spdx_path: str):
+        """Start build() in a daemon thread; queries work while it runs."""
+        if self.complete or self.indexing:
+            return
+
+        def _run():
+            try:
+                self.build(spdx_path)
+            except Exception as e:  # surfaced to the viewer via .error
+                self.error = e
+
+        self._thread = threading.Thread(target=_run, name="spdx-index", daemon=True)
+        self._thread.start()
+
+    # ---- query ----
+    @staticmethod
+    def _where(license: str = "", path_glob: str = ""):
+        clauses, params = [], []
+        if license:
+            clauses.append("f.id IN (SELECT file_id FROM file_license WHERE license = ?)")
+            params.append(license)
+        if path_glob:
+            clauses.append("f.path GLOB ?")
+            params.append(path_glob)
+        return clauses, params
+
+    def page(self, license: str = "", path_glob: str = "", after_id: int = 0, limit: int = 50) -> list:
+        """Keyset pagination: pass the last row's id as `after_id` for the next page."""
+        clauses, params = self._where(license, path_glob)
+        clauses.insert(0, "f.id > ?")
+        params.insert(0, int(after_id))
+        sql = (
+            "SELECT f.id, f.path, f.concluded, f.licenses, f.copyright FROM files f WHERE "
+            + " AND ".join(clauses) + " ORDER BY f.id LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params + [int(limit)]).fetchall()
+        return [
+            {"id": r[0], "path": r[1], "concluded": r[2], "license_info": r[3], "copyright": r[4]}
+            for r in rows
+        ]
+
+    def count(self, license: str = "", path_glob: str = "") -> int:
+        counts = None if path_glob else self._counts()
+        if counts is not None:
+            if not license:
+                return counts["files"]
+            return next((n for lic, n in counts["licenses"] if lic == license), 0)
+        clauses, params = self._where(license, path_glob)
+        sql = "SELECT COUNT(*) FROM files f" + (" WHERE " + " AND ".join(clauses) if clauses else "")
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def licenses(self, limit: int = 500) -> list:
+        """[(license_id, file_count), ...] most frequent first."""
+        counts = self._counts()
+        if counts is not None:
+            return [tuple(r) for r in counts["licenses"][:int(limit)]]
+        with self._lock:
+            return self._conn.execute(
+                "SELECT license, COUNT(*) AS n FROM file_license GROUP BY license ORDER BY n DESC, license LIMIT ?",
+                (int(limit),),
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class SpdxIndexStore:
+    """
+    Index files `<artifact id>.sqlite` in `root`, shared by all sessions. At
+    most `max_entries` indexes are kept; the least recently used one (that is
+    not being built) is closed and its file deleted, as is the index of an
+    artifact past its `expires_at`. Files left by earlier processes are
+    swept on start.
+    """
+
+    def __init__(self, root: str, max_entries: int = 16):
+        self.root = root
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()  # artifact id -> (SpdxIndex, expires_at epoch or None); oldest use first
+        os.makedirs(root, exist_ok=True)
+        self._sweep()
+
+    def _path(self, artifact_id) -> str:
+        return os.path.join(self.root, f"{int(artifact_id)}.sqlite")
+
+    def _sweep(self):
+        """Keep the newest `max_entries` index files from earlier runs; drop everything else."""
+        found = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if name.endswith(".sqlite"):
+                    found.append((os.path.getmtime(path), path))
+                else:
+                    os.remove(path)  # journals, ZIP copies of older versions
+            except OSError:
+                pass
+        for _, path in sorted(found, reverse=True)[self.max_entries:]:
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: str):
+        for p in (path, path + "-journal"):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+
+    def _drop(self, artifact_id):
+        idx, _ = self._indexes.pop(artifact_id)
+        idx.close()
+        self._remove(idx.db_path)
+
+    def get(self, artifact_id, expires_at=None) -> SpdxIndex:
+        """Index for an artifact (opened or created); `expires_at` is epoch seconds."""
+        artifact_id = int(artifact_id)
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (idx, exp) in self._indexes.items()
+                        if exp is not None and exp <= now and not idx.indexing and k != artifact_id]:
+                self._drop(key)
+            if artifact_id in self._indexes:
+                self._indexes.move_to_end(artifact_id)
+                return self._indexes[artifact_id][0]
+            idx = SpdxIndex(self._path(artifact_id))
+            self._indexes[artifact_id] = (idx, expires_at)
+            idle = [k for k, (i, _) in self._indexes.items() if not i.indexing and k != artifact_id]
+            while len(self._indexes) > self.max_entries and idle:
+                self._drop(idle.pop(0))
+            return idx
+
+    def __len__(self):
+        return len(self._indexes)
@@ -1,11 +1,28 @@
+import os
 import re
+import json
 import time
 import base64
+import hashlib
+import functools
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone  # timezone added
 
 import requests
 import streamlit as st
 
+import fossology_columnar as columnar
+import fossology_metrics as metrics
+from fossology_artifact_cache import ArtifactCache
+from fossology_payloads import PayloadStore
+from fossology_backend import Backend
+from fossology_preflight import BLOCK, DOCKER_HUB, check_backend, run_preflight
+from fossology_scheduler import PRIORITIES, DispatchScheduler
+from fossology_spdx import SpdxIndex, SpdxIndexStore
+
+_rerun_started = time.perf_counter()
+
 # =========================
 # CONFIG (edit if needed)
 # =========================
@@ -13,12 +30,43 @@ OWNER = "Bharathnelle335"          # ➜ Your GitHub username/org
 REPO = "Fossology_Workflow"        # ➜ Repo that contains the workflow file
 BRANCH = "main"                    # ➜ Branch to dispatch on
 WORKFLOW_FILE = "fossology.yml"    # ➜ Exact workflow filename in the repo
+BATCH_WORKFLOW_FILE = "fossology_batch.yml"  # ➜ Multi-input workflow (one FOSSology boot per batch)
+UPLOADS_ROOT = "uploads/sha256"    # ➜ Content-addressed uploads: <root>/<sha256>/<filename>
+UPLOAD_RETENTION_DAYS = 30         # ➜ Unreferenced uploads older than this can be cleaned up
+EXISTING_RESULTS_TTL_S = 300       # ➜ How long an "already scanned" lookup is reused within a session
+# Workflows whose queued/in-progress runs occupy the runners the scheduler waits for
+TRACKED_WORKFLOWS = ("fossology.yml", "fossology_E2E.yml", "fossology_E2E_with_tags_input.yml",
+                     "fossology_docker_included.yml", "fossology_test.yml", "fossology_sharded.yml",
+                     BATCH_WORKFLOW_FILE)
 
 # Token is expected from Streamlit secrets
 # Create .streamlit/secrets.toml with:  GITHUB_TOKEN = "ghp_xxx"
 TOKEN = st.secrets.get("GITHUB_TOKEN", "")
+# Prometheus scrape endpoint (http://<addr>:<port>/metrics); off unless a port is set
+METRICS_PORT = int(st.secrets.get("METRICS_PORT") or 0)
+# Loopback by default; set e.g. 0.0.0.0 only where the scraper cannot reach localhost
+METRICS_ADDR = st.secrets.get("METRICS_ADDR", "127.0.0.1")
+# GitHub API root; override for GitHub Enterprise or local stand-ins (fossology_loadtest.py)
+GITHUB_API_URL = st.secrets.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+# Shared on-disk artifact cache (all sessions); least recently used ZIPs are evicted beyond this size
+ARTIFACT_CACHE_MAX_MB = int(st.secrets.get("ARTIFACT_CACHE_MAX_MB", 2048))
+ARTIFACT_CACHE_DIR = st.secrets.get("ARTIFACT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "fossology_artifact_cache"))
+# Large per-session payloads (fetched ZIPs): session state keeps handles, bytes live in spill files;
+# resident copies beyond this budget are dropped, most idle sessions first
+PAYLOAD_RAM_MB = int(st.secrets.get("PAYLOAD_RAM_MB", 512))
+PAYLOAD_DIR = st.secrets.get("PAYLOAD_DIR", os.path.join(tempfile.gettempdir(), "fossology_payloads"))
+PAYLOAD_IDLE_TTL_H = float(st.secrets.get("PAYLOAD_IDLE_TTL_H", 12))
+# Registry used by the preflight check for Docker Hub images (e.g. a pull-through mirror)
+DOCKER_HUB_REGISTRY = st.secrets.get("DOCKER_HUB_REGISTRY", DOCKER_HUB).rstrip("/")
+# Scan runs allowed to be queued/in progress at once; further dispatches are held by the scheduler
+RUNNER_CAPACITY = int(st.secrets.get("RUNNER_CAPACITY", 20))
+# Default of "cancel older runs of the same input" on dispatch (supersede; only this tab's own runs)
+AUTO_SUPERSEDE = str(st.secrets.get("AUTO_SUPERSEDE", "false")).lower() == "true"
+# Backend mode: set to the same instance as the repo variable FOSSOLOGY_URL to check it before dispatch
+FOSSOLOGY_URL = st.secrets.get("FOSSOLOGY_URL", "").rstrip("/")
+FOSSOLOGY_MAX_ACTIVE = int(st.secrets.get("FOSSOLOGY_MAX_ACTIVE", 4))
 
-API_BASE = f"https://api.github.com/repos/{OWNER}/{REPO}"
+API_BASE = f"{GITHUB_API_URL}/repos/{OWNER}/{REPO}"
 HEADERS = {
     "Authorization": f"Bearer {TOKEN}",
     "Accept": "application/vnd.github+json"
@@ -44,14 +92,91 @@ GH_RE = re.compile(
     re.IGNORECASE,
 )
 
-def api_get(url: str, **kwargs):
-    return requests.get(url, headers=HEADERS, **kwargs)
+# === Metrics (process-wide; see fossology_metrics.py) ===
+API_LATENCY = metrics.REGISTRY.histogram(
+    "fossology_ui_github_request_duration_seconds", "GitHub API request latency", ["method", "endpoint"])
+API_REQUESTS = metrics.REGISTRY.counter(
+    "fossology_ui_github_requests_total", "GitHub API requests by status", ["method", "endpoint", "status"])
+API_BYTES = metrics.REGISTRY.counter(
+    "fossology_ui_github_bytes_total", "Bytes sent to / received from GitHub", ["direction", "endpoint"])
+HELPER_LATENCY = metrics.REGISTRY.histogram(
+    "fossology_ui_helper_duration_seconds", "Duration of API helper calls (incl. pagination)", ["helper"])
+CACHE_REQUESTS = metrics.REGISTRY.counter(
+    "fossology_ui_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"])
+DOWNLOADS_IN_FLIGHT = metrics.REGISTRY.gauge(
+    "fossology_ui_artifact_downloads_in_flight", "Artifact downloads currently running")
+DISPATCH_HELD = metrics.REGISTRY.gauge(
+    "fossology_ui_dispatch_queue_depth", "Dispatches held by the scheduler until runner capacity frees up")
+PAYLOAD_BYTES = metrics.REGISTRY.gauge(
+    "fossology_ui_payload_bytes", "Session payload bytes by where they are held (resident/spilled)", ["where"])
+RERUN_LATENCY = metrics.REGISTRY.histogram(
+    "fossology_ui_rerun_duration_seconds", "Wall time of one Streamlit script run")
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server(port: int, addr: str):
+    if port <= 0:
+        return None
+    try:
+        return metrics.start_http_server(port, addr)
+    except OSError:
+        # Port taken (e.g. a second app process); metrics stay in-process only
+        return None
+
+start_metrics_server(METRICS_PORT, METRICS_ADDR)
+
+_ID_SEGMENT_RE = re.compile(r"^(\d+|[0-9a-f]{40}|[0-9a-f]{64})$")
+
+def endpoint_label(url: str) -> str:
+    """Low-cardinality label: /repos/{owner}/{repo}/actions/runs/{id}/artifacts"""
+    path = url.split("://", 1)[-1].split("/", 1)[-1].split("?", 1)[0]
+    parts = path.split("/")
+    if parts[:1] == ["repos"] and len(parts) >= 3:
+        parts[1:3] = ["{owner}", "{repo}"]
+    if "contents" in parts:
+        parts = parts[:parts.index("contents") + 1] + ["{path}"]
+    return "/" + "/".join("{id}" if _ID_SEGMENT_RE.match(p) else p for p in parts)
+
+def _instrumented(method: str, url: str, call, sent: int = 0, stream: bool = False):
+    endpoint = endpoint_label(url)
+    status = "error"
+    start = time.perf_counter()
+    try:
+        r = call()
+        status = str(r.status_code)
+        received = int(r.headers.get("Content-Length") or 0) if stream else len(r.content or b"")
+        API_BYTES.inc(received, direction="received", endpoint=endpoint)
+        return r
+    finally:
+        API_LATENCY.observe(time.perf_counter() - start, method=method, endpoint=endpoint)
+        API_REQUESTS.inc(method=method, endpoint=endpoint, status=status)
+        if sent:
+            API_BYTES.inc(sent, direction="sent", endpoint=endpoint)
+
+def timed(helper: str):
+    """Decorator recording a helper's duration in HELPER_LATENCY."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with HELPER_LATENCY.time(helper=helper):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def api_get(url: str, headers: dict = None, **kwargs):
+    return _instrumented("GET", url, lambda: requests.get(url, headers={**HEADERS, **(headers or {})}, **kwargs),
+                         stream=kwargs.get("stream", False))
 
 def api_post(url: str, json_data: dict):
-    return requests.post(url, headers=HEADERS, json=json_data)
+    return _instrumented("POST", url, lambda: requests.post(url, headers=HEADERS, json=json_data),
+                         sent=len(json.dumps(json_data)))
 
 def api_put(url: str, json_data: dict):
-    return requests.put(url, headers=HEADERS, json=json_data)
+    return _instrumented("PUT", url, lambda: requests.put(url, headers=HEADERS, json=json_data),
+                         sent=len(json.dumps(json_data)))
+
+def api_delete(url: str, json_data: dict):
+    return _instrumented("DELETE", url, lambda: requests.delete(url, headers=HEADERS, json=json_data),
+                         sent=len(json.dumps(json_data)))
 
 def normalize_repo(url: str, ref_input: str):
     """
@@ -69,13 +194,14 @@ def normalize_repo(url: str, ref_input: str):
     canon = f"https://github.com/{owner}/{repo}.git"
     return canon, ref, {"owner": owner, "repo": repo}
 
+@timed("list_refs")
 def list_refs(owner: str, repo: str):
     branches = []
     tags = []
     # Branches
     page = 1
     while True:
-        r = api_get(f"https://api.github.com/repos/{owner}/{repo}/branches", params={"per_page": 100, "page": page})
+        r = api_get(f"{GITHUB_API_URL}/repos/{owner}/{repo}/branches", params={"per_page": 100, "page": page})
         if r.status_code != 200:
             break
         data = r.json()
@@ -86,7 +212,7 @@ def list_refs(owner: str, repo: str):
     # Tags
     page = 1
     while True:
-        r = api_get(f"https://api.github.com/repos/{owner}/{repo}/tags", params={"per_page": 100, "page": page})
+        r = api_get(f"{GITHUB_API_URL}/repos/{owner}/{repo}/tags", params={"per_page": 100, "page": page})
         if r.status_code != 200:
             break
         data = r.json()
@@ -115,11 +241,37 @@ def predict_input_tag(scan_type: str, docker_image: str, repo_url: str, repo_ref
         return sanitize_tag(base)
     return "input"
 
+def parse_batch(text: str):
+    """
+    One input per line: `<scan_type> <docker image | repo URL | file URL> [ref]`
+    (blank lines and `#` comments ignored). Returns (items, errors).
+    """
+    items, errors = [], []
+    for n, line in enumerate((text or "").splitlines(), start=1):
+        parts = line.split("#", 1)[0].split()
+        if not parts:
+            continue
+        kind, target, ref = parts[0].lower(), (parts[1] if len(parts) > 1 else ""), (parts[2] if len(parts) > 2 else "")
+        if kind not in ("docker", "repo", "upload-zip", "upload-tar") or not target:
+            errors.append(f"line {n}: expected `<docker|repo|upload-zip|upload-tar> <target> [ref]`")
+        elif kind == "docker":
+            items.append({"scan_type": kind, "docker_image": target})
+        elif kind == "repo":
+            canon, norm_ref, _ = normalize_repo(target, ref or "main")
+            items.append({"scan_type": kind, "repo_url": canon, "repo_ref": norm_ref})
+        else:
+            items.append({"scan_type": kind, "repo_url": target})
+    return items, errors
+
+@timed("dispatch_workflow")
 def dispatch_workflow(inputs: dict):
-    url = f"{API_BASE}/actions/workflows/{WORKFLOW_FILE}/dispatches"
+    # Batch payloads (a JSON `batch` list) go to the multi-input workflow
+    workflow = BATCH_WORKFLOW_FILE if "batch" in inputs else WORKFLOW_FILE
+    url = f"{API_BASE}/actions/workflows/{workflow}/dispatches"
     payload = {"ref": BRANCH, "inputs": inputs}
     return api_post(url, payload)
 
+@timed("find_recent_run")
 def find_recent_run(workflow_file: str, created_after: datetime):
     url = f"{API_BASE}/actions/workflows/{workflow_file}/runs"
     r = api_get(url, params={"per_page": 20})
@@ -149,10 +301,16 @@ def get_run(run_id: int):
 def get_run_artifacts(run_id: int):
     return api_get(f"{API_BASE}/actions/runs/{run_id}/artifacts")
 
+@timed("cancel_run")
+def cancel_workflow_run(run_id: int):
+    """202 when GitHub accepted the cancel; 409 once the run has already finished."""
+    return api_post(f"{API_BASE}/actions/runs/{run_id}/cancel", {})
+
 # === SCANOSS-style run listing & picking (added to mirror scanoss.py) ===
-def list_workflow_runs(per_page=30):
+@timed("list_workflow_runs")
+def list_workflow_runs(per_page=30, workflow_file: str = WORKFLOW_FILE):
     """List runs for this workflow on the fixed branch, workflow_dispatch only."""
-    url = f"{API_BASE}/actions/workflows/{WORKFLOW_FILE}/runs"
+    url = f"{API_BASE}/actions/workflows/{workflow_file}/runs"
     return api_get(url, params={"per_page": per_page, "event": "workflow_dispatch", "branch": BRANCH})
 
 def find_run_by_tag(runs: list, tag: str):
@@ -163,12 +321,246 @@ def find_run_by_tag(runs: list, tag: str):
             return r
     return runs[0] if runs else None
 
-def download_artifact_zip(artifact_id: int) -> bytes:
+def list_repo_runs(status: str) -> list:
+    """Repo-wide runs with this status (all workflows; the scheduler filters by path)."""
+    r = api_get(f"{API_BASE}/actions/runs", params={"status": status, "per_page": 100})
+    return r.json().get("workflow_runs", []) if r.ok else []
+
+# === Dispatch scheduler (process-wide: one queue for all sessions) ===
+@st.cache_resource(show_spinner=False)
+def get_scheduler() -> DispatchScheduler:
+    return DispatchScheduler(dispatch_workflow, list_repo_runs, RUNNER_CAPACITY, TRACKED_WORKFLOWS,
+                             cancel_run=cancel_workflow_run, dispatch_id_input="dispatch_id")
+
+@st.cache_resource(show_spinner=False)
+def get_backend() -> Backend:
+    """One client (keep-alive connections + token pool) shared by all sessions; only used by the preflight."""
+    return Backend(FOSSOLOGY_URL, token=st.secrets.get("FOSSOLOGY_TOKEN", ""), connections=2, timeout=5,
+                   username=st.secrets.get("FOSSOLOGY_USERNAME", ""), password=st.secrets.get("FOSSOLOGY_PASSWORD", ""))
+
+def fmt_eta(row: dict) -> str:
+    now = time.time()
+    start = "now" if row["start"] <= now else \
+        f"~{datetime.fromtimestamp(row['start']).strftime('%H:%M')} (in {(row['start'] - now) / 60:.0f} min)"
+    finish = f"~{datetime.fromtimestamp(row['finish']).strftime('%H:%M')} (in {max(row['finish'] - now, 0) / 60:.0f} min)"
+    return f"starts {start} • finishes {finish}" if row["kind"] != "running" else f"finishes {finish}"
+
+@timed("download_artifact_zip")
+def _download_artifact(artifact_id: int) -> bytes:
     """Direct artifact ZIP fetch (authorized) like scanoss.py."""
-    r = api_get(f"{API_BASE}/actions/artifacts/{artifact_id}/zip", stream=True)
-    if not r.ok:
-        return b""
-    return r.content
+    DOWNLOADS_IN_FLIGHT.inc()
+    try:
+        r = api_get(f"{API_BASE}/actions/artifacts/{artifact_id}/zip", stream=True)
+        if not r.ok:
+            return b""
+        return r.content
+    finally:
+        DOWNLOADS_IN_FLIGHT.dec()
+
+@st.cache_resource(show_spinner=False)
+def get_artifact_cache() -> ArtifactCache:
+    return ArtifactCache(ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_MB << 20,
+                         on_lookup=lambda result: CACHE_REQUESTS.inc(cache="artifact", result=result))
+
+def download_artifact_zip(art: dict) -> bytes:
+    """Artifact ZIP from the shared on-disk cache (id + digest); GitHub is only asked on a miss."""
+    return get_artifact_cache().fetch(art["id"], lambda: _download_artifact(art["id"]),
+                                      digest=art.get("digest") or "", expires_at=art.get("expires_at"))
+
+def pick_artifact(artifacts: list, category: str, tag: str = ""):
+    """Run artifact `fossology-<category>-<TAG>-<RUN_ID>`; prefers a tag match."""
+    named = [a for a in artifacts if a.get("name", "").startswith(f"fossology-{category}-")]
+    for a in named:
+        if tag and tag.lower() in a.get("name", "").lower():
+            return a
+    return named[0] if named else None
+
+# === Columnar results: small manifest first, categories on demand ===
+def fetch_columnar_manifest(artifacts: list, tag: str):
+    """Manifest + the run's per-category artifacts, or None for runs without columnar output."""
+    manifest_art = pick_artifact(artifacts, "manifest", tag)
+    if not manifest_art or manifest_art.get("expired"):
+        return None
+    data = download_artifact_zip(manifest_art)
+    if not data:
+        return None
+    parts = {}
+    for category in columnar.CATEGORIES:
+        a = pick_artifact(artifacts, category, tag)
+        if a and not a.get("expired"):
+            parts[category] = {"id": a["id"], "name": a.get("name", ""), "size": a.get("size_in_bytes", 0),
+                               "digest": a.get("digest"), "expires_at": a.get("expires_at")}
+    return {"manifest": columnar.read_manifest(data), "parts": parts}
+
+# === Content-addressed uploads (dedup by sha256) ===
+def sha256_stream(fileobj, chunk_size: int = 1 << 20) -> str:
+    """Hash a file-like object chunk by chunk; leaves it rewound to the start."""
+    h = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        h.update(chunk)
+    fileobj.seek(0)
+    return h.hexdigest()
+
+def find_stored_upload(digest: str):
+    """Return the contents-API entry of an already stored copy of this digest, if any."""
+    r = api_get(f"{API_BASE}/contents/{UPLOADS_ROOT}/{digest}", params={"ref": BRANCH})
+    if r.status_code != 200:
+        return None
+    items = r.json()
+    files = [i for i in items if i.get("type") == "file"] if isinstance(items, list) else []
+    return files[0] if files else None
+
+def upload_blob_to_repo(fileobj, filename: str, digest: str = ""):
+    """
+    Store an upload under uploads/sha256/<digest>/<filename> and return (download_url, reused).
+    If the same content is already stored, its URL is reused and nothing is uploaded.
+    """
+    digest = digest or sha256_stream(fileobj)
+    existing = find_stored_upload(digest)
+    CACHE_REQUESTS.inc(cache="upload_dedup", result="hit" if existing else "miss")
+    if existing:
+        return existing.get("download_url", ""), True
+    path = f"{UPLOADS_ROOT}/{digest}/{filename}"
+    fileobj.seek(0)
+    payload = {
+        "message": f"Add upload asset {filename} (sha256:{digest[:12]})",
+        "content": base64.b64encode(fileobj.read()).decode("utf-8"),
+        "branch": BRANCH,
+    }
+    r = api_put(f"{API_BASE}/contents/{path}", payload)
+    if r.status_code not in (200, 201):
+        raise RuntimeError(f"Upload failed: {r.status_code} {r.text}")
+    return r.json().get("content", {}).get("download_url", ""), False
+
+def list_result_artifacts(max_pages: int = 5, prefix: str = "fossology-reports-") -> list:
+    """Non-expired artifacts of this repo whose name starts with `prefix`, newest first."""
+    arts = []
+    for page in range(1, max_pages + 1):
+        r = api_get(f"{API_BASE}/actions/artifacts", params={"per_page": 100, "page": page})
+        if r.status_code != 200:
+            break
+        batch = r.json().get("artifacts", [])
+        arts.extend(a for a in batch if a.get("name", "").startswith(prefix) and not a.get("expired"))
+        if len(batch) < 100:
+            break
+    return sorted(arts, key=lambda a: a.get("created_at") or "", reverse=True)
+
+def artifact_input_tag(artifact_name: str) -> str:
+    """fossology-reports-<TAG>-<RUN_ID> -> <TAG>"""
+    return artifact_name[len("fossology-reports-"):].rsplit("-", 1)[0]
+
+UPLOAD_DIGEST_RE = re.compile(rf"/{UPLOADS_ROOT}/(?P<digest>[0-9a-f]{{64}})/")
+
+def upload_digest(file_url: str) -> str:
+    """sha256 of a content-addressed upload URL (…/uploads/sha256/<digest>/<file>), else ''."""
+    m = UPLOAD_DIGEST_RE.search(file_url or "")
+    return m.group("digest") if m else ""
+
+def find_existing_results(digest: str):
+    """
+    Newest non-expired results artifact of a completed scan of this exact file.
+    fossology.yml records the sha256 of every scanned upload as a
+    `fossology-sha256-<digest>` artifact next to the reports.
+    """
+    r = api_get(f"{API_BASE}/actions/artifacts", params={"name": f"fossology-sha256-{digest}", "per_page": 20})
+    if r.status_code != 200:
+        return None
+    markers = sorted((a for a in r.json().get("artifacts", []) if not a.get("expired")),
+                     key=lambda a: a.get("created_at") or "", reverse=True)
+    for marker in markers:
+        run_id = (marker.get("workflow_run") or {}).get("id")
+        arts = get_run_artifacts(run_id) if run_id else None
+        if arts is None or not arts.ok:
+            continue
+        rep = pick_artifact([a for a in arts.json().get("artifacts", []) if not a.get("expired")], "reports")
+        if rep:
+            return rep
+    return None
+
+def plan_upload_gc(retention_days: int) -> list:
+    """
+    Uploads that can be deleted: older than `retention_days` and not referenced
+    by any non-expired results artifact (by sha256 for content-addressed
+    uploads, by file name for the legacy uploads/<YYYYmmdd_HHMMSS>/<file> layout).
+    """
+    r = api_get(f"{API_BASE}/git/trees/{BRANCH}", params={"recursive": 1})
+    if r.status_code != 200:
+        raise RuntimeError(f"Could not list repo tree: {r.status_code} {r.text}")
+    blobs = [t for t in r.json().get("tree", []) if t.get("type") == "blob" and t.get("path", "").startswith("uploads/")]
+    # Content-addressed uploads are referenced by digest; legacy ones only by their file name
+    scanned = {a["name"][len("fossology-sha256-"):] for a in list_result_artifacts(prefix="fossology-sha256-")}
+    referenced = {artifact_input_tag(a.get("name", "")) for a in list_result_artifacts()}
+    now = datetime.now(timezone.utc)
+    candidates = []
+    for b in blobs:
+        path = b["path"]
+        digest = upload_digest("/" + path)
+        if (digest in scanned) if digest else (predict_input_tag("upload-zip", "", path, "") in referenced):
+            continue
+        parts = path.split("/")
+        try:
+            stored_at = datetime.strptime(parts[1], "%Y%m%d_%H%M%S").replace(tzinfo=timezone.utc)
+        except (IndexError, ValueError):
+            c = api_get(f"{API_BASE}/commits", params={"path": path, "sha": BRANCH, "per_page": 1})
+            if c.status_code != 200 or not c.json():
+                continue
+            date = c.json()[0]["commit"]["committer"]["date"]
+            stored_at = datetime.fromisoformat(date.replace("Z", "+00:00"))
+        age_days = (now - stored_at).days
+        if age_days >= retention_days:
+            candidates.append({"path": path, "sha": b["sha"], "age_days": age_days, "size": b.get("size", 0)})
+    return candidates
+
+def delete_stored_upload(path: str, sha: str):
+    return api_delete(f"{API_BASE}/contents/{path}", {
+        "message": f"Remove unreferenced upload {path}",
+        "sha": sha,
+        "branch": BRANCH,
+    })
+
+# === SPDX browser: on-disk index per artifact, shared by all sessions ===
+SPDX_INDEX_DIR = os.path.join(tempfile.gettempdir(), "fossology_spdx_index")
+SPDX_INDEX_MAX = 16  # indexes kept open / on disk; least recently used are deleted
+SPDX_PAGE_SIZE = 50
+
+@st.cache_resource(show_spinner=False)
+def get_spdx_indexes() -> SpdxIndexStore:
+    return SpdxIndexStore(SPDX_INDEX_DIR, SPDX_INDEX_MAX)
+
+def start_spdx_index(artifact_id: int, src_path: str, expires_at=None) -> SpdxIndex:
+    """
+    Index the artifact's SPDX report in the background (no-op once indexed).
+    Reads the session's payload file directly: the build opens it right away,
+    so a later discard of the payload does not cut it short.
+    """
+    expiry = datetime.fromisoformat(expires_at.replace("Z", "+00:00")).timestamp() if expires_at else None
+    idx = get_spdx_indexes().get(artifact_id, expiry)
+    if not idx.complete and not idx.indexing and idx.error is None:
+        idx.build_async(src_path)
+    return idx
+
+def _spdx_reset_cursor():
+    st.session_state["spdx_cursors"] = [0]
+
+# === Session payloads: handles in session state, bytes in the process-wide store ===
+@st.cache_resource(show_spinner=False)
+def get_payload_store() -> PayloadStore:
+    return PayloadStore(PAYLOAD_DIR, PAYLOAD_RAM_MB << 20, idle_ttl_s=PAYLOAD_IDLE_TTL_H * 3600)
+
+payloads = get_payload_store()
+payload_session = st.session_state.setdefault("payload_session", PayloadStore.new_session_id())
+payloads.touch(payload_session)
+payloads.gc()
+
+def keep_artifact(art_id: int, name: str, data: bytes, expires_at=None):
+    """Hand a fetched results ZIP to the payload store and select it for the tabs below."""
+    old = st.session_state.get(f"artifact_handle_{art_id}")
+    if old:
+        payloads.discard(old)
+    st.session_state[f"artifact_handle_{art_id}"] = payloads.put(payload_session, name, data)
+    st.session_state["results_artifact"] = {"id": art_id, "name": name, "expires_at": expires_at}
+    _spdx_reset_cursor()
 
 # =========================
 # MAIN FORM (NO SIDEBAR)
@@ -177,7 +569,7 @@ st.subheader("1) Choose Input & Options")
 
 col1, col2 = st.columns([1,1])
 with col1:
-    scan_type = st.selectbox("Scan Type", ["docker", "repo", "upload-zip", "upload-tar"], index=0)
+    scan_type = st.selectbox("Scan Type", ["docker", "repo", "upload-zip", "upload-tar", "batch"], index=0)
 with col2:
     st.markdown("**Agents (default ON)** – keyword & pkgagent are omitted by design")
     agent_nomos = st.checkbox("nomos", value=True)
@@ -190,8 +582,9 @@ repo_url = ""
 repo_ref = "main"
 docker_image = "alpine:latest"
 file_url = ""
-file_uploader_bytes = None
 uploaded_name = ""
+input_size = None  # bytes, when known (feeds the scheduler's ETA)
+batch_items = []
 
 if scan_type == "docker":
     docker_image = st.text_input("Docker image (e.g., nginx:latest)", value="alpine:latest")
@@ -247,32 +640,81 @@ elif scan_type in ("upload-zip", "upload-tar"):
     with up_col2:
         uploaded = st.file_uploader("Upload a file (ZIP/TAR)", type=["zip", "tar", "gz", "tgz"])  # gz/tgz for tarballs
         if uploaded is not None:
-            file_uploader_bytes = uploaded.read()
             uploaded_name = uploaded.name
-            st.write(f"Selected: {uploaded.name} ({len(file_uploader_bytes)} bytes)")
+            input_size = uploaded.size
+            # Hash once per uploaded file (chunked, no full copy in memory)
+            digest_key = f"upload_sha256_{uploaded.file_id}"
+            if digest_key not in st.session_state:
+                with st.spinner("Hashing file ..."):
+                    st.session_state[digest_key] = sha256_stream(uploaded)
+            digest = st.session_state[digest_key]
+            st.write(f"Selected: {uploaded.name} ({uploaded.size} bytes)  •  sha256 `{digest[:12]}…`")
             if TOKEN and st.button("Upload file to repo & fill URL"):
                 try:
                     with st.spinner("Uploading to repo ..."):
-                        url = upload_blob_to_repo(file_uploader_bytes, uploaded.name)
+                        url, reused = upload_blob_to_repo(uploaded, uploaded.name, digest)
                     if url:
                         file_url = url
-                        st.success("Uploaded. URL filled above.")
+                        if reused:
+                            st.success("Identical file already stored – reusing its URL (nothing uploaded).")
+                        else:
+                            st.success("Uploaded. URL filled above.")
                         st.session_state["_file_url_prefill"] = url
                 except Exception as e:
                     st.error(f"Upload failed: {e}")
     if "_file_url_prefill" in st.session_state and not file_url:
         file_url = st.session_state["_file_url_prefill"]
 
+elif scan_type == "batch":
+    st.caption("Several inputs in **one** run: FOSSology starts once and the inputs are scanned one after another "
+               "(the next input is prepared while the current one is scanned). Reports: one folder per input "
+               "in a single artifact.")
+    batch_text = st.text_area(
+        "Inputs (one per line: `<scan_type> <image | repo URL | file URL> [ref]`)",
+        value="repo https://github.com/example/repo.git main\ndocker alpine:latest", height=160)
+    batch_items, batch_errors = parse_batch(batch_text)
+    # Default tag names the batch by its content, so two different batches never share a run title
+    batch_digest = hashlib.sha1(json.dumps(batch_items, sort_keys=True).encode()).hexdigest()[:10]
+    batch_tag = st.text_input("Batch tag", value=f"batch-{len(batch_items)}-{batch_digest}")
+    for err in batch_errors:
+        st.warning(err)
+    st.caption(f"{len(batch_items)} input(s) parsed")
+
 # Predict input tag preview
-pred = predict_input_tag(
+pred = sanitize_tag(batch_tag) if scan_type == "batch" else predict_input_tag(
     scan_type,
     docker_image,
     repo_url if scan_type == "repo" else file_url,
     repo_ref,
-    uploaded_name
+    "" if file_url else uploaded_name  # the workflow names files after the URL
 )
 st.info(f"**Expected filename tag:** `{pred}`  (used to suffix report files & artifact name)")
 
+# Content-addressed uploads: the same file (same sha256) may already have been scanned
+scanned_digest = upload_digest(file_url) if scan_type in ("upload-zip", "upload-tar") else ""
+if scanned_digest:
+    existing_key = f"existing_results_{scanned_digest}"
+    cached = st.session_state.get(existing_key)
+    if not cached or time.time() - cached[0] > EXISTING_RESULTS_TTL_S:
+        cached = (time.time(), find_existing_results(scanned_digest))
+        st.session_state[existing_key] = cached
+        CACHE_REQUESTS.inc(cache="scan_results", result="hit" if cached[1] else "miss")
+    existing = cached[1]
+    if existing:
+        ex_c1, ex_c2 = st.columns([3, 1])
+        with ex_c1:
+            st.info(f"♻️ This file was already scanned: artifact `{existing.get('name')}` ({existing.get('created_at', '')}). "
+                    "You can reuse those results instead of running a new scan.")
+        with ex_c2:
+            if st.button("📦 Use existing results", use_container_width=True):
+                data = download_artifact_zip(existing)
+                if data:
+                    keep_artifact(existing["id"], existing.get("name", "fossology-results"), data, existing.get("expires_at"))
+                    st.success("Loaded – see 📦 Results below.")
+                else:
+                    st.session_state.pop(existing_key, None)
+                    st.error("Failed to download artifact zip (empty response).")
+
 # =========================
 # DISPATCH
 # =========================
@@ -283,25 +725,116 @@ inputs_payload = {
     "docker_image": docker_image if scan_type == "docker" else "",
     "repo_url": (repo_url or file_url) if scan_type in ("repo", "upload-zip", "upload-tar") else "",
     "repo_ref": repo_ref if scan_type == "repo" else "",
+    "input_tag": pred,
     "agent_nomos": str(True).lower(),
     "agent_ojo": str(True).lower(),
     "agent_monk": str(True).lower(),
     "agent_copyright": str(True).lower(),
 }
 
-run_clicked = st.button("▶️ Run Scan", disabled=not TOKEN)
+if scan_type == "batch":
+    inputs_payload = {
+        "batch": json.dumps(batch_items, separators=(",", ":")),
+        "input_tag": pred,
+        "agent_nomos": str(True).lower(),
+        "agent_ojo": str(True).lower(),
+        "agent_monk": str(True).lower(),
+        "agent_copyright": str(True).lower(),
+    }
+
+scheduler = get_scheduler()
+d_col1, d_col2 = st.columns([1, 3])
+with d_col1:
+    priority = st.selectbox("Priority", list(PRIORITIES), index=1)
+with d_col2:
+    st.caption(f"At most **{RUNNER_CAPACITY}** scan runs are queued/running at once; "
+               "further dispatches are held here and released by priority as runs finish.")
+    supersede = st.checkbox("Cancel older runs of the same input", value=AUTO_SUPERSEDE,
+                            help="Held dispatches and queued/in-progress runs dispatched from this tab for the same "
+                                 "input (same file digest, repo commit, image digest or batch) are cancelled when "
+                                 "this dispatch is accepted. Other users' runs are never touched.")
+
+run_clicked = st.button("▶️ Run Scan", disabled=not TOKEN or (scan_type == "batch" and not batch_items))
 
 if run_clicked:
     if not TOKEN:
         st.error("GitHub token missing. Cannot dispatch.")
     else:
-        with st.spinner("Dispatching workflow..."):
-            r = dispatch_workflow(inputs_payload)
-        if r.status_code in (201, 204):
-            st.success("Workflow dispatch accepted ✨")
-            st.session_state["dispatch_time"] = datetime.now(timezone.utc)  # timezone-aware
+        # Preflight: cheap metadata checks so bad inputs never reach a runner
+        norm_git, norm_ref, meta = normalize_repo(repo_url, repo_ref)
+        with st.spinner("Checking inputs..."):
+            with HELPER_LATENCY.time(helper="preflight"):
+                if scan_type == "batch":
+                    # Same checks per input, all inputs at once; one blocked input stops the whole batch
+                    with ThreadPoolExecutor(max_workers=min(len(batch_items), 8)) as pool:
+                        checks = list(pool.map(lambda item: run_preflight(
+                            item["scan_type"], docker_image=item.get("docker_image", ""),
+                            repo_meta=normalize_repo(item.get("repo_url", ""), item.get("repo_ref", ""))[2],
+                            repo_ref=item.get("repo_ref", ""), file_url=item.get("repo_url", ""),
+                            github_get=api_get, api_url=GITHUB_API_URL, hub=DOCKER_HUB_REGISTRY), batch_items))
+                    preflight = {
+                        "results": [dict(r, check=f"#{k + 1} {r['check']}") for k, c in enumerate(checks) for r in c["results"]],
+                        "blocked": any(c["blocked"] for c in checks),
+                        "size": sum(c["size"] or 0 for c in checks) or None,
+                        "identity": hashlib.sha1(json.dumps([[item, c["identity"]] for item, c in zip(batch_items, checks)],
+                                                            sort_keys=True).encode()).hexdigest(),
+                    }
+                else:
+                    preflight = run_preflight(
+                        scan_type, docker_image=docker_image, repo_meta=meta, repo_ref=norm_ref,
+                        file_url=file_url, github_get=api_get, api_url=GITHUB_API_URL, hub=DOCKER_HUB_REGISTRY)
+                if FOSSOLOGY_URL:
+                    backend_checks = check_backend(lambda: get_backend().status(), FOSSOLOGY_MAX_ACTIVE)
+                    preflight["results"] += backend_checks
+                    preflight["blocked"] = preflight["blocked"] or any(r["level"] == BLOCK for r in backend_checks)
+        st.session_state["preflight"] = preflight
+        if preflight["blocked"]:
+            st.session_state.pop("dispatch_entry", None)
         else:
-            st.error(f"Dispatch failed: {r.status_code} {r.text}")
+            # Supersede key: what the input is, not what it is called (tags repeat across users and files)
+            if scan_type == "batch":
+                input_key = f"batch:{preflight['identity']}"
+            elif scan_type == "repo":
+                input_key = f"repo:{norm_git}@{preflight['identity'] or norm_ref}"
+            elif scan_type == "docker":
+                input_key = f"docker:{preflight['identity'] or docker_image.strip()}"
+            else:
+                input_key = f"sha256:{scanned_digest}" if scanned_digest else f"url:{file_url}"
+            with st.spinner("Dispatching workflow..."):
+                entry = scheduler.submit(inputs_payload, scan_type, pred, size=input_size or preflight["size"],
+                                         priority=PRIORITIES[priority], owner=payload_session,
+                                         supersede=supersede, input_key=input_key)
+            st.session_state["dispatch_entry"] = entry["id"]
+            if entry["status"] != "failed":
+                st.session_state["dispatch_time"] = datetime.now(timezone.utc)  # timezone-aware
+
+preflight = st.session_state.get("preflight")
+if preflight:
+    icons = {"ok": "✅", "warn": "⚠️", "block": "⛔"}
+    lines = [f"{icons[r['level']]} **{r['check']}** – {r['message']}" for r in preflight["results"]]
+    if preflight["blocked"]:
+        st.error("Preflight failed – not dispatched:\n\n" + "\n\n".join(lines))
+    elif any(r["level"] == "warn" for r in preflight["results"]):
+        st.warning("Preflight warnings:\n\n" + "\n\n".join(lines))
+    else:
+        st.caption(" • ".join(lines))
+
+entry = scheduler.entries.get(st.session_state.get("dispatch_entry"))
+if entry:
+    if entry["status"] == "dispatched":
+        st.success(f"Workflow dispatch accepted ✨ (`{entry['tag']}`)")
+    elif entry["status"] == "cancelled":
+        st.info("Superseded by a newer dispatch for the same input." if entry["superseded_by"]
+                else "Held dispatch cancelled.")
+    elif entry["status"] == "failed":
+        st.error(f"Dispatch failed: {entry['error']}")
+    elif entry["status"] == "held":
+        row = scheduler.eta_for(entry["tag"])
+        st.info(f"⏸️ Held by the scheduler – {scheduler.occupancy()} of {RUNNER_CAPACITY} runner slots busy"
+                + (f"; position {row['position']}, {fmt_eta(row)}" if row else ""))
+    if entry["superseded_runs"]:
+        st.caption("⏹️ Cancelled older run(s) of this input: " + ", ".join(f"`{i}`" for i in entry["superseded_runs"]))
+DISPATCH_HELD.set(len(scheduler.held()))
 
 # =========================
 # RESULTS (SCANOSS-style)
@@ -316,17 +849,54 @@ with res_c1:
 with res_c2:
     check = st.button("🔎 Check status & fetch", use_container_width=True)
 
+with st.expander(f"🗓️ Runner queue ({scheduler.occupancy()}/{RUNNER_CAPACITY} busy, {len(scheduler.held())} held)"):
+    plan = scheduler.plan()
+    if plan:
+        for r in plan:
+            q_c1, q_c2, q_c3 = st.columns([1, 5, 1])
+            q_c1.write(r["kind"])
+            q_c2.write(f"{r['title']} – {fmt_eta(r)}")
+            key = f"cancel_run_{r['run_id']}" if r.get("run_id") else f"cancel_held_{r['entry_id']}"
+            # One click for this tab's own dispatches; anything else (other users, runs started
+            # outside the app) needs a second, explicit confirmation
+            confirmed = False
+            if st.session_state.get("confirm_cancel") == key:
+                q_c2.caption("⚠️ Not dispatched from this tab – it may be someone else's run.")
+                confirmed = q_c3.button("Confirm", key=f"{key}_confirm", type="primary", use_container_width=True)
+            elif q_c3.button("⏹️ Cancel", key=key, use_container_width=True):
+                if r.get("owner") == payload_session:
+                    confirmed = True
+                else:
+                    st.session_state["confirm_cancel"] = key
+                    st.rerun()
+            if confirmed:
+                st.session_state.pop("confirm_cancel", None)
+                ok = scheduler.cancel_run_id(r["run_id"]) if r.get("run_id") else scheduler.cancel(r["entry_id"])
+                st.session_state["cancel_result"] = (ok, r["title"])
+                st.rerun()
+    else:
+        st.caption("No active or held runs (as of the last status check).")
+    if "cancel_result" in st.session_state:
+        ok, title = st.session_state.pop("cancel_result")
+        (st.success if ok else st.warning)(f"Cancelled {title}" if ok else f"Could not cancel {title} (already finished?)")
+
 if check:
     if not result_tag:
         st.error("Provide a run tag.")
     else:
-        runs_resp = list_workflow_runs(per_page=50)
+        # The tag may belong to a single-input or a batch run, whatever the Scan Type selected above
+        runs_resps = [list_workflow_runs(per_page=50, workflow_file=wf) for wf in (WORKFLOW_FILE, BATCH_WORKFLOW_FILE)]
+        runs_resp = next((r for r in runs_resps if not r.ok), runs_resps[0])
         if not runs_resp.ok:
             st.error(f"Failed to list runs: {runs_resp.status_code} {runs_resp.text}")
         else:
-            runs = runs_resp.json().get("workflow_runs", [])
+            runs = sorted((run for r in runs_resps for run in r.json().get("workflow_runs", [])),
+                          key=lambda run: run.get("created_at") or "", reverse=True)
             run = find_run_by_tag(runs, result_tag)
-            if not run:
+            held_row = scheduler.eta_for(result_tag)
+            if held_row and held_row["kind"] == "held":
+                st.info(f"⏸️ Not dispatched yet – held at position {held_row['position']}. ETA: {fmt_eta(held_row)}")
+            elif not run:
                 st.warning("No run found yet for this tag. Try again shortly.")
             else:
                 run_id = run["id"]
@@ -337,7 +907,10 @@ if check:
                 st.write(f"**Run:** [{run_id}]({html_url})")
                 st.write(f"**Status:** {status}  |  **Conclusion:** {conclusion or '—'}  |  **Started:** {started or '—'}")
                 if status != "completed":
-                    st.info("⏳ Still running (queued/in_progress). Check again in a bit.")
+                    scheduler.refresh()
+                    eta = next((r for r in scheduler.plan() if r.get("run_id") == run_id), None)
+                    st.info("⏳ Still running (queued/in_progress). Check again in a bit."
+                            + (f"  ETA: {fmt_eta(eta)}" if eta else ""))
                 else:
                     if conclusion and conclusion != "success":
                         st.error("❌ Completed with non-success conclusion.")
@@ -349,29 +922,197 @@ if check:
                         if not artifacts:
                             st.warning("No artifacts found for this run.")
                         else:
-                            # Prefer artifact with tag in name; else the first
-                            art = None
-                            for a in artifacts:
-                                if result_tag.lower() in (a.get("name","").lower()):
-                                    art = a; break
+                            # Prefer the reports artifact with tag in name; else the first
+                            art = pick_artifact(artifacts, "reports", result_tag)
+                            if not art:
+                                for a in artifacts:
+                                    if result_tag.lower() in (a.get("name","").lower()):
+                                        art = a; break
                             if not art:
                                 art = artifacts[0]
-                            st.write(f"**Artifact:** `{art.get('name')}`  •  size ~ {art.get('size_in_bytes', 0)} bytes")
-                            if not art.get("expired", False):
-                                data = download_artifact_zip(art["id"])
-                                if data:
-                                    fname = f"{art.get('name','fossology-results')}.zip"
-                                    st.download_button("⬇️ Download ZIP", data=data, file_name=fname, mime="application/zip")
-                                else:
-                                    st.error("Failed to download artifact zip (empty response).")
+                            # Newer runs publish a manifest: fetch that first, the rest on demand
+                            col = fetch_columnar_manifest(artifacts, result_tag)
+                            if col:
+                                col["reports"] = {"id": art["id"], "name": art.get("name", "fossology-results"),
+                                                  "size": art.get("size_in_bytes", 0), "expired": art.get("expired", False),
+                                                  "digest": art.get("digest"), "expires_at": art.get("expires_at")}
+                                st.session_state["results_columnar"] = col
+                                st.session_state.pop("results_artifact", None)
                             else:
-                                st.error("Artifact expired (per repo retention). Re-run the scan.")
+                                st.session_state.pop("results_columnar", None)
+                                st.write(f"**Artifact:** `{art.get('name')}`  •  size ~ {art.get('size_in_bytes', 0)} bytes")
+                                if not art.get("expired", False):
+                                    data = download_artifact_zip(art)
+                                    if data:
+                                        # Keep the selection so the tabs below survive reruns
+                                        keep_artifact(art["id"], art.get("name", "fossology-results"), data, art.get("expires_at"))
+                                    else:
+                                        st.error("Failed to download artifact zip (empty response).")
+                                else:
+                                    st.error("Artifact expired (per repo retention). Re-run the scan.")
+
+col_res = st.session_state.get("results_columnar")
+if col_res:
+    manifest = col_res["manifest"]
+    cats = manifest.get("categories", {})
+    m_cols = st.columns(max(len(cats), 1))
+    for m_col, (category, info) in zip(m_cols, cats.items()):
+        m_col.metric(category.capitalize(), f"{info.get('rows', 0):,}")
+    numbers = {k: v for k, v in manifest.get("summary", {}).items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+    if numbers:
+        with st.expander("Summary"):
+            st.json(numbers)
+
+    for category, info in cats.items():
+        part = col_res["parts"].get(category)
+        with st.expander(f"{category} — {info.get('rows', 0):,} rows • {info.get('bytes', 0) / 1024:.0f} KB"):
+            handle_key = f"columnar_handle_{part['id']}" if part else ""
+            part_bytes = payloads.get(st.session_state[handle_key]) if part and handle_key in st.session_state else None
+            if not part:
+                st.caption("Artifact not available (expired or not uploaded).")
+            elif part_bytes is None:
+                if st.button(f"Load {category}", key=f"columnar_load_{category}"):
+                    data = download_artifact_zip(part)
+                    if data:
+                        st.session_state[handle_key] = payloads.put(payload_session, part["name"], data)
+                        st.rerun()
+                    else:
+                        st.error("Failed to download artifact zip (empty response).")
+            else:
+                st.dataframe(columnar.read_category(part_bytes), use_container_width=True, hide_index=True)
+
+    rep = col_res["reports"]
+    if rep["expired"]:
+        st.caption("Full report ZIP expired (per repo retention).")
+    elif st.session_state.get("results_artifact", {}).get("id") != rep["id"]:
+        if st.button(f"⬇️ Fetch full report ZIP (SPDX, raw JSON/CSV) ~ {rep['size'] / 1024 / 1024:.1f} MB"):
+            data = download_artifact_zip(rep)
+            if data:
+                keep_artifact(rep["id"], rep["name"], data, rep.get("expires_at"))
+            else:
+                st.error("Failed to download artifact zip (empty response).")
+
+selected_art = st.session_state.get("results_artifact")
+art_handle = st.session_state.get(f"artifact_handle_{selected_art['id']}") if selected_art else None
+art_path = payloads.path(art_handle) if art_handle else None
+if art_handle and not (art_path and os.path.exists(art_path)):
+    # Spill file removed after the idle TTL: fetch again
+    st.session_state.pop("results_artifact", None)
+    st.info("The fetched results of this session expired – use 🔎 Check status & fetch again.")
+elif art_path:
+    art_id = selected_art["id"]
+    tab_dl, tab_spdx = st.tabs(["⬇️ Download", "📜 SPDX files"])
+
+    with tab_dl:
+        # The bytes handed to st.download_button stay in RAM for the session, so only on request
+        ready_key = f"download_ready_{art_id}"
+        if st.session_state.get(ready_key):
+            st.download_button("⬇️ Download ZIP", data=payloads.get(art_handle) or b"",
+                               file_name=f"{selected_art['name']}.zip", mime="application/zip",
+                               on_click=lambda: st.session_state.pop(ready_key, None))
+        elif st.button(f"📦 Prepare download (~{payloads.size(art_handle) / 1024 / 1024:.1f} MB)", key="prepare_download"):
+            st.session_state[ready_key] = True
+            st.rerun()
+
+    with tab_spdx:
+        idx = start_spdx_index(art_id, art_path, selected_art.get("expires_at"))
+        if idx.error:
+            st.error(f"Could not index SPDX report: {idx.error}")
+        f_col1, f_col2, f_col3 = st.columns([2, 2, 1])
+        with f_col1:
+            lic_options = [""] + [lic for lic, _ in idx.licenses()]
+            lic_filter = st.selectbox("License", lic_options, format_func=lambda x: x or "(any)",
+                                      key="spdx_license", on_change=_spdx_reset_cursor)
+        with f_col2:
+            path_glob = st.text_input("Path glob", value="", placeholder="e.g. */src/*.c",
+                                      key="spdx_glob", on_change=_spdx_reset_cursor)
+        with f_col3:
+            if idx.indexing:
+                st.button("🔄 Refresh", key="spdx_refresh", use_container_width=True)
+
+        cursors = st.session_state.setdefault("spdx_cursors", [0])
+        rows = idx.page(license=lic_filter, path_glob=path_glob, after_id=cursors[-1], limit=SPDX_PAGE_SIZE)
+        if idx.indexing:
+            st.caption(f"⏳ Indexing… {idx.file_count()} files so far (results grow as you refresh)")
+        else:
+            st.caption(f"{idx.count(lic_filter, path_glob)} matching files of {idx.file_count()}  •  page {len(cursors)}")
+        st.dataframe(rows, use_container_width=True, hide_index=True,
+                     column_order=["path", "concluded", "license_info", "copyright"])
+
+        p_col1, p_col2, _ = st.columns([1, 1, 4])
+        with p_col1:
+            st.button("◀ Prev", key="spdx_prev", disabled=len(cursors) <= 1,
+                      on_click=lambda: st.session_state["spdx_cursors"].pop())
+        with p_col2:
+            st.button("Next ▶", key="spdx_next", disabled=len(rows) < SPDX_PAGE_SIZE,
+                      on_click=lambda last=(rows[-1]["id"] if rows else 0): st.session_state["spdx_cursors"].append(last))
+
+# =========================
+# SESSION MEMORY (payload store)
+# =========================
+payload_diag = payloads.diagnostics()
+PAYLOAD_BYTES.set(payload_diag["resident_bytes"], where="resident")
+PAYLOAD_BYTES.set(payload_diag["spilled_bytes"], where="spilled")
+with st.expander("🧠 Session memory"):
+    st.caption(f"RAM {payload_diag['resident_bytes'] / 1024 / 1024:.1f} of {payload_diag['ram_budget'] / 1024 / 1024:.0f} MB • "
+               f"spilled to disk {payload_diag['spilled_bytes'] / 1024 / 1024:.1f} MB • "
+               f"evictions {payload_diag['evictions']} • sessions idle > {PAYLOAD_IDLE_TTL_H:g} h are dropped")
+    st.dataframe([{"session": r["session"][:8] + (" (this tab)" if r["session"] == payload_session else ""),
+                   "payloads": r["payloads"], "RAM MB": round(r["resident_bytes"] / 1024 / 1024, 2),
+                   "disk MB": round(r["spilled_bytes"] / 1024 / 1024, 2), "idle s": r["idle_s"]}
+                  for r in payload_diag["sessions"]], use_container_width=True, hide_index=True)
+
+# =========================
+# ARTIFACT CACHE (shared, on disk)
+# =========================
+with st.expander("🗄️ Artifact cache"):
+    cache_stats = get_artifact_cache().stats()
+    st.caption(f"`{ARTIFACT_CACHE_DIR}` • {cache_stats['entries']} artifact(s), "
+               f"{cache_stats['bytes'] / 1024 / 1024:.1f} of {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB • "
+               f"hits {cache_stats['hits']} / misses {cache_stats['misses']} ({cache_stats['hit_ratio']:.0%}) • "
+               f"evictions {cache_stats['evictions']}")
+    if st.button("Drop expired artifacts"):
+        st.success(f"Removed {get_artifact_cache().purge_expired()} expired artifact(s).")
+
+# =========================
+# UPLOAD STORAGE (retention)
+# =========================
+with st.expander("🧹 Upload storage clean-up"):
+    st.caption(f"Uploads live under `{UPLOADS_ROOT}/<sha256>/` in **{OWNER}/{REPO}@{BRANCH}**. "
+               "Uploads older than the retention period that no unexpired results artifact refers to can be removed.")
+    gc_days = st.number_input("Retention (days)", min_value=1, value=UPLOAD_RETENTION_DAYS, step=1)
+    if st.button("Find unreferenced uploads", disabled=not TOKEN):
+        try:
+            with st.spinner("Scanning uploads/ ..."):
+                st.session_state["upload_gc_plan"] = plan_upload_gc(int(gc_days))
+        except Exception as e:
+            st.error(f"Clean-up scan failed: {e}")
+    gc_plan = st.session_state.get("upload_gc_plan")
+    if gc_plan is not None:
+        if not gc_plan:
+            st.success("Nothing to clean up.")
+        else:
+            st.dataframe([{k: c[k] for k in ("path", "age_days", "size")} for c in gc_plan], use_container_width=True)
+            if st.button(f"🗑️ Delete {len(gc_plan)} upload(s)", disabled=not TOKEN):
+                failed = []
+                with st.spinner("Deleting ..."):
+                    for c in gc_plan:
+                        d = delete_stored_upload(c["path"], c["sha"])
+                        if d.status_code not in (200, 204):
+                            failed.append(f"{c['path']} ({d.status_code})")
+                st.session_state.pop("upload_gc_plan", None)
+                if failed:
+                    st.error("Some deletions failed: " + ", ".join(failed))
+                else:
+                    st.success(f"Deleted {len(gc_plan)} upload(s).")
 
 # =========================
 # FOOTER
 # =========================
 st.divider()
 st.caption(
-    "Notes: • The workflow supports scan types: docker, repo, upload-zip, upload-tar. "
+    "Notes: • The workflow supports scan types: docker, repo, upload-zip, upload-tar (several at once via batch). "
     "• Use **Load Tags** to quickly pick a release tag. • Artifacts are fetched via your token and offered as a ZIP download."
 )
+
+RERUN_LATENCY.observe(time.perf_counter() - _rerun_started)
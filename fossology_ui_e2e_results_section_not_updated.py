@@ -1,11 +1,16 @@
+import os
 import re
 import time
 import base64
+import tempfile
 from datetime import datetime, timedelta, timezone  # timezone added
 
 import requests
 import streamlit as st
 
+from fossology_artifact_cache import ArtifactCache
+from fossology_payloads import PayloadStore
+
 # =========================
 # CONFIG (edit if needed)
 # =========================
@@ -13,10 +18,16 @@ OWNER = "Bharathnelle335"          # ➜ Your GitHub username/org
 REPO = "Fossology_Workflow"        # ➜ Repo that contains the workflow file
 BRANCH = "main"                    # ➜ Branch to dispatch on
 WORKFLOW_FILE = "fossology.yml"  # ➜ Exact workflow filename in the repo
+ARTIFACT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "fossology_artifact_cache")  # ➜ Shared by all sessions
+PAYLOAD_DIR = os.path.join(tempfile.gettempdir(), "fossology_payloads")  # ➜ Spill files of session payloads
 
 # Token is expected from Streamlit secrets
 # Create .streamlit/secrets.toml with:  GITHUB_TOKEN = "ghp_xxx"
 TOKEN = st.secrets.get("GITHUB_TOKEN", "")
+# Byte budget of the on-disk artifact cache (least recently used ZIPs are evicted)
+ARTIFACT_CACHE_MAX_MB = int(st.secrets.get("ARTIFACT_CACHE_MAX_MB", 2048))
+# RAM budget for session payloads (uploads, fetched ZIPs); idle sessions are evicted to disk first
+PAYLOAD_RAM_MB = int(st.secrets.get("PAYLOAD_RAM_MB", 512))
 
 API_BASE = f"https://api.github.com/repos/{OWNER}/{REPO}"
 HEADERS = {
@@ -149,18 +160,35 @@ def get_run(run_id: int):
 def get_run_artifacts(run_id: int):
     return api_get(f"{API_BASE}/actions/runs/{run_id}/artifacts")
 
+@st.cache_resource(show_spinner=False)
+def get_artifact_cache() -> ArtifactCache:
+    return ArtifactCache(ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_MB << 20)
+
+@st.cache_resource(show_spinner=False)
+def get_payload_store() -> PayloadStore:
+    return PayloadStore(PAYLOAD_DIR, PAYLOAD_RAM_MB << 20)
+
 # NEW: tokened artifact fetch (avoids 403 when clicking raw URL)
-def fetch_artifact_zip(artifact_id: int) -> bytes | None:
+def fetch_artifact_zip(artifact_id: int, digest: str = "", expires_at=None) -> tuple:
     """
     Download artifact ZIP via API using the Authorization header.
     Requires PAT with Actions: Read (fine-grained) or a classic PAT with repo scope.
+    Served from the shared on-disk cache when another session already fetched it.
+    Returns (bytes or None, error message); the caller reports the error.
     """
-    url = f"{API_BASE}/actions/artifacts/{artifact_id}/zip"
-    r = api_get(url)  # requests follows redirects; headers are included
-    if r.status_code == 200:
-        return r.content
-    st.error(f"Artifact download failed: {r.status_code} {r.text}")
-    return None
+    errors = []
+
+    def download():  # runs inside the shared cache's fetch: no Streamlit calls here
+        url = f"{API_BASE}/actions/artifacts/{artifact_id}/zip"
+        r = api_get(url)  # requests follows redirects; headers are included
+        if r.status_code == 200:
+            return r.content
+        errors.append(f"{r.status_code} {r.text}")
+        return None
+    data = get_artifact_cache().fetch(artifact_id, download, digest=digest, expires_at=expires_at)
+    if data is None and not errors:
+        errors.append("content does not match the artifact digest")
+    return data, (errors[0] if errors else "")
 
 def upload_blob_to_repo(bytes_data: bytes, filename: str) -> str:
     ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
@@ -176,6 +204,12 @@ def upload_blob_to_repo(bytes_data: bytes, filename: str) -> str:
         raise RuntimeError(f"Upload failed: {r.status_code} {r.text}")
     return r.json().get("content", {}).get("download_url", "")
 
+# Session state keeps payload handles; the bytes live in the shared store (RAM budget + spill files)
+payloads = get_payload_store()
+payload_session = st.session_state.setdefault("payload_session", PayloadStore.new_session_id())
+payloads.touch(payload_session)
+payloads.gc()
+
 # =========================
 # MAIN FORM (NO SIDEBAR)
 # =========================
@@ -196,7 +230,7 @@ repo_url = ""
 repo_ref = "main"
 docker_image = "alpine:latest"
 file_url = ""
-file_uploader_bytes = None
+upload_handle = None
 uploaded_name = ""
 
 if scan_type == "docker":
@@ -253,13 +287,17 @@ elif scan_type in ("upload-zip", "upload-tar"):
     with up_col2:
         uploaded = st.file_uploader("Upload a file (ZIP/TAR)", type=["zip", "tar", "gz", "tgz"])  # gz/tgz for tarballs
         if uploaded is not None:
-            file_uploader_bytes = uploaded.read()
+            # Spill once per uploaded file; only the handle stays in session state
+            handle_key = f"upload_handle_{uploaded.file_id}"
+            if not payloads.path(st.session_state.get(handle_key, "")):
+                st.session_state[handle_key] = payloads.put(payload_session, uploaded.name, uploaded)
+            upload_handle = st.session_state[handle_key]
             uploaded_name = uploaded.name
-            st.write(f"Selected: {uploaded.name} ({len(file_uploader_bytes)} bytes)")
+            st.write(f"Selected: {uploaded.name} ({payloads.size(upload_handle)} bytes)")
             if TOKEN and st.button("Upload file to repo & fill URL"):
                 try:
                     with st.spinner("Uploading to repo ..."):
-                        url = upload_blob_to_repo(file_uploader_bytes, uploaded.name)
+                        url = upload_blob_to_repo(payloads.get(upload_handle), uploaded.name)
                     if url:
                         file_url = url
                         st.success("Uploaded. URL filled above.")
@@ -342,6 +380,9 @@ if "dispatch_time" in st.session_state:
                 st.info("No artifacts yet. They appear after the job finishes the 'Upload Artifact' step.")
             else:
                 st.markdown("### 📦 Artifacts")
+                cache_stats = get_artifact_cache().stats()
+                st.caption(f"Artifact cache: {cache_stats['entries']} ZIP(s), {cache_stats['bytes'] / 1024 / 1024:.1f} MB • "
+                           f"hits {cache_stats['hits']} / misses {cache_stats['misses']}")
                 for a in artifacts:
                     name = a.get("name")
                     size_in_bytes = a.get("size_in_bytes")
@@ -351,23 +392,34 @@ if "dispatch_time" in st.session_state:
                     st.write(f"• **{name}** — {size_in_bytes} bytes | Expired: {expired}")
 
                     fetch_key = f"fetch_{artifact_id}"
-                    buf_key = f"artifact_bytes_{artifact_id}"
+                    handle_key = f"artifact_handle_{artifact_id}"
 
                     if st.button("Fetch", key=fetch_key):
                         with st.spinner("Downloading artifact..."):
-                            content = fetch_artifact_zip(artifact_id)
+                            content, error = fetch_artifact_zip(artifact_id, a.get("digest") or "", a.get("expires_at"))
                         if content:
-                            st.session_state[buf_key] = content
+                            st.session_state[handle_key] = payloads.put(payload_session, name, content)
                             st.success("Ready to download")
-
-                    if buf_key in st.session_state:
-                        st.download_button(
-                            "Download ZIP",
-                            data=st.session_state[buf_key],
-                            file_name=f"{name}.zip",
-                            mime="application/zip",
-                            key=f"dl_{artifact_id}"
-                        )
+                        else:
+                            st.error(f"Artifact download failed: {error}")
+
+                    # The bytes handed to st.download_button stay in RAM for the session, so only on request
+                    handle = st.session_state.get(handle_key, "")
+                    ready_key = f"download_ready_{artifact_id}"
+                    if payloads.path(handle):
+                        if st.session_state.get(ready_key):
+                            st.download_button(
+                                "Download ZIP",
+                                data=payloads.get(handle) or b"",
+                                file_name=f"{name}.zip",
+                                mime="application/zip",
+                                key=f"dl_{artifact_id}",
+                                on_click=lambda k=ready_key: st.session_state.pop(k, None),
+                            )
+                        elif st.button(f"📦 Prepare download (~{payloads.size(handle) / 1024 / 1024:.1f} MB)",
+                                       key=f"prepare_{artifact_id}"):
+                            st.session_state[ready_key] = True
+                            st.rerun()
         else:
             st.error(f"Failed to list artifacts: {art_resp.status_code} {art_resp.text}")
 
@@ -390,6 +442,18 @@ if "dispatch_time" in st.session_state:
         else:
             st.error(f"Could not fetch recent runs: {r2.status_code}")
 
+# =========================
+# SESSION MEMORY
+# =========================
+with st.expander("🧠 Session memory"):
+    diag = payloads.diagnostics()
+    st.caption(f"RAM {diag['resident_bytes'] / 1024 / 1024:.1f} of {diag['ram_budget'] / 1024 / 1024:.0f} MB • "
+               f"spilled to disk {diag['spilled_bytes'] / 1024 / 1024:.1f} MB • evictions {diag['evictions']}")
+    st.dataframe([{"session": r["session"][:8] + (" (this tab)" if r["session"] == payload_session else ""),
+                   "payloads": r["payloads"], "RAM MB": round(r["resident_bytes"] / 1024 / 1024, 2),
+                   "disk MB": round(r["spilled_bytes"] / 1024 / 1024, 2), "idle s": r["idle_s"]}
+                  for r in diag["sessions"]], use_container_width=True)
+
 # =========================
 # FOOTER
 # =========================
@@ -0,0 +1,80 @@
+import json
+import os
+import tarfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import fossology_backend as backend
+import fossology_loadtest as loadtest
+
+@pytest.fixture
+def fossology():
+    """FOSSology stand-in on an ephemeral port; yields (api base URL, state)."""
+    state = loadtest.FossologyStandIn(unpack_s=0.2, scan_s=0.3, report_s=0.1)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), loadtest.make_fossology_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/repo/api/v1", state
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def archive(tmp_path):
+    src = tmp_path / "LICENSE"
+    src.write_text("MIT\n")
+    path = str(tmp_path / "input.tar.gz")
+    with tarfile.open(path, "w:gz") as tar:
+        tar.add(str(src), arcname="input/LICENSE")
+    return path
+
+def test_queue_scans_and_deletes_uploads(fossology, archive, tmp_path):
+    url, state = fossology
+    client = backend.Backend(url, username="fossy", password="fossy", poll_s=0.1)
+    queue = backend.UploadQueue(client, concurrency=2, max_active=4, retention="delete")
+    futures = [queue.submit(archive, "application/gzip", ["nomos", "copyright"], f"in{n}", str(tmp_path / f"out{n}"))
+               for n in range(2)]
+    results = [f.result(timeout=60) for f in futures]
+    queue.close()
+
+    assert [r["status"] for r in results] == ["success", "success"]
+    for n, r in enumerate(results):
+        names = os.listdir(tmp_path / f"out{n}")
+        assert {f"report_{fmt}" for fmt in backend.REPORT_FORMATS} <= {name.rsplit(f"_in{n}_", 1)[0] for name in names}
+        summary = next(name for name in names if name.startswith(f"uploads_{r['upload_id']}_summary") and name.endswith(".json"))
+        with open(tmp_path / f"out{n}" / summary) as fh:
+            json.load(fh)
+    stats = state.stats()
+    assert sorted(stats["deleted_uploads"]) == sorted(r["upload_id"] for r in results)
+    assert stats["tokens_created"] == 1        # one minted token shared by both uploads
+    assert client.workflow_uploads() == []
+
+def test_release_prunes_only_old_workflow_uploads(fossology, archive):
+    url, state = fossology
+    client = backend.Backend(url, username="fossy", password="fossy", poll_s=0.1)
+    old = client.upload(archive, "application/gzip")
+    current = client.upload(archive, "application/gzip")
+    other = client.upload(archive, "application/gzip", description="uploaded by hand")
+    for upload_id in (old, other):
+        state.uploads[upload_id]["created"] -= 10 * 86400
+
+    out = client.release(current, "7d")
+    assert out["pruned"] == [old] and out["deleted"] == []
+    assert sorted(int(u["id"]) for u in client.workflow_uploads()) == [current]
+    assert other in state.uploads
+
+    assert client.release(current, "keep")["pruned"] == []
+    with pytest.raises(backend.BackendError):
+        client.release(current, "forever")
+    client.release(current, "delete")
+    assert client.workflow_uploads() == []
+
+def test_rejected_token_without_credentials_fails(fossology):
+    url, _ = fossology
+    client = backend.Backend(url, token="not-a-token", poll_s=0.1, timeout=5)
+    t0 = time.time()
+    with pytest.raises(backend.BackendError):
+        client.active_jobs()
+    assert time.time() - t0 < 5
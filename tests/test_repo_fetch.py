@@ -0,0 +1,71 @@
+import os
+import shutil
+import subprocess
+import tarfile
+
+import pytest
+
+import fossology_repo_fetch as repo_fetch
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+def run_git(cwd, *args) -> str:
+    return subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+                          cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+@pytest.fixture
+def origin(tmp_path):
+    """Local repo with export-ignore / export-subst attributes, a symlink, a tag v1 and one commit after it."""
+    src = tmp_path / "origin"
+    src.mkdir()
+    run_git(src, "init", "--quiet", "-b", "main")
+    # Partial fetches of a local repo need the same server options GitHub has
+    run_git(src, "config", "uploadpack.allowFilter", "true")
+    run_git(src, "config", "uploadpack.allowAnySHA1InWant", "true")
+    (src / "a.txt").write_text("alpha\n")
+    (src / "tests").mkdir()
+    (src / "tests" / "t.txt").write_text("test data\n")
+    (src / "v.txt").write_text("$Format:%H$\n")
+    (src / ".gitattributes").write_text("tests export-ignore\nv.txt export-subst\n")
+    os.symlink("a.txt", src / "link")
+    run_git(src, "add", "-A")
+    run_git(src, "commit", "--quiet", "-m", "one")
+    run_git(src, "tag", "v1")
+    (src / "b.txt").write_text("beta\n")
+    run_git(src, "add", "-A")
+    run_git(src, "commit", "--quiet", "-m", "two")
+    return src
+
+def test_tag_export_keeps_the_raw_tree(origin, tmp_path):
+    out_tar = str(tmp_path / "repo.tar.gz")
+    info = repo_fetch.fetch(f"file://{origin}", "v1", str(tmp_path / "cache"), out_tar=out_tar)
+    assert info["kind"] == "tag"
+    assert info["sha"] == run_git(origin, "rev-parse", "v1^{commit}")
+    assert info["changed"] and not info["mirror_reused"]
+    with tarfile.open(out_tar) as tar:
+        names = set(tar.getnames())
+        assert {"a.txt", "tests/t.txt", "v.txt", "link", ".gitattributes"} <= names
+        assert "b.txt" not in names
+        assert tar.extractfile("v.txt").read() == b"$Format:%H$\n"   # not substituted
+        assert tar.getmember("link").issym()
+
+def test_second_fetch_is_served_from_the_mirror(origin, tmp_path):
+    cache = str(tmp_path / "cache")
+    repo_fetch.fetch(f"file://{origin}", "v1", cache, out_tar=str(tmp_path / "one.tar.gz"))
+    again = repo_fetch.fetch(f"file://{origin}", "v1", cache, out_tar=str(tmp_path / "two.tar.gz"))
+    assert again["mirror_reused"]
+    assert again["blobs_fetched"] == 0
+    assert not again["changed"]
+
+    newer = repo_fetch.fetch(f"file://{origin}", "main", cache, out_dir=str(tmp_path / "tree"))
+    assert newer["kind"] == "branch" and newer["changed"]
+    assert (tmp_path / "tree" / "b.txt").read_text() == "beta\n"
+    assert newer["mirror"] == again["mirror"]
+
+def test_abbreviated_commit_and_unknown_ref(origin, tmp_path):
+    full = run_git(origin, "rev-parse", "v1^{commit}")
+    info = repo_fetch.fetch(f"file://{origin}", full[:10], str(tmp_path / "cache"), out_dir=str(tmp_path / "tree"))
+    assert info["kind"] == "commit" and info["sha"] == full
+    assert not (tmp_path / "tree" / "b.txt").exists()
+    with pytest.raises(RuntimeError):
+        repo_fetch.fetch(f"file://{origin}", "no-such-branch", str(tmp_path / "cache"))
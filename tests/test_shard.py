@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+
+import fossology_shard as shard
+
+def spdx_doc(files, pkg_licenses):
+    lines = ["SPDXVersion: SPDX-2.3", "SPDXID: SPDXRef-DOCUMENT", "PackageName: input.tar.gz",
+             "SPDXID: SPDXRef-upload1", "PackageVerificationCode: 0000000000000000000000000000000000000000"]
+    lines += [f"PackageLicenseInfoFromFiles: {lic}" for lic in pkg_licenses]
+    lines.append("")
+    for n, (path, sha1, lic) in enumerate(files, start=1):
+        lines += [f"FileName: {path}", f"SPDXID: SPDXRef-item{n}", f"FileChecksum: SHA1: {sha1}",
+                  "LicenseConcluded: NOASSERTION", f"LicenseInfoInFile: {lic}", ""]
+    lines += ["Relationship: SPDXRef-upload1 CONTAINS SPDXRef-item1", ""]
+    return "\n".join(lines)
+
+def write_shard(root, upload_id, files, summary):
+    rdir = os.path.join(root, "fossology_reports")
+    os.makedirs(rdir)
+    with open(os.path.join(rdir, "report_spdx2_T_1.spdx2"), "w") as fh:
+        fh.write(spdx_doc(files, sorted({f[2] for f in files})))
+    licenses = [{"filePath": path, "findings": {"scanner": [lic], "conclusion": None}} for path, _, lic in files]
+    with open(os.path.join(rdir, f"uploads_{upload_id}_licenses_agent_nomos_T_1.json"), "w") as fh:
+        json.dump(licenses, fh)
+    with open(os.path.join(rdir, f"uploads_{upload_id}_summary_T_1.json"), "w") as fh:
+        json.dump(dict(summary, id=upload_id, uploadId=upload_id, uploadName=f"shard{upload_id}.tar.gz"), fh)
+    return root
+
+def test_merge_reports(tmp_path):
+    a = write_shard(str(tmp_path / "s0"), 11, [("a.c", "1" * 40, "MIT"), ("b.c", "2" * 40, "GPL-2.0-only")],
+                    {"totalLicenses": 2, "uniqueLicenses": 2, "copyrightCount": 3, "mainLicense": "MIT"})
+    b = write_shard(str(tmp_path / "s1"), 22, [("c.c", "3" * 40, "MIT")],
+                    {"totalLicenses": 1, "uniqueLicenses": 1, "copyrightCount": 4, "mainLicense": "MIT"})
+    out = str(tmp_path / "out")
+    written = shard.merge([a, b], out)
+    assert "report_spdx2_T_1.spdx2" in written
+
+    with open(os.path.join(out, "report_spdx2_T_1.spdx2")) as fh:
+        text = fh.read()
+    _, files, _ = shard.spdx_sections(text)
+    ids = [l.split(":", 1)[1].strip() for block in files for l in block if l.startswith("SPDXID:")]
+    assert ids == ["SPDXRef-item1", "SPDXRef-item2", "SPDXRef-shard1-item1"]
+    # Only file SPDXIDs get the shard prefix, also where relationships refer to them
+    assert "Relationship: SPDXRef-upload1 CONTAINS SPDXRef-shard1-item1" in text
+    assert "SPDXRef-shard1-upload1" not in text
+    expected = hashlib.sha1(("1" * 40 + "2" * 40 + "3" * 40).encode()).hexdigest()
+    assert f"PackageVerificationCode: {expected}" in text
+    assert text.count("PackageLicenseInfoFromFiles:") == 2
+
+    summary_name = next(n for n in written if "summary" in n and n.endswith(".json"))
+    with open(os.path.join(out, summary_name)) as fh:
+        summary = json.load(fh)
+    assert summary["totalLicenses"] == 3
+    assert summary["copyrightCount"] == 7
+    assert summary["uniqueLicenses"] == 2      # MIT + GPL-2.0-only, not 2 + 1
+    assert summary["mainLicense"] == "MIT"
+    assert "uploadId" not in summary and "id" not in summary
+
+    licenses_name = next(n for n in written if "licenses" in n and n.endswith(".json"))
+    with open(os.path.join(out, licenses_name)) as fh:
+        assert [e["filePath"] for e in json.load(fh)] == ["a.c", "b.c", "c.c"]
+
+def test_verification_code_needs_every_sha1():
+    blocks = [["FileName: a", "FileChecksum: SHA1: " + "1" * 40], ["FileName: b"]]
+    assert shard.verification_code(blocks) == ""
+    merged = shard.merge_spdx([spdx_doc([("a", "1" * 40, "MIT")], ["MIT"]),
+                               spdx_doc([("b", "", "MIT")], ["MIT"])])
+    assert "PackageVerificationCode" not in merged